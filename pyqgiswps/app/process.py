@@ -12,19 +12,29 @@
 # Please consult PYWPS_LICENCE.txt for details
 #
 
+import copy
 import logging
+import os
+import traceback
 
+from functools import partial
 from typing import (
     Any,
     Callable,
+    Dict,
+    List,
     Mapping,
+    Optional,
+    Protocol,
     Sequence,
+    Tuple,
 )
 
 import pyqgiswps.ogc as ogc
 
 from pyqgiswps.app.common import Metadata
 from pyqgiswps.app.request import WPSRequest, WPSResponse
+from pyqgiswps.exceptions import ProcessException
 from pyqgiswps.inout import WPSInput, WPSOutput
 
 LOGGER = logging.getLogger('SRVLOG')
@@ -34,6 +44,117 @@ WPSHandler = Callable[
     WPSResponse,
 ]
 
+WPSBatchHandler = Callable[
+    [WPSRequest, WPSResponse, Sequence[Mapping[str, Sequence[WPSInput]]], int],
+    Tuple[List[Any], List[str]],
+]
+
+# Run the workflow steps given in `request.workflow`
+# then the process itself
+WPSWorkflowHandler = WPSHandler
+
+
+class WPSTileHandler(Protocol):
+    """ Tiled execution of a process
+
+        The process is run on tiles of its extent by
+        distinct workers, then tiles outputs are merged.
+    """
+
+    def plan(self, request: WPSRequest, response: WPSResponse, count: int) -> List[str]:
+        """ Return the extents of about `count` tiles
+        """
+        ...
+
+    def run_tile(self, request: WPSRequest, response: WPSResponse, extent: str, index: int) -> Dict[str, str]:
+        """ Run the process on the tile `extent`
+
+            Return the paths of the tile outputs
+        """
+        ...
+
+    def merge(self, request: WPSRequest, response: WPSResponse, tiles: Sequence[Mapping[str, str]]) -> WPSResponse:
+        """ Merge the tiles outputs as the process outputs
+        """
+        ...
+
+
+def run_batch_items(
+    request: WPSRequest,
+    response: WPSResponse,
+    items: Sequence[Mapping[str, Sequence[WPSInput]]],
+    offset: int,
+    handler: WPSHandler,
+) -> Tuple[List[Any], List[str]]:
+    """ Default batch handler
+
+        Run the process handler for each item from index `offset`, return
+        the items results and output files. Files of each item are
+        stored in a subdirectory of the job workdir.
+    """
+    workdir = response.process.workdir
+    results = []
+    output_files = []
+    for index, inputs in enumerate(items, offset):
+        itemdir = os.path.join(workdir, str(index))
+        os.makedirs(itemdir, exist_ok=True)
+        os.chdir(itemdir)
+        process = copy.deepcopy(response.process)
+        process.set_workdir(itemdir)
+
+        item_request = copy.copy(request)
+        item_request.inputs = inputs
+        item_response = request.create_response(process, response.uuid)
+        item_response.store_url = f"{response.store_url}{index}/"
+        try:
+            handler(item_request, item_response)
+            item_response.status = WPSResponse.STATUS.DONE_STATUS
+            results.append({
+                'status': response.JOBSTATUS.SUCCESS.value,
+                'outputs': item_response.get_execute_response(),
+            })
+            output_files.extend(f"{index}/{name}" for name in item_response.output_files)
+        except ProcessException as e:
+            results.append({'status': response.JOBSTATUS.FAILED.value, 'message': str(e)})
+        except Exception:
+            LOGGER.error(traceback.format_exc())
+            results.append({'status': response.JOBSTATUS.FAILED.value, 'message': "Internal error"})
+    return results, output_files
+
+
+class WPSModelHandler(Protocol):
+    """ Parallel execution of the steps of a model
+
+        Independent steps are run by distinct workers,
+        then the model results are written.
+    """
+
+    def plan(self, request: WPSRequest, response: WPSResponse) -> Dict[str, List[str]]:
+        """ Return the steps of the model with the
+            steps they depend on
+        """
+        ...
+
+    def run_child(
+        self,
+        request: WPSRequest,
+        response: WPSResponse,
+        child_id: str,
+        child_outputs: Mapping[str, Mapping[str, Any]],
+    ) -> Tuple[Dict[str, Any], Dict[str, Any]]:
+        """ Run the step `child_id` given the outputs of
+            the steps it depends on
+
+            Return the step outputs and the model results
+            produced by the step
+        """
+        ...
+
+    def merge(self, request: WPSRequest, response: WPSResponse, results: Mapping[str, Any]) -> WPSResponse:
+        """ Set the model results as the process outputs
+        """
+        ...
+
 
 class WPSProcess(*ogc.exports.WPSProcess):
     """ Define a process descriptor
@@ -51,10 +172,25 @@ class WPSProcess(*ogc.exports.WPSProcess):
         outputs: Sequence[WPSOutput] = (),
         version: str = 'None',
         keywords: Sequence[str] = (),
+        batch_handler: Optional[WPSBatchHandler] = None,
+        workflow_handler: Optional[WPSWorkflowHandler] = None,
+        tile_handler: Optional[WPSTileHandler] = None,
+        model_handler: Optional[WPSModelHandler] = None,
+        thread_safe: bool = False,
         **kwargs,
     ):
 
         self.handler = handler
+        self.batch_handler = batch_handler or partial(run_batch_items, handler=handler)
+        # Workflows are not supported if not set
+        self.workflow_handler = workflow_handler
+        # Tiled execution is not supported if not set
+        self.tile_handler = tile_handler
+        # Parallel execution of steps is not supported if not set
+        self.model_handler = model_handler
+        # Thread-safe handlers may run concurrently
+        # in multi-slot workers
+        self.thread_safe = thread_safe
         self.identifier = identifier
         self.title = title
         self.abstract = abstract
@@ -65,6 +201,13 @@ class WPSProcess(*ogc.exports.WPSProcess):
         self.workdir = None
         self.keywords = keywords
 
+    def project_version(self, map_uri: Optional[str]) -> Optional[str]:
+        """ Return the version of the project `map_uri`
+
+            Used for keying cached results of memoized processes
+        """
+        return None
+
     def clean(self):
         """ Clean the process working dir and other temporary files
         """
@@ -23,13 +23,15 @@ from urllib.parse import (
 from typing_extensions import (
     Any,
     Dict,
+    List,
     Optional,
     Sequence,
 )
 
 from ..config import confservice
 from ..exceptions import NoApplicableCode
-from ..executors.logstore import STATUS, logstore
+from ..executors.logstore import STATUS, alogstore, logstore
+from .workflow import Workflow
 
 LOGGER = logging.getLogger('SRVLOG')
 
@@ -46,6 +48,10 @@ class WPSRequest:
         self.execute_async = False
         self.inputs: Dict[str, Any] = {}
         self.outputs: Dict[str, Any] = {}
+        # Inputs of batch items
+        self.batch: Optional[List[Dict[str, Any]]] = None
+        # Steps of workflow execution
+        self.workflow: Optional[Workflow] = None
         self.map_uri: Optional[str] = None
         self.host_url: Optional[str] = None
 
@@ -97,6 +103,12 @@ class WPSRequest:
             'timeout': self.timeout,
         }
 
+        if self.batch is not None:
+            obj['batch'] = [{i: [inpt.json for inpt in item[i]] for i in item} for item in self.batch]
+
+        if self.workflow is not None:
+            obj['workflow'] = self.workflow.json
+
         return obj
 
     def __repr__(self) -> str:
@@ -131,6 +143,8 @@ class WPSResponse:
         self.uuid = uuid
         self.document = None
         self.output_files = []
+        # Results of batch items
+        self.batch_results: Optional[List[Any]] = None
 
     def resolve_store_url(self, url: str, as_output: bool = False) -> str:
         """ Resolve 'store:' uri
@@ -163,6 +177,36 @@ class WPSResponse:
         :param pyqgiswps.app.WPSResponse.STATUS status: process status - user should usually
             ommit this parameter
         """
+        self._set_status(message, status_percentage, status)
+
+        # check if storing of the status is requested
+        if len(self.document) > 0:
+            self._write_response_doc(self.uuid, self.document)
+        if self.status >= WPSResponse.STATUS.DONE_STATUS:
+            self.process.clean()
+
+        self._update_response(self.uuid)
+
+    async def aupdate_status(self, message=None, status_percentage=None, status=None):
+        """ Update status report from the front-end event loop
+
+            See `update_status`
+        """
+        self._set_status(message, status_percentage, status)
+
+        if len(self.document) > 0:
+            try:
+                await alogstore.write_response(self.uuid, self.encode_response(self.document))
+            except OSError as e:
+                raise NoApplicableCode('Writing Response Document failed with : %s' % e, code=500)
+        if self.status >= WPSResponse.STATUS.DONE_STATUS:
+            self.process.clean()
+
+        await alogstore.update_response(self.uuid, self)
+
+    def _set_status(self, message, status_percentage, status):
+        """ Update the status and rebuild the response document
+        """
         if message is not None:
             self.message = message
 
@@ -175,13 +219,6 @@ class WPSResponse:
         # Write response
         # rebuild the doc and update the status xml file
         self.document = self.get_execute_response()
-        # check if storing of the status is requested
-        if len(self.document) > 0:
-            self._write_response_doc(self.uuid, self.document)
-        if self.status >= WPSResponse.STATUS.DONE_STATUS:
-            self.process.clean()
-
-        self._update_response(self.uuid)
 
     def _write_response_doc(self, request_uuid, doc):
         """ Write response document
@@ -18,8 +18,12 @@ import os
 
 from typing import (
     Any,
+    Collection,
+    Dict,
     Iterable,
     Iterator,
+    List,
+    Mapping,
     Optional,
     Sequence,
     Union,
@@ -27,14 +31,17 @@ from typing import (
 
 from ..config import confservice
 from ..exceptions import (
+    InvalidParameterValue,
     MissingParameterValue,
     NoApplicableCode,
+    OperationNotSupported,
 )
 from ..executors.processingexecutor import ProcessingExecutor
 from ..inout.inputs import BoundingBoxInput, ComplexInput, LiteralInput
 from ..protos import JsonValue
 from .process import WPSProcess
-from .request import WPSRequest
+from .request import WPSRequest, WPSResponse
+from .workflow import StepRef, Workflow
 
 # Define generic WPS Input
 WPSInput = Union[ComplexInput, LiteralInput, BoundingBoxInput]
@@ -68,31 +75,31 @@ class Service():
     def get_processes(self, idents: Iterable[str], map_uri: Optional[str] = None) -> Sequence[WPSProcess]:
         return self.executor.get_processes(idents, map_uri=map_uri)
 
-    def get_results(self, uuid: str) -> Any:
-        doc = self.executor.get_results(uuid)
+    async def get_results(self, uuid: str) -> Any:
+        doc = await self.executor.get_results(uuid)
         if doc is None:
             raise NoApplicableCode(f"No results found for {uuid}", code=404)
 
         return doc
 
-    def get_status(
+    async def get_status(
         self,
         uuid: Optional[str] = None,
         **kwargs,
     ) -> Union[JsonValue, Iterator[JsonValue]]:
         """ Return the status of the stored processes
         """
-        return self.executor.get_status(uuid, **kwargs)
+        return await self.executor.get_status(uuid, **kwargs)
 
-    def delete_results(self, uuid: str, force: bool = False) -> bool:
+    async def delete_results(self, uuid: str, force: bool = False) -> bool:
         """ Delete process results and status
         """
-        return self.executor.delete_results(uuid, force)
+        return await self.executor.delete_results(uuid, force)
 
-    def kill_job(self, uuid: str, pid: Optional[int] = None) -> bool:
+    async def kill_job(self, uuid: str) -> bool:
         """ Kill process job
         """
-        return self.executor.kill_job(uuid, pid)
+        return await self.executor.kill_job(uuid)
 
     async def execute_process(self, process: WPSProcess, wps_request: WPSRequest, uuid: str) -> bytes:
         """Parse and perform Execute WPS request call
@@ -104,6 +111,90 @@ class Service():
 
         self.validate_request_inputs(process, wps_request)
 
+        wps_response = self.create_response(process, wps_request, uuid)
+
+        document = await self.executor.execute(wps_request, wps_response)
+
+        return document
+
+    async def execute_batch(self, process: WPSProcess, wps_request: WPSRequest, uuid: str) -> bytes:
+        """ Validate the inputs of all batch items and
+            execute the batch as a single job
+        """
+        process = copy.deepcopy(process)
+
+        batch = []
+        for index, inputs in enumerate(wps_request.batch):
+            wps_request.inputs = inputs
+            try:
+                self.validate_request_inputs(process, wps_request)
+            except NoApplicableCode as e:
+                e.locator = f"items/{index}/{e.locator}" if e.locator else f"items/{index}"
+                raise
+            batch.append(wps_request.inputs)
+
+        wps_request.inputs = {}
+        wps_request.batch = batch
+
+        wps_response = self.create_response(process, wps_request, uuid)
+
+        document = await self.executor.execute_batch(wps_request, wps_response)
+
+        return document
+
+    async def execute_workflow(self, process: WPSProcess, wps_request: WPSRequest, uuid: str) -> bytes:
+        """ Validate the workflow steps and execute
+            the workflow as a single job
+        """
+        process = copy.deepcopy(process)
+
+        def _check_support(p: WPSProcess, locator: str):
+            if p.workflow_handler is None:
+                raise OperationNotSupported(f"Process '{p.identifier}' does not support workflows", locator)
+
+        _check_support(process, 'process')
+
+        # Output identifiers of validated steps
+        step_outputs: Dict[str, List[str]] = {}
+        steps = []
+        for step in wps_request.workflow.steps:
+            locator = f"steps/{step.name}"
+            step_process = self.get_process(step.identifier, map_uri=wps_request.map_uri)
+            _check_support(step_process, locator)
+            try:
+                self.check_step_refs(step.refs, step_outputs)
+                inputs = self.validate_inputs(step_process, step.inputs, step.refs)
+            except NoApplicableCode as e:
+                e.locator = f"{locator}/{e.locator}" if e.locator else locator
+                raise
+            steps.append(step._replace(inputs=inputs))
+            step_outputs[step.name] = [o.identifier for o in step_process.outputs]
+
+        refs = wps_request.workflow.refs
+        self.check_step_refs(refs, step_outputs)
+
+        self.validate_request_inputs(process, wps_request, refs)
+
+        wps_request.workflow = Workflow(steps, refs)
+
+        wps_response = self.create_response(process, wps_request, uuid)
+
+        document = await self.executor.execute(wps_request, wps_response)
+
+        return document
+
+    @staticmethod
+    def check_step_refs(refs: Mapping[str, StepRef], step_outputs: Mapping[str, Sequence[str]]):
+        """ Check that referenced outputs exist
+        """
+        for ident, ref in refs.items():
+            if ref.output not in step_outputs[ref.step]:
+                raise InvalidParameterValue(f"Unknown output '{ref.output}' of step '{ref.step}'", ident)
+
+    def create_response(self, process: WPSProcess, wps_request: WPSRequest, uuid: str) -> WPSResponse:
+        """ Create the job working directory and
+            the response object
+        """
         workdir = os.path.abspath(confservice.get('server', 'workdir'))
         workdir = os.path.join(workdir, str(uuid))
 
@@ -112,26 +203,47 @@ class Service():
 
         process.set_workdir(workdir)
 
-        # Create response object
-        wps_response = wps_request.create_response(process, uuid)
+        return wps_request.create_response(process, uuid)
 
-        document = await self.executor.execute(wps_request, wps_response)
+    def validate_request_inputs(
+        self,
+        process: WPSProcess,
+        wps_request: WPSRequest,
+        refs: Collection[str] = (),
+    ):
+        """ Check request
 
-        return document
+            Inputs in `refs` are computed by workflow steps.
+        """
+        wps_request.inputs = self.validate_inputs(process, wps_request.inputs, refs)
 
-    def validate_request_inputs(self, process: WPSProcess, wps_request: WPSRequest):
-        """ Check request
+        # Validate outputs
+        for outpt in process.outputs:
+            out = wps_request.outputs.get(outpt.identifier)
+            if out:
+                outpt.validate_output(out)
+
+    def validate_inputs(
+        self,
+        process: WPSProcess,
+        inputs: Optional[Mapping[str, Sequence[WPSInput]]],
+        refs: Collection[str] = (),
+    ) -> Dict[str, List[WPSInput]]:
+        """ Validate inputs against the process definitions
         """
         LOGGER.debug('Checking if datainputs is required and has been passed')
         if process.inputs:
-            if wps_request.inputs is None:
+            if inputs is None:
                 raise MissingParameterValue('Missing "datainputs" parameter', 'datainputs')
 
         LOGGER.debug('Checking if all mandatory inputs have been passed')
         data_inputs = {}
         for inpt in process.inputs:
             LOGGER.debug('Checking input: %s', inpt.identifier)
-            if inpt.identifier not in wps_request.inputs:
+            if inpt.identifier in refs:
+                # Value is computed by a workflow step
+                continue
+            if inpt.identifier not in inputs:
                 if inpt.min_occurs > 0:
                     LOGGER.error('Missing parameter value: %s', inpt.identifier)
                     raise MissingParameterValue(inpt.identifier, inpt.identifier)
@@ -139,16 +251,10 @@ class Service():
                     # Do not add the input
                     pass
             else:
-                inputs = wps_request.inputs[inpt.identifier]
-                if len(inputs) < inpt.min_occurs:
+                values = inputs[inpt.identifier]
+                if len(values) < inpt.min_occurs:
                     raise MissingParameterValue(description='Missing input data', locator=inpt.identifier)
 
-                data_inputs[inpt.identifier] = [inpt.clone().validate_input(inp) for inp in inputs]
+                data_inputs[inpt.identifier] = [inpt.clone().validate_input(inp) for inp in values]
 
-        wps_request.inputs = data_inputs
-
-        # Validate outputs
-        for outpt in process.outputs:
-            out = wps_request.outputs.get(outpt.identifier)
-            if out:
-                outpt.validate_output(out)
+        return data_inputs
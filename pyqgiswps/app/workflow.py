@@ -0,0 +1,106 @@
+#
+# Copyright 2026 3liz
+# Author: David Marteau
+#
+# This Source Code Form is subject to the terms of the Mozilla Public
+# License, v. 2.0. If a copy of the MPL was not distributed with this
+# file, You can obtain one at http://mozilla.org/MPL/2.0/.
+
+""" Workflow definitions
+
+    A workflow is a graph of process invocations run as a single job:
+    inputs of a step or of the final process may reference an output
+    of a previous step with `{"step": <name>, "output": <output id>}`.
+"""
+from typing import (
+    Any,
+    Dict,
+    List,
+    Mapping,
+    NamedTuple,
+    Sequence,
+    Tuple,
+)
+
+from ..exceptions import InvalidParameterValue
+from ..inout import WPSInput
+
+
+class StepRef(NamedTuple):
+    step: str
+    output: str
+
+
+class WorkflowStep(NamedTuple):
+    name: str
+    identifier: str
+    inputs: Dict[str, Sequence[WPSInput]]
+    refs: Dict[str, StepRef]
+
+    @property
+    def json(self) -> Dict[str, Any]:
+        return {
+            'name': self.name,
+            'identifier': self.identifier,
+            'inputs': {i: [inpt.json for inpt in self.inputs[i]] for i in self.inputs},
+            'refs': {i: ref._asdict() for i, ref in self.refs.items()},
+        }
+
+
+class Workflow(NamedTuple):
+    # Steps in execution order
+    steps: List[WorkflowStep]
+    # References of the final process inputs
+    refs: Dict[str, StepRef]
+
+    @property
+    def json(self) -> Dict[str, Any]:
+        return {
+            'steps': [step.json for step in self.steps],
+            'refs': {i: ref._asdict() for i, ref in self.refs.items()},
+        }
+
+
+def split_step_refs(inputs: Mapping[str, Any]) -> Tuple[Dict[str, Any], Dict[str, StepRef]]:
+    """ Separate step references from input values
+    """
+    values = {}
+    refs = {}
+    for ident, value in inputs.items():
+        if isinstance(value, dict) and 'step' in value:
+            output = value.get('output')
+            if not isinstance(value['step'], str) or not isinstance(output, str):
+                raise InvalidParameterValue("Invalid step reference", ident)
+            refs[ident] = StepRef(value['step'], output)
+        else:
+            values[ident] = value
+    return values, refs
+
+
+def sort_steps(deps: Mapping[str, Sequence[str]], targets: Sequence[str]) -> List[str]:
+    """ Return the steps required for computing
+        `targets` in execution order
+
+        `deps` maps each step to the steps it depends on.
+    """
+    order = []
+    visiting = set()
+    done = set()
+
+    def _visit(name: str, locator: str):
+        if name in done:
+            return
+        if name not in deps:
+            raise InvalidParameterValue(f"Unknown workflow step '{name}'", locator)
+        if name in visiting:
+            raise InvalidParameterValue(f"Cycle detected at workflow step '{name}'", locator)
+        visiting.add(name)
+        for dep in deps[name]:
+            _visit(dep, f"steps/{name}")
+        visiting.discard(name)
+        done.add(name)
+        order.append(name)
+
+    for name in targets:
+        _visit(name, "inputs")
+    return order
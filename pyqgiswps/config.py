@@ -20,10 +20,11 @@ Reads the PyWPS configuration file
 import configparser
 import functools
 import os
+import socket
 import sys
 import tempfile
 
-from typing import Any
+from typing import Any, List
 
 from pyqgisservercontrib.core import componentmanager
 
@@ -81,12 +82,72 @@ def load_configuration():
     CONFIG.set('server', 'http_proxy', getenv('QGSWPS_SERVER_HTTP_PROXY', 'yes'))
     # Number of parallel processes that are allowed to run algorithms
     CONFIG.set('server', 'parallelprocesses', getenv('QGSWPS_SERVER_PARALLELPROCESSES', '1'))
+    # Minimum number of parallel processes when scaling down workers
+    CONFIG.set('server', 'min_parallelprocesses', getenv('QGSWPS_SERVER_MIN_PARALLELPROCESSES', '${parallelprocesses}'))
+    # Delay in seconds with idle workers before scaling down
+    CONFIG.set('server', 'scale_down_delay', getenv('QGSWPS_SERVER_SCALE_DOWN_DELAY', '300'))
     # Maximal number of executions can run in the same worker before beeing restarted
     CONFIG.set('server', 'processlifecycle', getenv('QGSWPS_SERVER_PROCESSLIFECYCLE', '1'))
+    # Max worker resident memory in Mb, 0 for no limit
+    CONFIG.set('server', 'max_worker_rss', getenv('QGSWPS_SERVER_MAX_WORKER_RSS', '0'))
+    # Max worker resident memory growth in Mb, 0 for no limit
+    CONFIG.set('server', 'max_worker_rss_growth', getenv('QGSWPS_SERVER_MAX_WORKER_RSS_GROWTH', '0'))
+    # Fork workers from a pre-initialized template process
+    CONFIG.set('server', 'zygote', getenv('QGSWPS_SERVER_ZYGOTE', 'no'))
+    # Number of initialized workers kept in reserve
+    CONFIG.set('server', 'spare_workers', getenv('QGSWPS_SERVER_SPARE_WORKERS', '0'))
+    # Retire old workers only when their replacements are ready
+    CONFIG.set('server', 'rolling_restart', getenv('QGSWPS_SERVER_ROLLING_RESTART', 'no'))
+    # Number of thread-safe jobs run concurrently by each worker
+    CONFIG.set('server', 'worker_slots', getenv('QGSWPS_SERVER_WORKER_SLOTS', '1'))
+    # Address of the standalone pool broker for front-ends
+    CONFIG.set('server', 'broker_frontend', getenv('QGSWPS_SERVER_BROKER_FRONTEND', ''))
+    # Address of the standalone pool broker for workers
+    CONFIG.set('server', 'broker_backend', getenv('QGSWPS_SERVER_BROKER_BACKEND', ''))
+    # Number of HTTP front-end processes
+    CONFIG.set('server', 'frontends', getenv('QGSWPS_SERVER_FRONTENDS', '1'))
+    # Identifier of this node in the cluster
+    CONFIG.set('server', 'node_id', getenv('QGSWPS_SERVER_NODE_ID', socket.gethostname()))
+    # Url of this node for requests forwarded by other nodes
+    CONFIG.set('server', 'node_url', getenv('QGSWPS_SERVER_NODE_URL', ''))
     # Maximal number of waiting tasks - extra tasks will return a 509 in synchronous execution
     CONFIG.set('server', 'maxqueuesize', getenv('QGSWPS_SERVER_MAXQUEUESIZE', '100'))
+    # Maximum time to wait for a worker holding the requested project
+    CONFIG.set('server', 'affinity_wait', getenv('QGSWPS_SERVER_AFFINITY_WAIT', '1'))
+    # Weights of job realms for fair scheduling
+    CONFIG.set('server', 'realm_weights', getenv('QGSWPS_SERVER_REALM_WEIGHTS', ''))
+    # Maximum number of running jobs per realm
+    CONFIG.set('server', 'realm_max_running', getenv('QGSWPS_SERVER_REALM_MAX_RUNNING', '0'))
+    # Scheduling policy of queued jobs: 'fifo' or 'sjf'
+    CONFIG.set('server', 'scheduling_policy', getenv('QGSWPS_SERVER_SCHEDULING_POLICY', 'fifo'))
     # Timeout for tasks execution
     CONFIG.set('server', 'response_timeout', getenv('QGSWPS_SERVER_RESPONSE_TIMEOUT', '1800'))
+    # Delay without progress before killing a running task, 0 to disable
+    CONFIG.set('server', 'stall_timeout', getenv('QGSWPS_SERVER_STALL_TIMEOUT', '0'))
+    # Delay before killing a worker that does not respond to cancellation
+    CONFIG.set('server', 'cancel_grace_period', getenv('QGSWPS_SERVER_CANCEL_GRACE_PERIOD', '10'))
+    # Max waiting time in queue for tasks
+    CONFIG.set('server', 'queue_timeout', getenv('QGSWPS_SERVER_QUEUE_TIMEOUT', '${response_timeout}'))
+    # Store asynchronous tasks in a durable queue in the logstore
+    CONFIG.set('server', 'durable_queue', getenv('QGSWPS_SERVER_DURABLE_QUEUE', 'no'))
+    # Lease time in seconds of tasks claimed from the durable queue
+    CONFIG.set('server', 'queue_lease', getenv('QGSWPS_SERVER_QUEUE_LEASE', '60'))
+    # Number of batch items run in a single worker invocation
+    CONFIG.set('server', 'batch_chunk_size', getenv('QGSWPS_SERVER_BATCH_CHUNK_SIZE', '50'))
+    # Maximum number of items in a batch execution
+    CONFIG.set('server', 'batch_max_items', getenv('QGSWPS_SERVER_BATCH_MAX_ITEMS', '1000'))
+    # Processes run on tiles of their extent
+    CONFIG.set('server', 'tiled_processes', getenv('QGSWPS_SERVER_TILED_PROCESSES', ''))
+    # Number of tiles of tiled executions, 0 for the number of workers
+    CONFIG.set('server', 'tile_count', getenv('QGSWPS_SERVER_TILE_COUNT', '0'))
+    # Models with child algorithms run concurrently by the pool workers
+    CONFIG.set('server', 'parallel_models', getenv('QGSWPS_SERVER_PARALLEL_MODELS', ''))
+    # Processes whose results are cached
+    CONFIG.set('server', 'memoized_processes', getenv('QGSWPS_SERVER_MEMOIZED_PROCESSES', ''))
+    # Size in MB of the result cache
+    CONFIG.set('server', 'result_cache_size', getenv('QGSWPS_SERVER_RESULT_CACHE_SIZE', '1024'))
+    # Processes whose identical concurrent executions share the same job
+    CONFIG.set('server', 'coalesced_processes', getenv('QGSWPS_SERVER_COALESCED_PROCESSES', ''))
     # Expiration time in Redis cache for task responses
     CONFIG.set('server', 'response_expiration', getenv('QGSWPS_SERVER_RESPONSE_EXPIRATION', '86400'))
     # XXX DEPRECATED Base url used for return WMS references (QGIS projects holding layers created by WPS tasks)
@@ -135,6 +196,8 @@ def load_configuration():
     CONFIG.set('logstorage:redis', 'port', getenv('QGSWPS_REDIS_PORT', '6379'))
     CONFIG.set('logstorage:redis', 'dbnum', getenv('QGSWPS_REDIS_DBNUM', '0'))
     CONFIG.set('logstorage:redis', 'prefix', getenv('QGSWPS_REDIS_PREFIX', 'pyqgiswps'))
+    CONFIG.set('logstorage:redis', 'max_connections', getenv('QGSWPS_REDIS_MAX_CONNECTIONS', '10'))
+    CONFIG.set('logstorage:redis', 'pool_timeout', getenv('QGSWPS_REDIS_POOL_TIMEOUT', '20'))
 
     #
     # Projects cache
@@ -408,6 +471,9 @@ class ConfigService:
     def __contains__(self, section):
         return section in CONFIG
 
+    def sections(self) -> List[str]:
+        return CONFIG.sections()
+
     def set(self, section: str, option: str, value: Any):
         CONFIG.set(section, option, value)
 
@@ -418,5 +484,11 @@ class ConfigService:
         except configparser.DuplicateSectionError:
             pass
 
+    def clear_section(self, sectionname: str):
+        """ Remove all options from section
+        """
+        CONFIG.remove_section(sectionname)
+        CONFIG.add_section(sectionname)
+
 
 confservice = ConfigService()
@@ -91,6 +91,18 @@ class StorageNotSupported(NoApplicableCode):
     code = 400
 
 
+class ServerBusy(NoApplicableCode):
+    """Server busy exception implementation
+
+    `retry_after` is returned as the `Retry-After` header
+    """
+    code = 503
+
+    def __init__(self, description="", retry_after=None, code=503, **kwargs):
+        self.retry_after = retry_after
+        super().__init__(description, code=code, **kwargs)
+
+
 class ProcessException(Exception):
     """ Exception occured in handler
     """
@@ -1,23 +1,60 @@
 """ Redis log storage for WPS
 
+    Workers use the synchronous `logstore`, the front-end uses
+    `alogstore` so that Redis requests do not block the event loop.
+
     See http://redis-py.readthedocs.io/en/latest/
 """
 import json
 import logging
 import os
+import time
 import uuid
 
 from datetime import datetime, timezone
 from enum import IntEnum
-from typing import Iterator, Optional
+from typing import Any, Iterator, List, NamedTuple, Optional, Tuple
 from uuid import UUID
 
 import redis
+import redis.asyncio
 
 from pyqgiswps.config import confservice
 
 LOGGER = logging.getLogger('SRVLOG')
 
+# Number of job durations kept for each process
+RUNTIME_SAMPLES = 50
+
+# Smoothing factor for the average job duration
+RUNTIME_SMOOTHING = 0.2
+
+# Fields of the running job reported by coalesced jobs
+COALESCED_FIELDS = ('status', 'message', 'percent_done', 'job_start')
+
+# Pop the next queued job and take a lease on it
+# KEYS: queue, leases
+# ARGV: lease deadline
+CLAIM_JOB_SCRIPT = """
+local job = redis.call('RPOP', KEYS[1])
+if job then
+    redis.call('ZADD', KEYS[2], ARGV[1], job)
+end
+return job
+"""
+
+# Move back jobs with expired leases at the head of the queue
+# KEYS: queue, leases
+# ARGV: current time
+REQUEUE_JOBS_SCRIPT = """
+local jobs = redis.call('ZRANGEBYSCORE', KEYS[2], '-inf', ARGV[1])
+for _, job in ipairs(jobs) do
+    redis.call('ZREM', KEYS[2], job)
+    redis.call('RPUSH', KEYS[1], job)
+end
+return jobs
+"""
+
 
 def utcnow():
     return datetime.now(timezone.utc).replace(microsecond=0)
@@ -32,16 +69,52 @@ class STATUS(IntEnum):
     DISMISS_STATUS = 50
 
 
-class LogStore:
+class Runtime(NamedTuple):
+    """ Job durations statistics for a process
+    """
+    count: int
+    mean: float    # Exponentially weighted moving average
+    median: float
+    p90: float
 
-    def log_request(self, request_uuid, wps_request):
-        """ Create request status
 
-            Called once when the request is handled
-        """
-        uuid_str = str(request_uuid)
+def _runtime(samples: List[float]) -> Optional[Runtime]:
+    """ Return the statistics of job durations, most recent first
+    """
+    if not samples:
+        return None
+    mean = samples[-1]
+    for v in reversed(samples):
+        mean += RUNTIME_SMOOTHING * (v - mean)
+    samples.sort()
+    return Runtime(
+        count=len(samples),
+        mean=mean,
+        median=samples[len(samples) // 2],
+        p90=samples[min(int(len(samples) * 0.9), len(samples) - 1)],
+    )
 
-        LOGGER.debug("LOGSTORE: logging request %s", uuid_str)
+
+def _report_leader(record: dict, leader: Optional[bytes]):
+    """ Report the status of the running job
+        in the record of a coalesced job
+    """
+    if leader is not None:
+        leader = json.loads(leader.decode('utf-8'))
+        for field in COALESCED_FIELDS:
+            if field in leader:
+                record[field] = leader[field]
+
+
+def _is_coalesced(record: dict) -> bool:
+    return bool(record.get('coalesced_with')) and STATUS[record['status']] < STATUS.DONE_STATUS
+
+
+class _LogStoreBase:
+
+    def _request_record(self, uuid_str: str, wps_request: Any, coalesced_with: Optional[str]) -> dict:
+        """ Return the initial status of the request
+        """
         record = {
             'conformance': wps_request.conformance(),
             'uuid': uuid_str,
@@ -59,8 +132,96 @@ class LogStore:
             'timeout': wps_request.timeout,
             'realm': wps_request.realm,
             'status_link': wps_request.status_link,
+            **self._node,
         }
 
+        if coalesced_with:
+            record['coalesced_with'] = str(coalesced_with)
+
+        return record
+
+    def _update_record(self, record: dict, wps_response: Any):
+        """ Update the record from the response status
+        """
+        now = utcnow()
+
+        timestamp = now.timestamp()
+
+        current_status = STATUS[record['status']]
+
+        if current_status < STATUS.STARTED_STATUS and wps_response.status == STATUS.STARTED_STATUS:
+            # Task started
+            record['job_start'] = now.isoformat() + 'Z'
+            # Record the actual pid
+            record['pid'] = os.getpid()
+            # The job is owned by the node running it
+            record.update(self._node)
+
+        record['message'] = wps_response.message
+        record['percent_done'] = wps_response.status_percentage
+        record['status'] = wps_response.status.name
+        record['timestamp'] = timestamp
+
+        if wps_response.status >= STATUS.DONE_STATUS:
+            record['output_files'] = wps_response.output_files
+            record['time_end'] = now.isoformat() + 'Z'
+            record['expire_at'] = datetime.fromtimestamp(now.timestamp() + record['expiration']).isoformat() + 'Z'
+
+            # Remove pid
+            record.pop('pid', None)
+
+    @staticmethod
+    def _is_dismissed(record: dict) -> bool:
+        """ Return True if the job has been dismissed
+        """
+        return record['status'] == STATUS.DISMISS_STATUS.name
+
+    @staticmethod
+    def _copy_leader_record(record: dict, leader: dict):
+        """ Copy the final status of the leader of a coalesced job
+        """
+        for field in (*COALESCED_FIELDS, 'output_files', 'time_end', 'timestamp'):
+            if field in leader:
+                record[field] = leader[field]
+        record['expire_at'] = datetime.fromtimestamp(
+            utcnow().timestamp() + record['expiration']).isoformat() + 'Z'
+
+    @property
+    def _node(self) -> dict:
+        """ Return the current node infos
+        """
+        cfg = confservice['server']
+        return {
+            'node': cfg.get('node_id'),
+            'node_url': cfg.get('node_url') or None,
+        }
+
+    def _init_keys(self):
+        """ Initialize the configuration and the Redis keys
+        """
+        cfg = confservice['logstorage:redis']
+        self._config = cfg
+        self._prefix = cfg.get('prefix', fallback='pyggiswps')
+        self._hstatus = "%s:status" % self._prefix
+        self._queue = "%s:queue" % self._prefix
+        self._leases = "%s:leases" % self._prefix
+
+
+class LogStore(_LogStoreBase):
+
+    def log_request(self, request_uuid, wps_request, coalesced_with=None):
+        """ Create request status
+
+            Called once when the request is handled
+
+            `coalesced_with` is the job running the request
+            on behalf of this one.
+        """
+        uuid_str = str(request_uuid)
+
+        LOGGER.debug("LOGSTORE: logging request %s", uuid_str)
+        record = self._request_record(uuid_str, wps_request, coalesced_with)
+
         # Record status
         rv = self._db.hset(self._hstatus, uuid_str, json.dumps(record))
         if not rv:
@@ -89,46 +250,26 @@ class LogStore:
 
     def update_response(self, request_uuid, wps_response):
         """ Update the request status
+
+            Dismissed jobs are not updated: the record is not
+            re-created if it has been deleted.
         """
         # Retrieve the record
         uuid_str = str(request_uuid)
 
         data = self._db.hget(self._hstatus, uuid_str)
         if data is None:
-            # The request has not been recorded for any reason
-            # log error and record it.
-            LOGGER.error("No recorded status for request %s", uuid_str)
-            record = self.log_request(request_uuid, wps_response.wps_request)
-        else:
-            record = json.loads(data.decode('utf-8'))
-
-        now = utcnow()
-
-        timestamp = now.timestamp()
-
-        current_status = STATUS[record['status']]
-
-        if current_status < STATUS.STARTED_STATUS and wps_response.status == STATUS.STARTED_STATUS:
-            # Task started
-            record['job_start'] = now.isoformat() + 'Z'
-            # Record the actual pid
-            # Updating occurs in the worker process
-            # We use it to kill workers in 'BUSY' state
-            record['pid'] = os.getpid()
-
-        record['message'] = wps_response.message
-        record['percent_done'] = wps_response.status_percentage
-        record['status'] = wps_response.status.name
-        record['timestamp'] = timestamp
+            # The job has been dismissed: remove
+            # the response document written by the job
+            LOGGER.warning("No recorded status for request %s", uuid_str)
+            self._db.delete(f"{self._prefix}:response:{uuid_str}")
+            return
 
-        if wps_response.status >= STATUS.DONE_STATUS:
-            record['output_files'] = wps_response.output_files
-            record['time_end'] = now.isoformat() + 'Z'
-            record['expire_at'] = datetime.fromtimestamp(now.timestamp() + record['expiration']).isoformat() + 'Z'
+        record = json.loads(data.decode('utf-8'))
+        if self._is_dismissed(record):
+            return
 
-            # Remove pid
-            if 'pid' in record:
-                del record['pid']
+        self._update_record(record, wps_response)
 
         # Note that hset return 0 if the key already exists but change the value anyway
         self._db.hset(self._hstatus, uuid_str, json.dumps(record))
@@ -211,28 +352,412 @@ class LogStore:
             data = self._db.hget(self._hstatus, str(uuid))
             if data is not None:
                 data = json.loads(data.decode('utf-8'))
+                if _is_coalesced(data):
+                    _report_leader(data, self._db.hget(self._hstatus, data['coalesced_with']))
 
         return data
 
+    def copy_results(self, leader_uuid: str, request_uuid: str):
+        """ Copy the final status and the response
+            document of the job `leader_uuid`
+        """
+        uuid_str = str(request_uuid)
+        leader_str = str(leader_uuid)
+
+        leader = self._db.hget(self._hstatus, leader_str)
+        data = self._db.hget(self._hstatus, uuid_str)
+        if leader is None or data is None:
+            LOGGER.error("LOGSTORE: No record for coalesced job %s", uuid_str)
+            return
+
+        record = json.loads(data.decode('utf-8'))
+        self._copy_leader_record(record, json.loads(leader.decode('utf-8')))
+
+        document = self.get_results(leader_str)
+        if document is not None:
+            # Urls in the document hold the job uuid
+            self.write_response(uuid_str, document.replace(leader_str.encode(), uuid_str.encode()))
+
+        self._db.hset(self._hstatus, uuid_str, json.dumps(record))
+
+    def record_runtime(self, identifier: str, duration: float):
+        """ Record the duration in seconds of a successful job
+        """
+        key = f"{self._prefix}:runtime:{identifier}"
+        p = self._db.pipeline()
+        p.lpush(key, duration)
+        p.ltrim(key, 0, RUNTIME_SAMPLES - 1)
+        p.execute()
+
+    def get_runtime(self, identifier: str) -> Optional[Runtime]:
+        """ Return the duration statistics of the last jobs for
+            the process `identifier`
+
+            Return None if no job has been recorded
+        """
+        # Most recent first
+        samples = [float(v) for v in self._db.lrange(f"{self._prefix}:runtime:{identifier}", 0, -1)]
+        return _runtime(samples)
+
+    #
+    # Durable job queue
+    #
+    # Queued jobs are stored in a list, claimed jobs are moved
+    # to a sorted set scored by the lease deadline. Jobs whose lease
+    # has expired (i.e the consumer has died) are moved back to the queue.
+    #
+    # Note that leases deadlines use the local time of the nodes.
+    #
+
+    def enqueue_job(self, job_id: str, data: bytes):
+        """ Push a job in the durable queue
+        """
+        p = self._db.pipeline()
+        p.set(f"{self._prefix}:job:{job_id}", data)
+        p.lpush(self._queue, job_id)
+        p.execute()
+
+    def claim_job(self, lease: float) -> Optional[Tuple[str, bytes]]:
+        """ Pop the oldest queued job and take a lease
+            of `lease` seconds on it
+
+            Return None if the queue is empty
+        """
+        while True:
+            job_id = self._claim_script(keys=[self._queue, self._leases], args=[time.time() + lease])
+            if job_id is None:
+                return None
+            job_id = job_id.decode()
+            data = self._db.get(f"{self._prefix}:job:{job_id}")
+            if data is not None:
+                return job_id, data
+            # The job has been removed
+            self._db.zrem(self._leases, job_id)
+
+    def renew_lease(self, job_id: str, lease: float) -> bool:
+        """ Extend the lease on a claimed job
+
+            Return False if the job is no longer leased
+        """
+        return bool(self._db.zadd(self._leases, {job_id: time.time() + lease}, xx=True, ch=True))
+
+    def ack_job(self, job_id: str):
+        """ Remove a claimed job from the durable queue
+        """
+        p = self._db.pipeline()
+        p.zrem(self._leases, job_id)
+        p.delete(f"{self._prefix}:job:{job_id}")
+        p.execute()
+
+    def release_job(self, job_id: str):
+        """ Give back a claimed job to the queue
+        """
+        p = self._db.pipeline()
+        p.zrem(self._leases, job_id)
+        p.rpush(self._queue, job_id)
+        p.execute()
+
+    def remove_queued_job(self, job_id: str) -> bool:
+        """ Remove a job waiting in the durable queue
+
+            Return True if the job was queued
+        """
+        if self._db.lrem(self._queue, 0, job_id) > 0:
+            self._db.delete(f"{self._prefix}:job:{job_id}")
+            return True
+        return False
+
+    def is_job_queued(self, job_id: str) -> bool:
+        """ Return True if the job is queued or
+            leased in the durable queue
+        """
+        return self._db.exists(f"{self._prefix}:job:{job_id}") > 0
+
+    def requeue_expired_jobs(self) -> List[str]:
+        """ Requeue claimed jobs with expired lease
+
+            Return the list of requeued jobs
+        """
+        jobs = self._requeue_script(keys=[self._queue, self._leases], args=[time.time()])
+        return [job.decode() for job in jobs]
+
     def init_session(self):
         """ Initialize store session
 
             see https://redis-py.readthedocs.io/en/latest/ for redis options
         """
         LOGGER.debug("LOGSTORE: Initializing REDIS session")
-        cfg = confservice['logstorage:redis']
-        self._config = cfg
-        self._prefix = cfg.get('prefix', fallback='pyggiswps')
-        self._hstatus = "%s:status" % self._prefix
+        self._init_keys()
+        cfg = self._config
 
         self._db = redis.StrictRedis(
             host=cfg.get('host', fallback='localhost'),
             port=cfg.getint('port', fallback=6379),
             db=cfg.getint('dbnum', fallback=0))
 
+        self._claim_script = self._db.register_script(CLAIM_JOB_SCRIPT)
+        self._requeue_script = self._db.register_script(REQUEUE_JOBS_SCRIPT)
+
+
+class AsyncLogStore(_LogStoreBase):
+    """ Asyncio log store for the front-end
+
+        Requests share a bounded pool of connections: requests wait
+        for a free connection when all connections are in use.
+    """
+
+    async def log_request(self, request_uuid, wps_request, coalesced_with=None):
+        """ Create request status
+
+            See `LogStore.log_request`
+        """
+        uuid_str = str(request_uuid)
+
+        LOGGER.debug("LOGSTORE: logging request %s", uuid_str)
+        record = self._request_record(uuid_str, wps_request, coalesced_with)
+
+        p = self._db.pipeline()
+        p.hset(self._hstatus, uuid_str, json.dumps(record))
+        p.set(f"{self._prefix}:request:{uuid_str}", wps_request.dumps())
+        rv, _ = await p.execute()
+        if not rv:
+            LOGGER.error("Failed to record request %s", uuid_str)
+
+        return record
+
+    async def set_json(self, value, expire):
+        """ Set a value at key 'name', expire is mandatory
+        """
+        token = str(uuid.uuid4()).replace('-', '')
+        await self._db.setex('token:' + token, expire, json.dumps(value))
+        return token
+
+    async def get_json(self, token):
+        """ Return the value at key 'name'
+        """
+        value = await self._db.get('token:' + token)
+        if value is not None:
+            value = json.loads(value.decode('utf-8'))
+        return value
+
+    async def update_response(self, request_uuid, wps_response):
+        """ Update the request status
+
+            See `LogStore.update_response`
+        """
+        uuid_str = str(request_uuid)
+
+        data = await self._db.hget(self._hstatus, uuid_str)
+        if data is None:
+            LOGGER.warning("No recorded status for request %s", uuid_str)
+            await self._db.delete(f"{self._prefix}:response:{uuid_str}")
+            return
+
+        record = json.loads(data.decode('utf-8'))
+        if self._is_dismissed(record):
+            return
+
+        self._update_record(record, wps_response)
+
+        await self._db.hset(self._hstatus, uuid_str, json.dumps(record))
+
+    async def write_response(self, request_uuid: str, content: bytes):
+        """ Write response doc
+        """
+        uuid_str = str(request_uuid)
+        rv = await self._db.set(f"{self._prefix}:response:{uuid_str}", content)
+        if not rv:
+            LOGGER.error("LOGSTORE: Failed to log response %s", uuid_str)
+
+    async def delete_response(self, request_uuid):
+        """ Remove record and response
+        """
+        uuid_str = str(request_uuid)
+        LOGGER.debug("LOGSTORE: deleting record %s", uuid_str)
+        p = self._db.pipeline()
+        p.delete(f"{self._prefix}:response:{uuid_str}")
+        p.delete(f"{self._prefix}:request:{uuid_str}")
+        p.hdel(self._hstatus, uuid_str)
+        await p.execute()
+
+    async def get_results(self, uuid: str | UUID) -> Optional[bytes]:
+        """ Return results status
+        """
+        return await self._db.get(f"{self._prefix}:response:{uuid!s}")
+
+    async def get_request(self, uuid):
+        """ Return results status
+        """
+        data = await self._db.get(f"{self._prefix}:request:{uuid!s}")
+        if data is not None:
+            return json.loads(data.decode('utf-8'))
+
+    async def get_status(self, uuid=None, key=None):
+        """ Return the status for the given processs
+
+            See `LogStore.get_status`
+        """
+        if key == 'request':
+            return await self.get_request(uuid)
+
+        if uuid is None:
+            return [json.loads(v.decode('utf-8')) async for _, v in self._db.hscan_iter(self._hstatus)]
+
+        data = await self._db.hget(self._hstatus, str(uuid))
+        if data is not None:
+            data = json.loads(data.decode('utf-8'))
+            if _is_coalesced(data):
+                _report_leader(data, await self._db.hget(self._hstatus, data['coalesced_with']))
+        return data
+
+    async def copy_results(self, leader_uuid: str, request_uuid: str):
+        """ Copy the final status and the response
+            document of the job `leader_uuid`
+        """
+        uuid_str = str(request_uuid)
+        leader_str = str(leader_uuid)
+
+        leader = await self._db.hget(self._hstatus, leader_str)
+        data = await self._db.hget(self._hstatus, uuid_str)
+        if leader is None or data is None:
+            LOGGER.error("LOGSTORE: No record for coalesced job %s", uuid_str)
+            return
+
+        record = json.loads(data.decode('utf-8'))
+        self._copy_leader_record(record, json.loads(leader.decode('utf-8')))
+
+        document = await self.get_results(leader_str)
+        if document is not None:
+            # Urls in the document hold the job uuid
+            await self.write_response(uuid_str, document.replace(leader_str.encode(), uuid_str.encode()))
+
+        await self._db.hset(self._hstatus, uuid_str, json.dumps(record))
+
+    async def get_runtime(self, identifier: str) -> Optional[Runtime]:
+        """ Return the duration statistics of the last jobs for
+            the process `identifier`
+        """
+        samples = await self._db.lrange(f"{self._prefix}:runtime:{identifier}", 0, -1)
+        return _runtime([float(v) for v in samples])
+
+    #
+    # Durable job queue
+    #
+    # See `LogStore`
+    #
+
+    async def enqueue_job(self, job_id: str, data: bytes):
+        """ Push a job in the durable queue
+        """
+        p = self._db.pipeline()
+        p.set(f"{self._prefix}:job:{job_id}", data)
+        p.lpush(self._queue, job_id)
+        await p.execute()
+
+    async def claim_job(self, lease: float) -> Optional[Tuple[str, bytes]]:
+        """ Pop the oldest queued job and take a lease
+            of `lease` seconds on it
+
+            Return None if the queue is empty
+        """
+        while True:
+            job_id = await self._claim_script(keys=[self._queue, self._leases], args=[time.time() + lease])
+            if job_id is None:
+                return None
+            job_id = job_id.decode()
+            data = await self._db.get(f"{self._prefix}:job:{job_id}")
+            if data is not None:
+                return job_id, data
+            # The job has been removed
+            await self._db.zrem(self._leases, job_id)
+
+    async def renew_lease(self, job_id: str, lease: float) -> bool:
+        """ Extend the lease on a claimed job
+
+            Return False if the job is no longer leased
+        """
+        return bool(await self._db.zadd(self._leases, {job_id: time.time() + lease}, xx=True, ch=True))
+
+    async def ack_job(self, job_id: str):
+        """ Remove a claimed job from the durable queue
+        """
+        p = self._db.pipeline()
+        p.zrem(self._leases, job_id)
+        p.delete(f"{self._prefix}:job:{job_id}")
+        await p.execute()
+
+    async def release_job(self, job_id: str):
+        """ Give back a claimed job to the queue
+        """
+        p = self._db.pipeline()
+        p.zrem(self._leases, job_id)
+        p.rpush(self._queue, job_id)
+        await p.execute()
+
+    async def remove_queued_job(self, job_id: str) -> bool:
+        """ Remove a job waiting in the durable queue
+
+            Return True if the job was queued
+        """
+        if await self._db.lrem(self._queue, 0, job_id) > 0:
+            await self._db.delete(f"{self._prefix}:job:{job_id}")
+            return True
+        return False
+
+    async def is_job_queued(self, job_id: str) -> bool:
+        """ Return True if the job is queued or
+            leased in the durable queue
+        """
+        return await self._db.exists(f"{self._prefix}:job:{job_id}") > 0
+
+    async def requeue_expired_jobs(self) -> List[str]:
+        """ Requeue claimed jobs with expired lease
+
+            Return the list of requeued jobs
+        """
+        jobs = await self._requeue_script(keys=[self._queue, self._leases], args=[time.time()])
+        return [job.decode() for job in jobs]
+
+    def init_session(self, db: Optional[Any] = None):
+        """ Initialize store session
+
+            `db` is an alternate asyncio client, i.e an in-process
+            `MemoryStore`.
+        """
+        LOGGER.debug("LOGSTORE: Initializing asyncio REDIS session")
+        self._init_keys()
+        cfg = self._config
+
+        if db is None:
+            # Connections are created in the event loop
+            # on first use
+            pool = redis.asyncio.BlockingConnectionPool(
+                host=cfg.get('host', fallback='localhost'),
+                port=cfg.getint('port', fallback=6379),
+                db=cfg.getint('dbnum', fallback=0),
+                max_connections=cfg.getint('max_connections', fallback=10),
+                timeout=cfg.getfloat('pool_timeout', fallback=20),
+            )
+            db = redis.asyncio.StrictRedis(connection_pool=pool)
+
+        self._db = db
+
+        # The durable queue requires Redis
+        if hasattr(db, 'register_script'):
+            self._claim_script = db.register_script(CLAIM_JOB_SCRIPT)
+            self._requeue_script = db.register_script(REQUEUE_JOBS_SCRIPT)
+
+    async def close(self):
+        """ Close the connections
+        """
+        await self._db.aclose()
+
 
 #
 # The one and only one instance of logstore
 #
 
 logstore = LogStore()
+
+# Front-end instance
+alogstore = AsyncLogStore()
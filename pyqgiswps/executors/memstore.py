@@ -0,0 +1,143 @@
+#
+# Copyright 2026 3liz
+# Author: David Marteau
+#
+# This Source Code Form is subject to the terms of the Mozilla Public
+# License, v. 2.0. If a copy of the MPL was not distributed with this
+# file, You can obtain one at http://mozilla.org/MPL/2.0/.
+
+""" In-process storage backend
+
+    Implement the subset of the asyncio Redis client used
+    by `AsyncLogStore`: this allows to run the front-end
+    without a Redis server, i.e for testing.
+
+    Lua scripts are not supported, so the durable
+    job queue cannot be used with this backend.
+
+    Data is not shared with other processes.
+"""
+import time
+
+from typing import (
+    Any,
+    AsyncIterator,
+    Callable,
+    Dict,
+    List,
+    Optional,
+    Tuple,
+)
+
+
+def _encode(value: Any) -> bytes:
+    if isinstance(value, bytes):
+        return value
+    return str(value).encode()
+
+
+class _Pipeline:
+
+    def __init__(self, store: 'MemoryStore'):
+        self._store = store
+        self._commands = []
+
+    def __getattr__(self, name: str) -> Callable[..., '_Pipeline']:
+        method = getattr(self._store, name)
+
+        def _queue(*args, **kwargs) -> '_Pipeline':
+            self._commands.append((method, args, kwargs))
+            return self
+
+        return _queue
+
+    async def execute(self) -> List[Any]:
+        commands, self._commands = self._commands, []
+        return [await method(*args, **kwargs) for method, args, kwargs in commands]
+
+
+class MemoryStore:
+
+    def __init__(self):
+        self._data: Dict[str, Any] = {}
+        self._expire: Dict[str, float] = {}
+
+    def _get(self, key: str, default: Optional[Any] = None) -> Any:
+        deadline = self._expire.get(key)
+        if deadline is not None and deadline <= time.monotonic():
+            self._data.pop(key, None)
+            self._expire.pop(key, None)
+        return self._data.get(key, default)
+
+    def pipeline(self) -> _Pipeline:
+        return _Pipeline(self)
+
+    async def get(self, key: str) -> Optional[bytes]:
+        return self._get(key)
+
+    async def set(self, key: str, value: Any) -> bool:
+        self._data[key] = _encode(value)
+        self._expire.pop(key, None)
+        return True
+
+    async def setex(self, key: str, expire: int, value: Any) -> bool:
+        await self.set(key, value)
+        self._expire[key] = time.monotonic() + expire
+        return True
+
+    async def delete(self, *keys: str) -> int:
+        count = 0
+        for key in keys:
+            if self._get(key) is not None:
+                del self._data[key]
+                count += 1
+        return count
+
+    async def exists(self, *keys: str) -> int:
+        return sum(self._get(key) is not None for key in keys)
+
+    async def hget(self, name: str, key: str) -> Optional[bytes]:
+        return self._get(name, {}).get(key)
+
+    async def hset(self, name: str, key: str, value: Any) -> int:
+        h = self._data.setdefault(name, {})
+        created = key not in h
+        h[key] = _encode(value)
+        return int(created)
+
+    async def hdel(self, name: str, *keys: str) -> int:
+        h = self._get(name, {})
+        return sum(h.pop(key, None) is not None for key in keys)
+
+    async def hscan_iter(self, name: str) -> AsyncIterator[Tuple[bytes, bytes]]:
+        for key, value in list(self._get(name, {}).items()):
+            yield key.encode(), value
+
+    async def lpush(self, name: str, *values: Any) -> int:
+        lst = self._data.setdefault(name, [])
+        for value in values:
+            lst.insert(0, _encode(value))
+        return len(lst)
+
+    async def lrem(self, name: str, count: int, value: Any) -> int:
+        lst = self._get(name, [])
+        value = _encode(value)
+        # Negative count removes from tail to head
+        indices = range(len(lst)) if count >= 0 else reversed(range(len(lst)))
+        found = [i for i in indices if lst[i] == value]
+        if count:
+            found = found[:abs(count)]
+        for i in sorted(found, reverse=True):
+            del lst[i]
+        return len(found)
+
+    async def ltrim(self, name: str, start: int, end: int) -> bool:
+        lst = self._get(name, [])
+        lst[:] = lst[start:None if end == -1 else end + 1]
+        return True
+
+    async def lrange(self, name: str, start: int, end: int) -> List[bytes]:
+        return self._get(name, [])[start:None if end == -1 else end + 1]
+
+    async def aclose(self):
+        pass
@@ -9,6 +9,7 @@
 """ Qgis process factory
 
 """
+import asyncio
 import logging
 import os
 import queue
@@ -19,19 +20,24 @@ from glob import glob
 from itertools import chain
 from multiprocessing import Process, Queue
 from typing import (
+    Awaitable,
     List,
     Optional,
     Sequence,
+    Tuple,
 )
 
 from ..app.process import WPSProcess
 from ..config import confservice
 from ..exceptions import ProcessException
-from ..poolserver.server import create_poolserver
+from ..poolserver.broker import BrokerClient
+from ..poolserver.client import _Client
+from ..poolserver.server import SubPool, create_poolserver
+from ..poolserver.worker import MemoryLimits
 from ..utils.conditions import assert_precondition
 from ..utils.plugins import WPSServerInterfaceImpl
 from ..utils.qgis import setup_qgis_paths, start_qgis_application
-from .logstore import logstore
+from .logstore import alogstore, logstore
 
 LOGGER = logging.getLogger('SRVLOG')
 
@@ -128,6 +134,34 @@ class _FactoryDelegate(Process):
                 p.terminate()
 
 
+def get_subpools() -> List[Tuple[SubPool, List[str]]]:
+    """ Return the named pools defined in `pool:<name>` sections
+
+        Each pool is returned with the list of process identifier
+        patterns that are dispatched to it
+    """
+    cfg = confservice['server']
+
+    subpools = []
+    for section in confservice.sections():
+        if not section.startswith('pool:'):
+            continue
+        name = section[5:].strip()
+        processlifecycle = confservice.getint(section, 'processlifecycle', fallback=cfg.getint('processlifecycle'))
+        subpool = SubPool(
+            name=name,
+            numworkers=confservice.getint(section, 'parallelprocesses', fallback=cfg.getint('parallelprocesses')),
+            # 0 mean eternal life
+            maxcycles=processlifecycle or None,
+            timeout=confservice.getint(section, 'response_timeout', fallback=cfg.getint('response_timeout')),
+        )
+        patterns = confservice.get(section, 'processes', fallback='').replace(',', ' ').split()
+        if not patterns:
+            LOGGER.warning("No processes defined for pool '%s'", name)
+        subpools.append((subpool, patterns))
+    return subpools
+
+
 class QgsProcessFactory:
 
     def __init__(self):
@@ -137,9 +171,16 @@ class QgsProcessFactory:
 
         self._delegate = None
 
-    def initialize(self, load_qgis_processing: bool = False) -> Optional[List[WPSProcess]]:
+        # Front-ends relay pool commands through the broker
+        self._broker = None
+        self._tasks = set()
+
+    def initialize(self, load_qgis_processing: bool = False, with_pool: bool = True) -> Optional[List[WPSProcess]]:
         """ Initialize the factory
 
+            If `with_pool` is False, no worker pool is created:
+            jobs are run by workers connected to a standalone broker.
+
             Should be called once
         """
         assert_precondition(not self._initialized)
@@ -161,7 +202,12 @@ class QgsProcessFactory:
         else:
             processes = None
 
-        self._create_pool()
+        if with_pool:
+            self._create_pool()
+        else:
+            # Initialize logstore (redis)
+            logstore.init_session()
+            alogstore.init_session()
 
         return processes
 
@@ -171,11 +217,32 @@ class QgsProcessFactory:
         cfg = confservice['server']
 
         maxparallel = cfg.getint('parallelprocesses')
+        minparallel = cfg.getint('min_parallelprocesses')
+        scale_down_delay = cfg.getint('scale_down_delay')
         processlifecycle = cfg.getint('processlifecycle')
         response_timeout = cfg.getint('response_timeout')
+        stall_timeout = cfg.getint('stall_timeout')
+        memlimits = MemoryLimits(
+            max_rss=cfg.getint('max_worker_rss'),
+            max_growth=cfg.getint('max_worker_rss_growth'),
+        )
+        zygote = cfg.getboolean('zygote')
+        spares = cfg.getint('spare_workers')
+        rolling = cfg.getboolean('rolling_restart')
+        slots = max(cfg.getint('worker_slots'), 1)
+
+        # Connect workers to a standalone broker
+        broker = cfg.get('broker_backend')
+        subpools = [sp for sp, _ in get_subpools()]
+        if broker:
+            LOGGER.info("Connecting workers to pool broker at %s", broker)
+            if subpools:
+                LOGGER.warning("Named pools are not supported with a broker, ignoring them")
+                subpools = []
 
         # Initialize logstore (redis)
         logstore.init_session()
+        alogstore.init_session()
 
         # 0 mean eternal life
         if processlifecycle == 0:
@@ -187,6 +254,17 @@ class QgsProcessFactory:
             maxcycles=processlifecycle,
             initializer=self.worker_initializer,
             timeout=response_timeout,
+            zygote=zygote,
+            tags=self.worker_tags,
+            minworkers=minparallel,
+            scale_down_delay=scale_down_delay,
+            subpools=subpools,
+            stall_timeout=stall_timeout,
+            memlimits=memlimits,
+            spares=spares,
+            rolling=rolling,
+            router=broker or None,
+            slots=slots,
         )
         self._initialized = True
 
@@ -195,6 +273,8 @@ class QgsProcessFactory:
         """
         if self._initialized:
             self._poolserver.restart()
+        elif self._broker:
+            self._relay(self._broker.restart_pool())
 
     def _create_contextualized_processes(self, identifiers: Sequence[str], map_uri: str) -> List[WPSProcess]:
         """ Create processes from context
@@ -271,6 +351,14 @@ class QgsProcessFactory:
         # Init qgis application in worker
         self.start_qgis()
 
+    def worker_tags(self) -> List[str]:
+        """ Return the worker tags
+
+            Tags are the projects held in the worker cache
+        """
+        from ..qgscache.cachemanager import cacheservice
+        return list(cacheservice.keys())
+
     def start_qgis(self):
         """ Set up qgis
         """
@@ -328,12 +416,46 @@ class QgsProcessFactory:
 
             Convenient proxy to pool server
         """
-        self._poolserver.start_supervisor()
+        if self._initialized:
+            self._poolserver.start_supervisor()
+
+    def start_autoscaler(self, client: _Client):
+        """ Start scaling workers
 
-    def kill_worker_busy(self, pid: int) -> bool:
-        """ Force kill worker in BUSY state
+            Convenient proxy to pool server
+        """
+        if self._initialized:
+            self._poolserver.start_autoscaler(client)
+
+    def start_relay(self, client: BrokerClient):
+        """ Relay pool commands through the broker
+
+            Used when the pool is owned by another process, i.e
+            in front-ends connected to a broker
+        """
+        if not self._initialized:
+            self._broker = client
+
+    def _relay(self, command: Awaitable):
+        task = asyncio.ensure_future(command)
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    def broadcast_cancel(self, job_id: str):
+        """ Notify all workers running tasks of `job_id`
+            to cancel them
+        """
+        if self._initialized:
+            self._poolserver.broadcast_cancel(job_id)
+        elif self._broker:
+            self._relay(self._broker.cancel_job(job_id))
+
+    def cancel_job(self, job_id: str, grace_period: float) -> bool:
+        """ Cancel job running in workers
+
+            Convenient proxy to pool server
         """
-        return self._poolserver.kill_worker_busy(pid)
+        return self._initialized and self._poolserver.cancel_job(job_id, grace_period)
 
     @classmethod
     def instance(cls) -> 'QgsProcessFactory':
@@ -13,11 +13,12 @@ import os
 import traceback
 
 from pathlib import Path
-from typing import Any, Mapping, Optional
+from typing import Any, Dict, Mapping, Optional, Set, Tuple
 
 from qgis.core import QgsCoordinateReferenceSystem, QgsMapLayer, QgsProcessingContext, QgsProject
 
 from pyqgiswps.config import confservice
+from pyqgiswps.poolserver.worker import notify_worker_info
 from pyqgiswps.qgscache.cachemanager import cacheservice
 
 LOGGER = logging.getLogger('SRVLOG')
@@ -47,20 +48,69 @@ class MapContext:
             raise RuntimeError('No map defined')
 
 
+class ProjectState:
+    """ Snapshot of the state of a cached project that
+        may be modified by jobs
+
+        Jobs may change the selection or the subset string of
+        layers of cached projects: the state is restored at the
+        end of the job.
+    """
+
+    def __init__(self, project: QgsProject):
+        self._layers: Dict[str, Tuple[str, Set[int]]] = {
+            lid: (layer.subsetString(), set(layer.selectedFeatureIds()))
+            for lid, layer in project.mapLayers().items()
+            if layer.type() == QgsMapLayer.VectorLayer
+        }
+        self.fingerprint = self.get_fingerprint(project)
+
+    @staticmethod
+    def get_fingerprint(project: QgsProject) -> Tuple:
+        """ Return a fingerprint of the project's layers
+        """
+        return tuple(sorted(
+            (lid, layer.subsetString(), layer.selectedFeatureCount())
+            if layer.type() == QgsMapLayer.VectorLayer else (lid, '', 0)
+            for lid, layer in project.mapLayers().items()
+        ))
+
+    def restore(self, project: QgsProject) -> bool:
+        """ Restore layer's selections and subset strings
+
+            Return False if the project cannot be restored to
+            its initial state
+        """
+        for lid, (subset, selected) in self._layers.items():
+            layer = project.mapLayer(lid)
+            if layer is None:
+                continue
+            if layer.subsetString() != subset:
+                layer.setSubsetString(subset)
+            if set(layer.selectedFeatureIds()) != selected:
+                layer.selectByIds(list(selected))
+        return self.get_fingerprint(project) == self.fingerprint
+
+
 class ProcessingContext(QgsProcessingContext):
 
     def __init__(self, workdir: str, map_uri: Optional[str] = None):
         super().__init__()
         self.workdir = workdir
         self.rootdir = Path(confservice.get('projects.cache', 'rootdir'))
+        self._project_state = None
 
         if map_uri is not None:
             self.map_uri = map_uri
-            project = cacheservice.lookup(map_uri)[0]
+            project, updated = cacheservice.lookup(map_uri)
+            if updated:
+                # Notify the pool that the project has been loaded
+                notify_worker_info()
             # Get the CRS of the project
             project_crs = project.crs()
             if project_crs.isValid():
                 self.setProject(project)
+                self._project_state = ProjectState(project)
             else:
                 LOGGER.warning("Invalid CRS for project '%s'", map_uri)
         else:
@@ -73,11 +123,48 @@ class ProcessingContext(QgsProcessingContext):
                 LOGGER.error("Invalid default CRS '%s'", default_crs)
 
         # Create the destination project
+        self._crs = project_crs
+        self.destination_project = self._create_destination_project()
+
+    def _create_destination_project(self) -> QgsProject:
         destination_project = QgsProject()
-        if project_crs.isValid():
+        if self._crs.isValid():
             adjust_ellipsoid = confservice.getboolean('processing', 'adjust_ellipsoid')
-            destination_project.setCrs(project_crs, adjust_ellipsoid)
-        self.destination_project = destination_project
+            destination_project.setCrs(self._crs, adjust_ellipsoid)
+        return destination_project
+
+    def next_item(self, workdir: str):
+        """ Prepare the context for the next item of a batch
+
+            The cached project is kept, results of the
+            item go to a new destination project.
+        """
+        self.temporaryLayerStore().removeAllMapLayers()
+        self.setLayersToLoadOnCompletion({})
+        if self._project_state is not None:
+            self._project_state.restore(self.project())
+        self.workdir = workdir
+        self.destination_project = self._create_destination_project()
+
+    def reset(self):
+        """ Reset state modified by the job
+
+            Restore the state of the cached project and clear
+            temporary layers. If the project cannot be restored to its initial
+            state, it is removed from the cache.
+        """
+        self.temporaryLayerStore().removeAllMapLayers()
+
+        if self._project_state is not None:
+            if not self._project_state.restore(self.project()):
+                LOGGER.warning("Project '%s' modified by job, removing from cache", self.map_uri)
+                self.setProject(None)
+                try:
+                    cacheservice.remove_entry(self.map_uri)
+                except KeyError:
+                    pass
+                notify_worker_info()
+            self._project_state = None
 
     def resolve_path(self, path: str) -> str:
         """ Return the full path of a file if that file
@@ -7,46 +7,157 @@
 # file, You can obtain one at http://mozilla.org/MPL/2.0/.
 #
 import asyncio
+import copy
 import logging
 import os
+import pickle
 import shutil
 import time
 import traceback
 
-from contextlib import contextmanager
+from contextlib import contextmanager, nullcontext
 from datetime import datetime, timezone
+from functools import partial
 from glob import glob
+from operator import attrgetter
+from pathlib import Path
 from typing import (
     Any,
+    Awaitable,
+    Callable,
+    Dict,
     Iterable,
     Iterator,
+    List,
     Optional,
     Sequence,
+    Set,
+    Tuple,
 )
 
 import psutil
 
 from pyqgisservercontrib.core.watchfiles import watchfiles
-from pyqgiswps.app.process import WPSHandler, WPSProcess
+from pyqgiswps.app.process import WPSProcess
 from pyqgiswps.app.request import STATUS, WPSRequest, WPSResponse
+from pyqgiswps.app.workflow import sort_steps
 from pyqgiswps.config import confservice
 from pyqgiswps.exceptions import (
     NoApplicableCode,
     ProcessException,
+    ServerBusy,
     UnknownProcessError,
 )
+from pyqgiswps.inout import WPSInput
+from pyqgiswps.inout.basic import SOURCE_TYPE
 from pyqgiswps.logger import logfile_context
+from pyqgiswps.poolserver.broker import BrokerClient
 from pyqgiswps.poolserver.client import (
     MaxRequestsExceeded,
+    QueueTimeoutExceeded,
     RequestBackendError,
+    _Client,
     create_client,
+    parse_realm_weights,
 )
+from pyqgiswps.poolserver.utils import OutOfBandBytes
+from pyqgiswps.protos import JsonValue
 from pyqgiswps.utils.lru import lrucache
 
-from .logstore import logstore
+from .logstore import alogstore, logstore
+from .resultcache import ResultCache, link_job_files, request_key
 
 LOGGER = logging.getLogger('SRVLOG')
 
+# Version of the job envelope sent to workers
+JOB_ENVELOPE_VERSION = 1
+
+# Inline binary data larger than this size (in bytes)
+# are sent to workers as out-of-band buffers
+OUT_OF_BAND_THRESHOLD = 64 * 1024
+
+# Polling interval in seconds of the durable queue
+QUEUE_POLL_INTERVAL = 1
+
+
+def _slim_input(inp: WPSInput) -> WPSInput:
+    """ Return a copy of the validated input without
+        the allowed values definition
+    """
+    inp = copy.copy(inp)
+    if getattr(inp, 'allowed_values', None) is not None:
+        # Values have been validated already
+        inp.allowed_values = None
+        inp.any_value = True
+    if getattr(inp, 'source_type', None) == SOURCE_TYPE.DATA \
+            and isinstance(inp.source, bytes) \
+            and len(inp.source) > OUT_OF_BAND_THRESHOLD:
+        inp.source = OutOfBandBytes(inp.source)
+    return inp
+
+
+def _slim_inputs(inputs: Dict[str, Sequence[WPSInput]]) -> Dict[str, List[WPSInput]]:
+    return {ident: [_slim_input(inp) for inp in values] for ident, values in inputs.items()}
+
+
+def _match_processes(option: str, identifier: str) -> bool:
+    """ Return True if `identifier` matches one of the process
+        patterns of the server option `option`
+    """
+    patterns = confservice.get('server', option).replace(',', ' ').split()
+    ident = Path(identifier)
+    return any(ident.match(pattern) for pattern in patterns)
+
+
+class JobEnvelope:
+    """ Job sent to workers
+
+        Carry the process without its input definitions, the
+        request with the validated input values and the job uuid:
+        the response is created in the worker.
+    """
+
+    def __init__(self, wps_request: WPSRequest, wps_response: WPSResponse):
+        self.version = JOB_ENVELOPE_VERSION
+        self.uuid = wps_response.uuid
+
+        process = copy.copy(wps_response.process)
+        # Algorithms are recreated from the worker's registry
+        process.inputs = ()
+        self.process = process
+
+        request = copy.copy(wps_request)
+        request.inputs = _slim_inputs(wps_request.inputs)
+        request.batch = None
+        if wps_request.workflow is not None:
+            request.workflow = wps_request.workflow._replace(
+                steps=[step._replace(inputs=_slim_inputs(step.inputs)) for step in wps_request.workflow.steps],
+            )
+        self.request = request
+
+    def create_response(self) -> WPSResponse:
+        """ Create the job response
+        """
+        if self.version != JOB_ENVELOPE_VERSION:
+            raise ProcessException(f"Unsupported job envelope version {self.version}")
+        return self.request.create_response(self.process, self.uuid)
+
+
+class BatchEnvelope(JobEnvelope):
+    """ Chunk of batch items sent to workers
+    """
+
+    def __init__(
+        self,
+        wps_request: WPSRequest,
+        wps_response: WPSResponse,
+        items: Sequence[Dict[str, Sequence[WPSInput]]],
+        offset: int,
+    ):
+        super().__init__(wps_request, wps_response)
+        self.items = [_slim_inputs(inputs) for inputs in items]
+        self.offset = offset
+
 
 class ProcessingExecutor:
     """ Progessing executor
@@ -55,22 +166,78 @@ class ProcessingExecutor:
     def __init__(self, processes: Iterable[WPSProcess]):
 
         # Prevent circular reference
-        from .processfactory import get_process_factory
+        from .processfactory import get_process_factory, get_subpools
 
         maxqueuesize = confservice.getint('server', 'maxqueuesize')
+        affinity_wait = confservice.getfloat('server', 'affinity_wait')
+        realm_max_running = confservice.getint('server', 'realm_max_running')
+        policy = confservice.get('server', 'scheduling_policy')
+
+        # Realm weights for fair scheduling
+        realm_weights = parse_realm_weights(confservice.get('server', 'realm_weights'))
+
+        broker = confservice.get('server', 'broker_frontend')
+        if broker:
+            # Jobs are scheduled by a standalone broker
+            LOGGER.info("Connecting to pool broker at %s", broker)
+            self._pool = BrokerClient(broker)
+        else:
+            self._pool = create_client(
+                maxqueuesize,
+                affinity_wait,
+                realm_weights=realm_weights,
+                realm_max_running=realm_max_running,
+                policy=policy,
+            )
+
+        # Named pools
+        self._subpools = [] if broker else [
+            (
+                patterns,
+                create_client(
+                    maxqueuesize,
+                    affinity_wait,
+                    realm_weights=realm_weights,
+                    realm_max_running=realm_max_running,
+                    name=subpool.name,
+                    policy=policy,
+                ),
+                subpool.timeout,
+            ) for subpool, patterns in get_subpools()
+        ]
 
-        self._pool = create_client(maxqueuesize)
         self._context_processes = lrucache(50)
         self._factory = get_process_factory()
         self._reload_handler = None
         self._restart_files = []
-        self._background_tasks = set()
+        # Asynchronous jobs followed by this front-end
+        self._jobs: Dict[str, asyncio.Task] = {}
+        # Jobs cancelled by a dismiss request
+        self._dismissed: Set[str] = set()
+        # Jobs split in several pool tasks (batch and tiled jobs)
+        self._split_jobs: Dict[str, asyncio.Task] = {}
+        # Running jobs of coalesced processes
+        self._inflight: Dict[str, Tuple[str, asyncio.Task]] = {}
+        # Jobs waiting for a running job of coalesced processes
+        self._followers: Dict[str, asyncio.Task] = {}
 
         self.processes = {p.identifier: p for p in processes}
 
+        # Scale workers according to the load
+        self._factory.start_autoscaler(self._pool)
+        if broker:
+            self._factory.start_relay(self._pool)
+
         # Launch the cleanup task
         self.schedule_cleanup()
 
+        # Consume the durable queue
+        self._queue_task = None
+        self._queued_jobs = set()
+        if confservice.getboolean('server', 'durable_queue'):
+            LOGGER.info("Consuming asynchronous tasks from the durable queue")
+            self._queue_task = asyncio.ensure_future(self._consume_queue())
+
         # Initialize restart handler
         self.init_restart_handler()
 
@@ -102,7 +269,7 @@ class ProcessingExecutor:
             self._reload_handler = watchfiles(self._restart_files, callback, check_time)
             self._reload_handler.start()
 
-    def get_status(self, uuid: Optional[str] = None, **kwargs) -> Iterator:
+    async def get_status(self, uuid: Optional[str] = None, **kwargs) -> Iterator:
         """ Return status of the stored processes
 
             :param uuid: the uuid of the required process.
@@ -110,27 +277,87 @@ class ProcessingExecutor:
 
             :return: The status or an iterator to the list of status.
         """
-        return logstore.get_status(uuid, **kwargs)
+        status = await alogstore.get_status(uuid, **kwargs)
+        if uuid is not None and status is not None and kwargs.get('key') is None:
+            await self._update_estimates(status)
+        return status
+
+    async def _update_estimates(self, record: dict):
+        """ Add queue position and estimated completion
+            time to the job status
+        """
+        try:
+            status = STATUS[record['status']]
+        except KeyError:
+            return
+        if status >= STATUS.DONE_STATUS:
+            return
+
+        runtime = await alogstore.get_runtime(record['identifier'])
+        if status < STATUS.STARTED_STATUS:
+            pool, _ = self.get_pool(record['identifier'])
+            position = pool.queue_position(record['uuid'])
+            if position is None:
+                return
+            record['queue_position'], wait = position
+            start_ts = time.time() + wait
+        elif 'job_start' in record:
+            start_ts = datetime.fromisoformat(record['job_start'].rstrip('Z')).timestamp()
+        else:
+            return
 
-    def kill_job(self, uuid: str, pid: Optional[int] = None) -> bool:
+        if runtime is not None:
+            eta = datetime.fromtimestamp(max(start_ts + runtime.mean, time.time()), timezone.utc)
+            record['eta'] = eta.replace(microsecond=0).isoformat() + 'Z'
+
+    async def kill_job(self, uuid: str) -> bool:
         """ Kill process job
 
-            This will have no effects if the worker
-            is not in 'BUSY' state
+            Queued jobs are removed from the queue. Running jobs
+            are cancelled and the worker is killed if the job does not stop
+            before the cancel grace period.
+
+            This will have no effects if the job is
+            not running.
         """
-        if pid is None:
-            # Retrieve pid
-            store = self.get_status(uuid)
-            if not store:
-                return False
+        job_id = str(uuid)
+        follower = self._followers.get(job_id)
+        if follower is not None:
+            # Stop waiting for the running job, the running
+            # job is left to the other requests
+            LOGGER.info("Cancelling coalesced job %s", job_id)
+            follower.cancel()
+            return True
+
+        split_job = self._split_jobs.get(job_id)
+        if split_job is not None:
+            # Cancel queued tasks and notify workers
+            # running the other tasks
+            LOGGER.info("Cancelling job %s", job_id)
+            split_job.cancel()
+            self._factory.broadcast_cancel(job_id)
+            return True
 
-            pid = store.get('pid')
-            if not pid:
-                return False
+        if self._queue_task and await alogstore.remove_queued_job(job_id):
+            LOGGER.info("Removed job %s from the durable queue", job_id)
+            return True
 
-        return self._factory.kill_worker_busy(pid)
+        if job_id in self._jobs:
+            # The job is cancelled: do not report it as failed
+            self._dismissed.add(job_id)
 
-    def delete_results(self, uuid: str, force: bool = False) -> bool:
+        grace_period = confservice.getfloat('server', 'cancel_grace_period')
+        if isinstance(self._pool, BrokerClient):
+            # Queued and running jobs are cancelled by the broker
+            return await self._pool.cancel_job(job_id, grace_period)
+
+        if self._pool.cancel_job(job_id) or any(pool.cancel_job(job_id) for _, pool, _ in self._subpools):
+            LOGGER.info("Cancelled queued job %s", job_id)
+            return True
+
+        return self._factory.cancel_job(job_id, grace_period)
+
+    async def delete_results(self, uuid: str, force: bool = False) -> bool:
         """ Delete process results and status
 
             :param uuid: the uuid of the required process.
@@ -139,7 +366,7 @@ class ProcessingExecutor:
             :return: True if the status has been deleted.
         """
         if not force:
-            rec = logstore.get_status(uuid)
+            rec = await alogstore.get_status(uuid)
             if rec is None:
                 raise FileNotFoundError(uuid)
             try:
@@ -163,13 +390,13 @@ class ProcessingExecutor:
         except Exception as err:
             LOGGER.error('Unable to remove directory: %s: %s', workdir, err)
         # Delete the record/response
-        logstore.delete_response(uuid_str)
+        await alogstore.delete_response(uuid_str)
         return True
 
-    def get_results(self, uuid):
+    async def get_results(self, uuid):
         """ Return results status
         """
-        return logstore.get_results(uuid)
+        return await alogstore.get_results(uuid)
 
     def terminate(self):
         """ Execute cleanup tasks
@@ -180,9 +407,17 @@ class ProcessingExecutor:
         if self._cleanup_task:
             self._cleanup_task.cancel()
 
+        if self._queue_task:
+            self._queue_task.cancel()
+            for task in self._queued_jobs:
+                task.cancel()
+
         if self._pool:
             self._pool.close()
 
+        for _, pool, _ in self._subpools:
+            pool.close()
+
     def list_processes(self):
         """ List all available processes
 
@@ -238,6 +473,16 @@ class ProcessingExecutor:
             except ProcessException:
                 LOGGER.error("Failed to reload Qgis processes")
 
+    def get_pool(self, identifier: str) -> Tuple[_Client, Optional[int]]:
+        """ Return the pool client and the pool timeout
+            for the process `identifier`
+        """
+        ident = Path(identifier)
+        for patterns, pool, timeout in self._subpools:
+            if any(ident.match(pattern) for pattern in patterns):
+                return pool, timeout
+        return self._pool, None
+
     def schedule_cleanup(self):
         """ Schedule a periodic cleanup
         """
@@ -247,7 +492,7 @@ class ProcessingExecutor:
             while True:
                 await asyncio.sleep(interval)
                 try:
-                    self._clean_processes()
+                    await self._clean_processes()
                 except Exception as e:
                     traceback.print_exc()
                     LOGGER.error("Cleanup task failed: %s", e)
@@ -255,6 +500,81 @@ class ProcessingExecutor:
         # Schedule the task
         self._cleanup_task = asyncio.ensure_future(_run_cleanup())
 
+    @staticmethod
+    def _set_timeout(wps_request: WPSRequest, pool_timeout: Optional[int]):
+        """ Apply the pool timeout to the request
+        """
+        if pool_timeout is not None:
+            # Use the pool timeout if the request did not set a lower timeout
+            if wps_request.timeout < confservice.getint('server', 'response_timeout'):
+                wps_request.timeout = min(wps_request.timeout, pool_timeout)
+            else:
+                wps_request.timeout = pool_timeout
+
+    def is_tiled(self, process: WPSProcess, wps_request: WPSRequest) -> bool:
+        """ Return True if the process is run on tiles
+        """
+        if process.tile_handler is None or wps_request.workflow is not None:
+            return False
+        return _match_processes('tiled_processes', process.identifier)
+
+    def is_parallel_model(self, process: WPSProcess, wps_request: WPSRequest) -> bool:
+        """ Return True if the model child algorithms are
+            run concurrently by the pool workers
+        """
+        if process.model_handler is None or wps_request.workflow is not None:
+            return False
+        return _match_processes('parallel_models', process.identifier)
+
+    def coalesce_key(self, process: WPSProcess, wps_request: WPSRequest) -> Optional[str]:
+        """ Return the key identifying concurrent executions
+            of the request if the process is coalesced
+        """
+        if not _match_processes('coalesced_processes', process.identifier):
+            return None
+        # The project version is only known by workers: concurrent
+        # executions are assumed to use the same project.
+        # Response documents are shared, so is the protocol
+        return f"{wps_request.conformance()}:{request_key(wps_request, process.version, None)}"
+
+    def _single_flight(self, key: str, job_id: str, apply_future: Awaitable) -> asyncio.Task:
+        """ Register the job as the running job for `key`
+        """
+        task = asyncio.ensure_future(apply_future)
+        self._inflight[key] = (job_id, task)
+
+        def _done(_):
+            if self._inflight.get(key, (None, None))[1] is task:
+                del self._inflight[key]
+
+        task.add_done_callback(_done)
+        return task
+
+    def _track_follower(self, job_id: str, follow: Awaitable) -> asyncio.Task:
+        """ Register the job waiting for the running job
+            so that it can be dismissed
+        """
+        task = asyncio.ensure_future(follow)
+        self._followers[job_id] = task
+        task.add_done_callback(lambda _: self._followers.pop(job_id, None))
+        return task
+
+    @staticmethod
+    async def _follow_job(leader_id: str, leader_task: asyncio.Task, wps_response: WPSResponse):
+        """ Wait for the running job and copy its results
+
+            Errors of the running job are raised
+        """
+        # Do not cancel the running job if this one is dismissed
+        await asyncio.shield(leader_task)
+
+        uuid_str = str(wps_response.uuid)
+
+        workdir = os.path.abspath(confservice.get('server', 'workdir'))
+        link_job_files(os.path.join(workdir, leader_id), wps_response.process.workdir, leader_id, uuid_str)
+
+        await alogstore.copy_results(leader_id, uuid_str)
+
     async def execute(self, wps_request: WPSRequest, wps_response: WPSResponse) -> Any:
         """ Execute a process
 
@@ -263,17 +583,74 @@ class ProcessingExecutor:
         process = wps_response.process
         process.uuid = wps_response.uuid
 
-        # Start request
-        logstore.log_request(process.uuid, wps_request)
+        if self.is_tiled(process, wps_request):
+            return await self.execute_tiled(wps_request, wps_response)
+
+        if self.is_parallel_model(process, wps_request):
+            return await self.execute_model(wps_request, wps_response)
+
+        pool, pool_timeout = self.get_pool(process.identifier)
+        self._set_timeout(wps_request, pool_timeout)
 
         # Get request defined timeout
         timeout = wps_request.timeout
+        queue_timeout = min(confservice.getint('server', 'queue_timeout'), timeout)
 
-        apply_future = self._pool.apply_async(
-            self._run_process,
-            args=(process.handler, wps_request, wps_response),
-            timeout=timeout,
-        )
+        if wps_request.execute_async and self._queue_task:
+            # ---------------------------------
+            # Push the job in the durable queue
+            # ---------------------------------
+
+            # Pickle data, if it fails, then error will be raised
+            # before accepting the job
+            data = pickle.dumps(JobEnvelope(wps_request, wps_response), protocol=5)
+
+            await alogstore.log_request(process.uuid, wps_request)
+            await wps_response.aupdate_status('Task accepted', None, STATUS.ACCEPTED_STATUS)
+            await alogstore.enqueue_job(str(process.uuid), data)
+
+            return wps_response.document
+
+        key = self.coalesce_key(process, wps_request)
+        leader = self._inflight.get(key) if key else None
+        if leader is not None:
+            # Attach the job to the running job
+            leader_id, leader_task = leader
+            LOGGER.info("Job %s coalesced with job %s", process.uuid, leader_id)
+            apply_future = self._track_follower(
+                str(process.uuid),
+                self._follow_job(leader_id, leader_task, wps_response),
+            )
+        else:
+            leader_id = None
+
+            # Expected duration from previous jobs
+            runtime = await alogstore.get_runtime(process.identifier)
+
+            # Reject the job before accepting it if it cannot
+            # be started in time
+            try:
+                apply_future = pool.apply_async(
+                    self._run_process,
+                    args=(JobEnvelope(wps_request, wps_response),),
+                    timeout=timeout,
+                    affinity=wps_request.map_uri,
+                    realm=wps_request.realm,
+                    queue_timeout=queue_timeout,
+                    cost=runtime.mean if runtime else None,
+                    job_id=str(process.uuid),
+                    shared=process.thread_safe,
+                )
+            except QueueTimeoutExceeded as e:
+                raise ServerBusy("Server busy, please retry later", retry_after=max(e.retry_after, 1))
+            except MaxRequestsExceeded as e:
+                raise ServerBusy("Server busy, please retry later", retry_after=max(e.retry_after, 1), code=509)
+
+            if key:
+                apply_future = self._single_flight(key, str(process.uuid), apply_future)
+
+        # Start request
+        await alogstore.log_request(process.uuid, wps_request, coalesced_with=leader_id)
 
         if wps_request.execute_async:
             # ---------------------------------
@@ -281,25 +658,27 @@ class ProcessingExecutor:
             # ---------------------------------
 
             # Task accepted
-            wps_response.update_status('Task accepted', None, STATUS.ACCEPTED_STATUS)
+            await wps_response.aupdate_status('Task accepted', None, STATUS.ACCEPTED_STATUS)
 
             async def do_execute_async():
                 # Handle errors while we are going async
                 try:
                     await apply_future
                 except asyncio.TimeoutError:
-                    wps_response.update_status("Timeout Error", None, STATUS.ERROR_STATUS)
+                    await self._job_failed(wps_response, "Timeout Error")
                 except MaxRequestsExceeded:
-                    wps_response.update_status("Server busy, please retry later", None, STATUS.ERROR_STATUS)
+                    # Rejected by the broker
+                    await self._job_failed(wps_response, "Server busy")
+                except asyncio.CancelledError:
+                    LOGGER.info("Job %s dismissed before start", process.uuid)
                 except Exception:
                     # There is no point to let the error go outside
-                    LOGGER.error(traceback.format_exc())
-                    wps_response.update_status("Internal Error", None, STATUS.ERROR_STATUS)
-                    pass
+                    if str(process.uuid) not in self._dismissed:
+                        LOGGER.error(traceback.format_exc())
+                    await self._job_failed(wps_response, "Internal Error")
 
             # Fire and forget
-            task = asyncio.create_task(do_execute_async())
-            task.add_done_callback(self._background_tasks.discard)
+            self._track_job(str(process.uuid), asyncio.create_task(do_execute_async()))
 
             return wps_response.document
         else:
@@ -308,31 +687,521 @@ class ProcessingExecutor:
             # -------------------------------
 
             # Task accepted
-            wps_response.update_status('Task accepted', None, STATUS.ACCEPTED_STATUS)
+            await wps_response.aupdate_status('Task accepted', None, STATUS.ACCEPTED_STATUS)
 
             try:
-                return await apply_future
+                await apply_future
             except asyncio.TimeoutError:
-                wps_response.update_status("Timeout Error", None, STATUS.ERROR_STATUS)
+                await wps_response.aupdate_status("Timeout Error", None, STATUS.ERROR_STATUS)
                 raise NoApplicableCode("Process execution Timeout", code=504)
-            except MaxRequestsExceeded:
-                raise NoApplicableCode("Server busy, please retry later", code=509)
+            except MaxRequestsExceeded as e:
+                # Rejected by the broker
+                await wps_response.aupdate_status("Server busy", None, STATUS.ERROR_STATUS)
+                code = 503 if isinstance(e, QueueTimeoutExceeded) else 509
+                raise ServerBusy("Server busy, please retry later", retry_after=max(e.retry_after, 1), code=code)
             except RequestBackendError as e:
                 if isinstance(e.response, ProcessException):
                     raise NoApplicableCode("Process Error", code=500)
                 else:
                     raise
 
+            # The response document has been written by the worker
+            document = await alogstore.get_results(process.uuid)
+            if document is None:
+                raise NoApplicableCode('No document available', code=500)
+            return document
+
+    async def _consume_queue(self):
+        """ Claim jobs from the durable queue
+
+            At most `parallelprocesses` jobs are claimed at a time,
+            other jobs are left to other consumers.
+        """
+        lease = confservice.getint('server', 'queue_lease')
+        maxjobs = confservice.getint('server', 'parallelprocesses')
+        while True:
+            try:
+                for job_id in await alogstore.requeue_expired_jobs():
+                    LOGGER.warning("Lease expired for job %s, job requeued", job_id)
+                while len(self._queued_jobs) < maxjobs:
+                    job = await alogstore.claim_job(lease)
+                    if job is None:
+                        break
+                    task = asyncio.create_task(self._run_queued_job(*job, lease))
+                    self._queued_jobs.add(task)
+                    task.add_done_callback(self._queued_jobs.discard)
+                    self._track_job(job[0], task)
+            except Exception:
+                LOGGER.error("Durable queue error\n%s", traceback.format_exc())
+            await asyncio.sleep(QUEUE_POLL_INTERVAL)
+
+    def _track_job(self, job_id: str, task: asyncio.Task):
+        """ Register an asynchronous job followed by this front-end
+        """
+        self._jobs[job_id] = task
+
+        def _done(_):
+            self._jobs.pop(job_id, None)
+            self._dismissed.discard(job_id)
+
+        task.add_done_callback(_done)
+
+    async def _job_failed(self, wps_response: WPSResponse, message: str):
+        """ Set the status of a failed job
+
+            Dismissed jobs fail because they have been
+            cancelled: they are marked as dismissed.
+        """
+        if str(wps_response.uuid) in self._dismissed:
+            LOGGER.info("Job %s dismissed", wps_response.uuid)
+            await wps_response.aupdate_status("Job dismissed", None, STATUS.DISMISS_STATUS)
+        else:
+            await wps_response.aupdate_status(message, None, STATUS.ERROR_STATUS)
+
+    async def _renew_lease(self, job_id: str, lease: int):
+        """ Renew the lease of a running job
+        """
+        while True:
+            await asyncio.sleep(lease / 3)
+            try:
+                if not await alogstore.renew_lease(job_id, lease):
+                    LOGGER.warning("Lost lease for job %s", job_id)
+            except Exception as e:
+                LOGGER.error("Failed to renew lease for job %s: %s", job_id, e)
+
+    async def _run_queued_job(self, job_id: str, data: bytes, lease: int):
+        """ Run a job claimed from the durable queue
+        """
+        try:
+            record = await alogstore.get_status(job_id)
+            if record is None or STATUS[record['status']] >= STATUS.DONE_STATUS:
+                # Job has been dismissed
+                await alogstore.ack_job(job_id)
+                return
+            envelope = pickle.loads(data)
+        except Exception:
+            LOGGER.error("Invalid job %s in durable queue\n%s", job_id, traceback.format_exc())
+            await alogstore.ack_job(job_id)
+            return
+
+        identifier = envelope.process.identifier
+        timeout = envelope.request.timeout
+        queue_timeout = min(confservice.getint('server', 'queue_timeout'), timeout)
+        runtime = await alogstore.get_runtime(identifier)
+
+        pool, _ = self.get_pool(identifier)
+
+        renew_task = asyncio.create_task(self._renew_lease(job_id, lease))
+        try:
+            await pool.apply_async(
+                self._run_process,
+                args=(envelope,),
+                timeout=timeout,
+                affinity=envelope.request.map_uri,
+                realm=envelope.request.realm,
+                queue_timeout=queue_timeout,
+                cost=runtime.mean if runtime else None,
+                job_id=job_id,
+                shared=envelope.process.thread_safe,
+            )
+        except MaxRequestsExceeded:
+            # Leave the job to other consumers
+            await alogstore.release_job(job_id)
+            return
+        except asyncio.TimeoutError:
+            await self._job_failed(envelope.create_response(), "Timeout Error")
+        except asyncio.CancelledError:
+            if job_id not in self._dismissed:
+                # We are stopping: the job will be
+                # requeued once its lease has expired
+                raise
+            LOGGER.info("Job %s dismissed before start", job_id)
+        except Exception:
+            if job_id not in self._dismissed:
+                LOGGER.error(traceback.format_exc())
+            await self._job_failed(envelope.create_response(), "Internal Error")
+        finally:
+            renew_task.cancel()
+
+        await alogstore.ack_job(job_id)
+
+    async def execute_batch(self, wps_request: WPSRequest, wps_response: WPSResponse) -> Any:
+        """ Execute a batch as a single job
+
+            Items are split in chunks run concurrently by the
+            pool workers, the job status is updated as chunks complete.
+
+            :return: wps_response or None
+        """
+        process = wps_response.process
+        process.uuid = wps_response.uuid
+        job_id = str(process.uuid)
+
+        pool, pool_timeout = self.get_pool(process.identifier)
+        self._set_timeout(wps_request, pool_timeout)
+
+        timeout = wps_request.timeout
+        queue_timeout = min(confservice.getint('server', 'queue_timeout'), timeout)
+
+        # Expected duration of items from previous jobs
+        runtime = await alogstore.get_runtime(process.identifier)
+
+        items = wps_request.batch
+        chunk_size = confservice.getint('server', 'batch_chunk_size')
+
+        # Reject the job before accepting it if it cannot
+        # be started in time
+        chunks = []
+        try:
+            for offset in range(0, len(items), chunk_size):
+                envelope = BatchEnvelope(wps_request, wps_response, items[offset:offset + chunk_size], offset)
+                apply_future = pool.apply_async(
+                    self._run_handler,
+                    args=(envelope, attrgetter('batch_handler')),
+                    timeout=timeout,
+                    affinity=wps_request.map_uri,
+                    realm=wps_request.realm,
+                    queue_timeout=queue_timeout,
+                    cost=runtime.mean * len(envelope.items) if runtime else None,
+                    job_id=job_id,
+                    shared=process.thread_safe,
+                )
+                chunks.append((offset, len(envelope.items), apply_future))
+        except MaxRequestsExceeded as e:
+            for *_, apply_future in chunks:
+                apply_future.close()
+            code = 503 if isinstance(e, QueueTimeoutExceeded) else 509
+            raise ServerBusy("Server busy, please retry later", retry_after=max(e.retry_after, 1), code=code)
+
+        # Start request
+        await alogstore.log_request(process.uuid, wps_request)
+
+        # Task accepted
+        await wps_response.aupdate_status('Task accepted', None, STATUS.ACCEPTED_STATUS)
+
+        task = asyncio.create_task(self._gather_batch(wps_response, chunks, len(items)))
+        self._split_jobs[job_id] = task
+        task.add_done_callback(lambda _: self._split_jobs.pop(job_id, None))
+
+        if wps_request.execute_async:
+            return wps_response.document
+
+        await task
+        if wps_response.status == STATUS.ERROR_STATUS:
+            raise NoApplicableCode("Process Error", code=500)
+
+        return await alogstore.get_results(process.uuid)
+
+    async def _gather_batch(
+        self,
+        wps_response: WPSResponse,
+        chunks: Sequence[Tuple[int, int, Any]],
+        total: int,
+    ):
+        """ Wait for batch chunks and update the job status
+        """
+        results: List[JsonValue] = [None] * total
+        done = 0
+
+        await wps_response.aupdate_status('Task started', 0, STATUS.STARTED_STATUS)
+
+        def _failed(message: str, size: int) -> List[JsonValue]:
+            return [{'status': wps_response.JOBSTATUS.FAILED.value, 'message': message}] * size
+
+        async def _run_chunk(offset: int, size: int, apply_future: Any):
+            nonlocal done
+            try:
+                items, output_files = await apply_future
+                wps_response.output_files.extend(output_files)
+            except asyncio.TimeoutError:
+                items = _failed("Timeout Error", size)
+            except MaxRequestsExceeded:
+                # Rejected by the broker
+                items = _failed("Server busy", size)
+            except Exception:
+                LOGGER.error(traceback.format_exc())
+                items = _failed("Internal Error", size)
+
+            results[offset:offset + size] = items
+            done += size
+            await wps_response.aupdate_status(f"{done}/{total} items done", int(100 * done / total))
+
+        try:
+            await asyncio.gather(*(_run_chunk(*chunk) for chunk in chunks))
+        except asyncio.CancelledError:
+            LOGGER.info("Batch job %s dismissed", wps_response.uuid)
+            raise
+
+        wps_response.batch_results = results
+        if all(item['status'] != wps_response.JOBSTATUS.SUCCESS.value for item in results):
+            await wps_response.aupdate_status("All batch items failed", 100, STATUS.ERROR_STATUS)
+        else:
+            await wps_response.aupdate_status('Task finished', 100, STATUS.DONE_STATUS)
+
+    async def execute_tiled(self, wps_request: WPSRequest, wps_response: WPSResponse) -> Any:
+        """ Execute a process on tiles of its extent
+
+            Tiles are planned by a worker, run concurrently by
+            the pool workers and merged by a worker.
+
+            :return: wps_response or None
+        """
+        count = confservice.getint('server', 'tile_count') or confservice.getint('server', 'parallelprocesses')
+        return await self.execute_split(
+            wps_request,
+            wps_response,
+            (self._run_handler, attrgetter('tile_handler.plan'), count),
+            self._run_tiles,
+        )
+
+    async def execute_model(self, wps_request: WPSRequest, wps_response: WPSResponse) -> Any:
+        """ Execute a model with independent child algorithms
+            run concurrently by the pool workers
+
+            :return: wps_response or None
+        """
+        return await self.execute_split(
+            wps_request,
+            wps_response,
+            (self._run_handler, attrgetter('model_handler.plan')),
+            self._run_model,
+        )
+
+    async def execute_split(
+        self,
+        wps_request: WPSRequest,
+        wps_response: WPSResponse,
+        plan: Tuple,
+        run: Callable[[WPSResponse, Awaitable, Callable[..., Awaitable]], Awaitable],
+    ) -> Any:
+        """ Execute a job split in several pool tasks
+
+            The `plan` task is submitted first, then `run` is called with
+            the response, the plan result future and a function for applying
+            tasks of the job to the pool.
+
+            :return: wps_response or None
+        """
+        process = wps_response.process
+        job_id = str(process.uuid)
+
+        pool, pool_timeout = self.get_pool(process.identifier)
+        self._set_timeout(wps_request, pool_timeout)
+
+        timeout = wps_request.timeout
+        queue_timeout = min(confservice.getint('server', 'queue_timeout'), timeout)
+
+        # Expected duration from previous jobs
+        runtime = await alogstore.get_runtime(process.identifier)
+
+        envelope = JobEnvelope(wps_request, wps_response)
+
+        def apply(target: Callable, *args) -> Awaitable:
+            return pool.apply_async(
+                target,
+                args=(envelope, *args),
+                timeout=timeout,
+                affinity=wps_request.map_uri,
+                realm=wps_request.realm,
+                queue_timeout=queue_timeout,
+                cost=runtime.mean if runtime else None,
+                job_id=job_id,
+                shared=process.thread_safe,
+            )
+
+        # Reject the job before accepting it if it cannot
+        # be started in time
+        try:
+            plan_future = apply(*plan)
+        except MaxRequestsExceeded as e:
+            code = 503 if isinstance(e, QueueTimeoutExceeded) else 509
+            raise ServerBusy("Server busy, please retry later", retry_after=max(e.retry_after, 1), code=code)
+
+        # Start request
+        await alogstore.log_request(process.uuid, wps_request)
+
+        # Task accepted
+        await wps_response.aupdate_status('Task accepted', None, STATUS.ACCEPTED_STATUS)
+
+        task = asyncio.create_task(self._run_split_job(wps_response, run(wps_response, plan_future, apply)))
+        self._split_jobs[job_id] = task
+        task.add_done_callback(lambda _: self._split_jobs.pop(job_id, None))
+
+        if wps_request.execute_async:
+            return wps_response.document
+
+        await task
+        if wps_response.status == STATUS.ERROR_STATUS:
+            raise NoApplicableCode("Process Error", code=500)
+
+        return await alogstore.get_results(process.uuid)
+
+    async def _run_split_job(self, wps_response: WPSResponse, job: Awaitable):
+        """ Wait for a split job and handle errors
+        """
+        await wps_response.aupdate_status('Task started', 0, STATUS.STARTED_STATUS)
+        try:
+            await job
+        except asyncio.TimeoutError:
+            await wps_response.aupdate_status("Timeout Error", None, STATUS.ERROR_STATUS)
+        except MaxRequestsExceeded:
+            # Rejected by the broker
+            await wps_response.aupdate_status("Server busy", None, STATUS.ERROR_STATUS)
+        except RequestBackendError as e:
+            if isinstance(e.response, ProcessException):
+                await wps_response.aupdate_status(f"{e.response}", None, STATUS.ERROR_STATUS)
+            else:
+                await wps_response.aupdate_status("Internal Error", None, STATUS.ERROR_STATUS)
+        except asyncio.CancelledError:
+            LOGGER.info("Job %s dismissed", wps_response.uuid)
+            raise
+        except Exception:
+            LOGGER.error(traceback.format_exc())
+            await wps_response.aupdate_status("Internal Error", None, STATUS.ERROR_STATUS)
+
+    async def _run_tiles(
+        self,
+        wps_response: WPSResponse,
+        plan_future: Awaitable,
+        apply: Callable[..., Awaitable],
+    ):
+        """ Run the tiles and merge the results
+
+            The job status is updated as tiles complete
+        """
+        tasks = []
+        try:
+            tiles = await plan_future
+            done = 0
+
+            async def _run_tile(index: int, extent: str) -> Dict[str, str]:
+                nonlocal done
+                result = await apply(self._run_handler, attrgetter('tile_handler.run_tile'), extent, index)
+                done += 1
+                await wps_response.aupdate_status(f"{done}/{len(tiles)} tiles done", int(90 * done / len(tiles)))
+                return result
+
+            tasks = [asyncio.ensure_future(_run_tile(index, extent)) for index, extent in enumerate(tiles)]
+            results = await asyncio.gather(*tasks)
+
+            await wps_response.aupdate_status('Merging tiles', 90)
+            await apply(partial(self._run_handler, finish=True), attrgetter('tile_handler.merge'), results)
+        finally:
+            # Cancel the remaining tiles on failure
+            for task in tasks:
+                task.cancel()
+
+    async def _run_model(
+        self,
+        wps_response: WPSResponse,
+        plan_future: Awaitable,
+        apply: Callable[..., Awaitable],
+    ):
+        """ Run the model child algorithms and write the results
+
+            Child algorithms are started as soon as the
+            child algorithms they depend on are done.
+        """
+        tasks: Dict[str, asyncio.Future] = {}
+        try:
+            graph = await plan_future
+            child_outputs: Dict[str, Dict[str, Any]] = {}
+            model_results: Dict[str, Any] = {}
+            done = 0
+
+            async def _run_child(child_id: str):
+                nonlocal done
+                deps = graph[child_id]
+                await asyncio.gather(*(tasks[dep] for dep in deps))
+                outputs, results = await apply(
+                    self._run_handler,
+                    attrgetter('model_handler.run_child'),
+                    child_id,
+                    {dep: child_outputs[dep] for dep in deps},
+                )
+                child_outputs[child_id] = outputs
+                model_results.update(results)
+                done += 1
+                await wps_response.aupdate_status(f"{done}/{len(graph)} model steps done", int(90 * done / len(graph)))
+
+            # Dependencies are scheduled first
+            for child_id in sort_steps(graph, list(graph)):
+                tasks[child_id] = asyncio.ensure_future(_run_child(child_id))
+            await asyncio.gather(*tasks.values())
+
+            await wps_response.aupdate_status('Writing results', 90)
+            await apply(partial(self._run_handler, finish=True), attrgetter('model_handler.merge'), model_results)
+        finally:
+            # Cancel the remaining child algorithms on failure
+            for task in tasks.values():
+                task.cancel()
+
+    @staticmethod
+    def _run_handler(
+        envelope: JobEnvelope,
+        handler: Callable[[WPSProcess], Callable],
+        *args,
+        finish: bool = False,
+    ) -> Any:
+        """ Run a process handler in the job working directory
+
+            `handler` returns the handler from the process, i.e
+            `attrgetter('tile_handler.plan')`: the handler is called with
+            the request, the response and `args`. Batch handlers are also
+            passed the items and the offset of the chunk.
+
+            With `finish`, the job is marked as done and the job status
+            is returned, the response document is written in the logstore.
+        """
+        wps_request = envelope.request
+        wps_response = envelope.create_response()
+
+        workdir = wps_response.process.workdir
+        os.chdir(workdir)
+
+        if isinstance(envelope, BatchEnvelope):
+            args = (envelope.items, envelope.offset, *args)
+            logger = memory_logger(wps_response, len(envelope.items))
+        else:
+            logger = nullcontext()
+
+        with logfile_context(workdir, 'processing'), logger:
+            result = handler(wps_response.process)(wps_request, wps_response, *args)
+
+        if finish:
+            wps_response.update_status('Task finished', 100, STATUS.DONE_STATUS)
+            return wps_response.status
+        return result
+
     @staticmethod
-    def _run_process(
-        handler: WPSHandler,
+    def _result_cache(
         wps_request: WPSRequest,
         wps_response: WPSResponse,
-    ) -> bytes:
+    ) -> Tuple[Optional[ResultCache], Optional[str]]:
+        """ Return the result cache and the cache key
+            if the process is memoized
+        """
+        process = wps_response.process
+        if not _match_processes('memoized_processes', process.identifier):
+            return None, None
+
+        cfg = confservice['server']
+        cache = ResultCache(
+            os.path.join(cfg.get('workdir'), '.results'),
+            cfg.getint('result_cache_size') * 1024 * 1024,
+        )
+        key = request_key(wps_request, process.version, process.project_version(wps_request.map_uri))
+        return cache, key
+
+    @staticmethod
+    def _run_process(envelope: JobEnvelope) -> STATUS:
         """ Run WPS  process
 
-            Note that there is nothing to return is async mode
+            Return the job status, the response document
+            is written in the logstore.
         """
+        wps_request = envelope.request
+        wps_response = envelope.create_response()
         try:
             workdir = wps_response.process.workdir
             # Change current dir to workdir
@@ -340,14 +1209,28 @@ class ProcessingExecutor:
 
             wps_response.update_status('Task started', 0, STATUS.STARTED_STATUS)
 
+            cache, cache_key = ProcessingExecutor._result_cache(wps_request, wps_response)
+            if cache and cache.restore(cache_key, wps_response):
+                wps_response.update_status('Task finished (cached results)', 100, STATUS.DONE_STATUS)
+                return wps_response.status
+
+            if wps_request.workflow is not None:
+                handler = wps_response.process.workflow_handler
+            else:
+                handler = wps_response.process.handler
+
             with logfile_context(workdir, 'processing'), memory_logger(wps_response):
                 handler(wps_request, wps_response)
 
+                if cache:
+                    try:
+                        cache.store(cache_key, wps_response)
+                    except Exception:
+                        LOGGER.error("Failed to cache results:\n%s", traceback.format_exc())
+
                 wps_response.update_status('Task finished', 100, STATUS.DONE_STATUS)
 
-                # Return pickable response
-                if wps_response.document is not None:
-                    return wps_response.get_document_bytes()
+            return wps_response.status
 
         except ProcessException as e:
             wps_response.update_status("%s" % e, None, STATUS.ERROR_STATUS)
@@ -357,7 +1240,7 @@ class ProcessingExecutor:
             raise
 
     @staticmethod
-    def _clean_processes():
+    async def _clean_processes():
         """ Clean up all processes
             Remove status and delete processes workdir
 
@@ -374,21 +1257,33 @@ class ProcessingExecutor:
 
         now_ts = datetime.now(timezone.utc).replace(tzinfo=None).timestamp()
 
-        for _, rec in list(logstore.records):
+        node_id = cfg.get('node_id')
+
+        for rec in await alogstore.get_status():
+            expiration = rec.get('expiration', expire_default)
             timestamp = rec.get('timestamp')
             dangling = timestamp is None
+            if rec.get('node_url') and rec.get('node') != node_id:
+                # Job is cleaned by the node running it: clean it anyway
+                # if it has expired, in case the node is gone for good
+                if not dangling and (now_ts - int(timestamp)) < rec.get('timeout', 0) + expiration:
+                    continue
+                dangling = True
+
             try:
                 if not dangling and STATUS[rec['status']] < STATUS.DONE_STATUS:
                     # Check that the task is not in dangling state
                     timeout = rec.get('timeout')
                     dangling = timeout is None or (now_ts - int(timestamp)) >= timeout
+                    if dangling and await alogstore.is_job_queued(rec['uuid']):
+                        # Waiting in the durable queue
+                        dangling = False
                     if not dangling:
                         continue
             except KeyError:
                 # Handle legacy status
                 pass
 
-            expiration = rec.get('expiration', expire_default)
             notpinned = not rec.get('pinned', False)
             if notpinned and (dangling or (now_ts - int(timestamp)) >= expiration):
                 # Delete the working directory
@@ -401,12 +1296,15 @@ class ProcessingExecutor:
                 except Exception as err:
                     LOGGER.error('Unable to remove directory: %s', err)
                 # Delete the record/response
-                logstore.delete_response(uuid_str)
+                await alogstore.delete_response(uuid_str)
 
 
 @contextmanager
-def memory_logger(response):
+def memory_logger(response: WPSResponse, items: int = 1):
     """ Log memory consumption
+
+        The job duration is recorded per item for
+        batch jobs.
     """
     # Get the current process info
     process = psutil.Process(os.getpid())
@@ -416,6 +1314,14 @@ def memory_logger(response):
     start_time = time.perf_counter_ns()
     try:
         yield
+        # Record job duration for scheduling
+        try:
+            logstore.record_runtime(
+                response.process.identifier,
+                (time.perf_counter_ns() - start_time) / ns / items,
+            )
+        except Exception as e:
+            LOGGER.error("Failed to record job duration: %s", e)
     finally:
         # Log memory infos
         end_time = time.perf_counter_ns()
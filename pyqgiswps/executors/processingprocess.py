@@ -8,16 +8,24 @@
 #
 """ Wrap qgis processing algorithms in WPS process
 """
+import copy
+import glob
 import logging
+import math
 import os
+import shutil
 import traceback
 
 from functools import partial
 from pathlib import Path
 from typing import (
     Any,
+    Dict,
+    List,
     Mapping,
     Optional,
+    Sequence,
+    Tuple,
     Union,
 )
 
@@ -28,21 +36,38 @@ from qgis.core import (
     QgsApplication,
     QgsFeatureRequest,
     QgsMapLayer,
+    QgsProcessing,
     QgsProcessingAlgorithm,
     QgsProcessingContext,
+    QgsProcessingDestinationParameter,
     QgsProcessingFeedback,
+    QgsProcessingModelAlgorithm,
     QgsProcessingOutputLayerDefinition,
     QgsProcessingParameterDefinition,
+    QgsProcessingParameterExtent,
     QgsProcessingUtils,
+    QgsRectangle,
+    QgsVectorFileWriter,
     QgsWkbTypes,
 )
 
 from pyqgiswps.app.process import WPSProcess
 from pyqgiswps.app.request import WPSRequest, WPSResponse
+from pyqgiswps.app.workflow import StepRef, Workflow
 from pyqgiswps.config import confservice
 from pyqgiswps.exceptions import ProcessException
+from pyqgiswps.inout import WPSInput
+from pyqgiswps.poolserver.worker import cancel_handler, notify_progress
+from pyqgiswps.protos import JsonValue
+from pyqgiswps.qgscache.cachemanager import cacheservice
 from pyqgiswps.utils.filecache import get_valid_filename
 
+from .io.layersio import (
+    DESTINATION_LAYER_TYPES,
+    DESTINATION_RASTER_LAYER_TYPES,
+    INPUT_RASTER_LAYER_TYPES,
+    INPUT_VECTOR_LAYER_TYPES,
+)
 from .processingcontext import MapContext, ProcessingContext
 from .processingio import (
     WPSOutput,
@@ -228,9 +253,11 @@ class Feedback(QgsProcessingFeedback):
         """ We update the wps status
         """
         self._response.update_status(status_percentage=int(progress + 0.5))
+        notify_progress()
 
     def setProgressText(self, message: str):
         self._response.update_status(message=message)
+        notify_progress()
 
     def cancel(self):
         """ Notify that job is cancelled
@@ -250,6 +277,38 @@ class Feedback(QgsProcessingFeedback):
         LOGGER.debug("%s:%s %s", self.name, self.uuid, info)
 
 
+class BatchFeedback(Feedback):
+    """ Feedback for batch items
+
+        Progress of items is not reported in the job status, the
+        job progress is updated as items are completed.
+    """
+
+    def setProgress(self, progress: float):
+        notify_progress()
+
+    def setProgressText(self, message: str):
+        notify_progress()
+
+
+class WorkflowFeedback(Feedback):
+    """ Feedback for workflows
+
+        Progress of each step is scaled to the job progress.
+    """
+
+    def __init__(self, response: WPSResponse, name: str, uuid_str: str, steps: int):
+        super().__init__(response, name, uuid_str)
+        self._steps = steps
+        self._step = 0
+
+    def next_step(self):
+        self._step += 1
+
+    def setProgress(self, progress: float):
+        super().setProgress((self._step * 100 + progress) / self._steps)
+
+
 def run_processing_algorithm(
     alg: QgsProcessingAlgorithm,
     parameters: Mapping[str, QgsProcessingParameterDefinition],
@@ -290,12 +349,16 @@ def run_processing_algorithm(
             configuration=create_context,
             catchExceptions=False,
         )
-        feedback.pushInfo(f"Results: {results}")
-        return results
     except Exception as err:
         LOGGER.critical(traceback.format_exc())
         raise ProcessException(f"Algorithm failed with error {err}") from None
 
+    if feedback.isCanceled():
+        raise ProcessException("Algorithm cancelled")
+
+    feedback.pushInfo(f"Results: {results}")
+    return results
+
 
 def run_algorithm(
     alg: QgsProcessingAlgorithm,
@@ -342,6 +405,412 @@ def run_algorithm(
     return results
 
 
+def split_extent(rect: QgsRectangle, count: int) -> List[QgsRectangle]:
+    """ Split `rect` in a grid of at least `count` tiles
+
+        Tiles are kept close to square.
+    """
+    width, height = rect.width(), rect.height()
+    if count <= 1 or width <= 0 or height <= 0:
+        return [rect]
+
+    cols = min(count, max(1, round(math.sqrt(count * width / height))))
+    rows = math.ceil(count / cols)
+
+    xs = [rect.xMinimum() + i * width / cols for i in range(cols)] + [rect.xMaximum()]
+    ys = [rect.yMinimum() + j * height / rows for j in range(rows)] + [rect.yMaximum()]
+
+    return [QgsRectangle(xs[i], ys[j], xs[i + 1], ys[j + 1]) for j in range(rows) for i in range(cols)]
+
+
+class TileHandler:
+    """ Tiled execution of processing algorithms
+
+        Tiles are run with the extent parameter set to the tile extent,
+        tiles layers are written in the job workdir. Raster layers are merged
+        as a virtual raster and vector layers by appending features.
+    """
+
+    def __init__(self, extent: str, create_context: Mapping):
+        self._extent = extent
+        self._create_context = create_context
+
+    def _create_algorithm(self, request: WPSRequest) -> QgsProcessingAlgorithm:
+        return QgsApplication.processingRegistry().createAlgorithmById(
+            request.identifier,
+            self._create_context,
+        )
+
+    def plan(self, request: WPSRequest, response: WPSResponse, count: int) -> List[str]:
+        """ Split the extent input, or the extent of the
+            first input layer
+        """
+        alg = self._create_algorithm(request)
+        context = ProcessingContext(response.process.workdir, map_uri=request.map_uri)
+        try:
+            parameters = dict(
+                input_to_processing(
+                    ident,
+                    inp,
+                    alg,
+                    context,
+                ) for ident, inp in request.inputs.items()
+            )
+            if self._extent in parameters:
+                rect = alg.parameterAsExtent(parameters, self._extent, context)
+                crs = alg.parameterAsExtentCrs(parameters, self._extent, context)
+            else:
+                for param in alg.parameterDefinitions():
+                    if param.name() in parameters and \
+                            isinstance(param, INPUT_VECTOR_LAYER_TYPES + INPUT_RASTER_LAYER_TYPES):
+                        layer = alg.parameterAsLayer(parameters, param.name(), context)
+                        if layer is not None:
+                            rect, crs = layer.extent(), layer.crs()
+                            break
+                else:
+                    raise ProcessException("No extent found for tiled execution")
+        finally:
+            context.reset()
+
+        crs = f" [{crs.authid()}]" if crs.isValid() and crs.authid() else ""
+        return [
+            f"{r.xMinimum()},{r.xMaximum()},{r.yMinimum()},{r.yMaximum()}{crs}"
+            for r in split_extent(rect, count)
+        ]
+
+    def run_tile(self, request: WPSRequest, response: WPSResponse, extent: str, index: int) -> Dict[str, str]:
+        """ Run the algorithm on the tile
+
+            Layers are written in the `tiles/{index}`
+            subdirectory of the job workdir.
+        """
+        uuid_str = str(response.uuid)
+
+        alg = self._create_algorithm(request)
+
+        tiledir = os.path.join(response.process.workdir, 'tiles', str(index))
+        os.makedirs(tiledir, exist_ok=True)
+        os.chdir(tiledir)
+
+        context = ProcessingContext(tiledir, map_uri=request.map_uri)
+        feedback = BatchFeedback(response, alg.id(), uuid_str=uuid_str)
+        try:
+            with cancel_handler(uuid_str, feedback.cancel):
+                context.setFeedback(feedback)
+                context.setInvalidGeometryCheck(QgsFeatureRequest.GeometrySkipInvalid)
+
+                parameters = dict(
+                    input_to_processing(
+                        ident,
+                        inp,
+                        alg,
+                        context,
+                    ) for ident, inp in request.inputs.items()
+                )
+                parameters[self._extent] = extent
+
+                destinations = {
+                    p.name(): os.path.join(tiledir, f"{get_valid_filename(p.name())}.{p.defaultFileExtension()}")
+                    for p in alg.destinationParameterDefinitions()
+                }
+                parameters.update(destinations)
+
+                results = run_processing_algorithm(
+                    alg,
+                    parameters,
+                    feedback=feedback,
+                    context=context,
+                    create_context=self._create_context,
+                )
+        finally:
+            context.reset()
+
+        return {name: results.get(name, path) for name, path in destinations.items()}
+
+    def merge(self, request: WPSRequest, response: WPSResponse, tiles: Sequence[Mapping[str, str]]) -> WPSResponse:
+        """ Merge tiles layers into the result project
+        """
+        uuid_str = str(response.uuid)
+        LOGGER.info("Merging %s tiles %s:%s", len(tiles), uuid_str[:8], request.identifier)
+
+        alg = self._create_algorithm(request)
+
+        destination = get_valid_filename(alg.id())
+
+        # Allow configparser to resolve host_url
+        confservice.set('wps.request', 'host_url', request.host_url)
+
+        context = ProcessingContext(response.process.workdir, map_uri=request.map_uri)
+        feedback = BatchFeedback(response, alg.id(), uuid_str=uuid_str)
+        try:
+            with cancel_handler(uuid_str, feedback.cancel):
+                context.setFeedback(feedback)
+
+                output_map_url = QgsProcess._prepare_result(context, destination, uuid_str)
+
+                # Requested destinations
+                parameters = dict(
+                    input_to_processing(
+                        ident,
+                        inp,
+                        alg,
+                        context,
+                    ) for ident, inp in request.inputs.items()
+                    if isinstance(alg.parameterDefinition(ident), DESTINATION_LAYER_TYPES)
+                )
+
+                results = {}
+                for param in alg.destinationParameterDefinitions():
+                    name = param.name()
+                    layers = [tile[name] for tile in tiles]
+                    output = parameters.get(name)
+                    destname = output.destinationName if output else name
+                    if isinstance(param, DESTINATION_RASTER_LAYER_TYPES):
+                        merge_id = 'gdal:buildvirtualraster'
+                        merge_parameters = {'INPUT': layers, 'SEPARATE': False}
+                        output = None
+                        ext = 'vrt'
+                    else:
+                        merge_id = 'native:mergevectorlayers'
+                        merge_parameters = {'LAYERS': layers}
+                        ext = param.defaultFileExtension()
+                    if output is None:
+                        output = QgsProcessingOutputLayerDefinition(
+                            f"./{get_valid_filename(name)}.{ext}",
+                            context.destination_project,
+                        )
+                    output.destinationName = destname
+                    merge_parameters['OUTPUT'] = output
+
+                    value = run_processing_algorithm(
+                        QgsApplication.processingRegistry().createAlgorithmById(merge_id),
+                        merge_parameters,
+                        feedback=feedback,
+                        context=context,
+                        create_context={},
+                    )['OUTPUT']
+
+                    # Publish the merged layer as the algorithm output
+                    if context.willLoadLayerOnCompletion(value):
+                        details = context.layerToLoadOnCompletionDetails(value)
+                        details.name = destname
+                        details.outputName = name
+                    results[name] = value
+
+                for outdef in alg.outputDefinitions():
+                    out = response.outputs.get(outdef.name())
+                    if out and outdef.name() in results:
+                        processing_to_output(results[outdef.name()], outdef, out, context)
+
+                handle_layer_outputs(alg, context, parameters, results, uuid_str, feedback=feedback)
+
+                QgsProcess._write_result(context, destination, output_map_url)
+        finally:
+            # Reset state for the next job
+            context.reset()
+            confservice.clear_section('wps.request')
+
+        LOGGER.info("Tiles merged %s:%s", request.identifier, uuid_str)
+
+        return response
+
+
+class ModelHandler:
+    """ Parallel execution of model child algorithms
+
+        Each child algorithm is run as a subset of the model with the
+        outputs of the children it depends on. Intermediate layers are
+        written in the job workdir so that they may be read by other workers.
+
+        Requires Qgis 3.38+
+    """
+
+    def __init__(self, create_context: Mapping):
+        self._create_context = create_context
+
+    def _create_model(self, request: WPSRequest) -> QgsProcessingModelAlgorithm:
+        return QgsApplication.processingRegistry().createAlgorithmById(
+            request.identifier,
+            self._create_context,
+        )
+
+    def plan(self, request: WPSRequest, response: WPSResponse) -> Dict[str, List[str]]:
+        """ Return active child algorithms with their dependencies
+        """
+        model = self._create_model(request)
+        active = {cid for cid, child in model.childAlgorithms().items() if child.isActive()}
+        return {cid: sorted(active & set(model.dependsOnChildAlgorithms(cid))) for cid in active}
+
+    def _parameters(self, model: QgsProcessingModelAlgorithm, request: WPSRequest, context: ProcessingContext) -> Dict:
+        """ Return model parameters with destinations written in the workdir
+        """
+        parameters = dict(
+            input_to_processing(
+                ident,
+                inp,
+                model,
+                context,
+            ) for ident, inp in request.inputs.items()
+            if not isinstance(model.parameterDefinition(ident), QgsProcessingDestinationParameter)
+        )
+        for param in model.destinationParameterDefinitions():
+            path = os.path.join(context.workdir, f"{get_valid_filename(param.name())}.{param.defaultFileExtension()}")
+            parameters[param.name()] = path
+        return parameters
+
+    @staticmethod
+    def _export(value: Any, context: ProcessingContext, outdir: str, name: str) -> Any:
+        """ Write temporary child outputs in the job workdir
+        """
+        if not isinstance(value, str):
+            return value
+
+        layer = context.temporaryLayerStore().mapLayer(value)
+        if layer is not None:
+            if layer.type() != QgsMapLayer.VectorLayer:
+                raise ProcessException(f"Cannot export temporary layer {name}")
+            os.makedirs(outdir, exist_ok=True)
+            path = os.path.join(outdir, f"{get_valid_filename(name)}.gpkg")
+            options = QgsVectorFileWriter.SaveVectorOptions()
+            options.driverName = 'GPKG'
+            err, msg, *_ = QgsVectorFileWriter.writeAsVectorFormatV3(
+                layer,
+                path,
+                context.transformContext(),
+                options,
+            )
+            if err != QgsVectorFileWriter.NoError:
+                raise ProcessException(f"Failed to export temporary layer {name}: {msg}")
+            return path
+
+        # Files in the processing temporary folder are
+        # not visible from other workers
+        tempfolder = QgsProcessingUtils.tempFolder()
+        if os.path.isfile(value) and os.path.commonpath((tempfolder, value)) == tempfolder:
+            os.makedirs(outdir, exist_ok=True)
+            for f in glob.glob(f"{glob.escape(os.path.splitext(value)[0])}.*"):
+                shutil.move(f, outdir)
+            return os.path.join(outdir, os.path.basename(value))
+
+        return value
+
+    def run_child(
+        self,
+        request: WPSRequest,
+        response: WPSResponse,
+        child_id: str,
+        child_outputs: Mapping[str, Mapping[str, Any]],
+    ) -> Tuple[Dict[str, Any], Dict[str, Any]]:
+        """ Run the child algorithm `child_id`
+
+            Return the child outputs and the model
+            results produced by the child
+        """
+        from qgis.core import QgsProcessingModelInitialRunConfig
+
+        uuid_str = str(response.uuid)
+
+        model = self._create_model(request)
+
+        workdir = response.process.workdir
+        os.chdir(workdir)
+
+        context = ProcessingContext(workdir, map_uri=request.map_uri)
+        feedback = BatchFeedback(response, model.id(), uuid_str=uuid_str)
+        try:
+            with cancel_handler(uuid_str, feedback.cancel):
+                context.setFeedback(feedback)
+                context.setInvalidGeometryCheck(QgsFeatureRequest.GeometrySkipInvalid)
+
+                config = QgsProcessingModelInitialRunConfig()
+                config.setChildAlgorithmSubset({child_id})
+                config.setPreviouslyExecutedChildAlgorithms(set(child_outputs))
+                config.setInitialChildOutputs(dict(child_outputs))
+                context.setModelInitialRunConfig(config)
+
+                results = run_processing_algorithm(
+                    model,
+                    self._parameters(model, request, context),
+                    feedback=feedback,
+                    context=context,
+                    create_context=self._create_context,
+                )
+
+                outdir = os.path.join(workdir, 'model', get_valid_filename(child_id))
+                outputs = {
+                    name: self._export(value, context, outdir, name)
+                    for name, value in results.get('CHILD_RESULTS', {}).get(child_id, {}).items()
+                }
+        finally:
+            context.reset()
+
+        prefix = f"{child_id}:"
+        return outputs, {k: v for k, v in results.items() if k.startswith(prefix)}
+
+    def merge(self, request: WPSRequest, response: WPSResponse, results: Mapping[str, Any]) -> WPSResponse:
+        """ Publish the model results
+        """
+        uuid_str = str(response.uuid)
+
+        model = self._create_model(request)
+
+        destination = get_valid_filename(model.id())
+
+        # Allow configparser to resolve host_url
+        confservice.set('wps.request', 'host_url', request.host_url)
+
+        context = ProcessingContext(response.process.workdir, map_uri=request.map_uri)
+        feedback = BatchFeedback(response, model.id(), uuid_str=uuid_str)
+        try:
+            with cancel_handler(uuid_str, feedback.cancel):
+                context.setFeedback(feedback)
+
+                output_map_url = QgsProcess._prepare_result(context, destination, uuid_str)
+
+                # Requested destinations
+                parameters = dict(
+                    input_to_processing(
+                        ident,
+                        inp,
+                        model,
+                        context,
+                    ) for ident, inp in request.inputs.items()
+                    if isinstance(model.parameterDefinition(ident), DESTINATION_LAYER_TYPES)
+                )
+
+                for outdef in model.outputDefinitions():
+                    name = outdef.name()
+                    out = response.outputs.get(name)
+                    if not out or name not in results:
+                        continue
+                    value = results[name]
+                    param = model.parameterDefinition(name)
+                    if isinstance(param, DESTINATION_LAYER_TYPES):
+                        # Publish the layer with the requested destination name
+                        output = parameters.get(name)
+                        if isinstance(param, DESTINATION_RASTER_LAYER_TYPES):
+                            hint = QgsProcessingUtils.LayerHint.Raster
+                        else:
+                            hint = QgsProcessingUtils.LayerHint.Vector
+                        context.addLayerToLoadOnCompletion(value, QgsProcessingContext.LayerDetails(
+                            output.destinationName if output else outdef.description(),
+                            context.destination_project,
+                            name,
+                            hint,
+                        ))
+                    processing_to_output(value, outdef, out, context)
+
+                handle_layer_outputs(model, context, parameters, results, uuid_str, feedback=feedback)
+
+                QgsProcess._write_result(context, destination, output_map_url)
+        finally:
+            # Reset state for the next job
+            context.reset()
+            confservice.clear_section('wps.request')
+
+        return response
+
+
 class QgsProcess(WPSProcess):
 
     def __init__(
@@ -370,7 +839,27 @@ class QgsProcess(WPSProcess):
 
         version = alg.version() if hasattr(alg, 'version') else _generic_version
 
+        # Workflows are handled by the process handler
         handler = partial(QgsProcess._handler, create_context=self._create_context)
+        batch_handler = partial(QgsProcess._batch_handler, create_context=self._create_context)
+
+        # Tiled execution requires an extent parameter and
+        # destinations layers that can be merged
+        extent = next(
+            (p.name() for p in alg.parameterDefinitions() if isinstance(p, QgsProcessingParameterExtent)),
+            None,
+        )
+        destinations = alg.destinationParameterDefinitions()
+        if extent and destinations and all(isinstance(p, DESTINATION_LAYER_TYPES) for p in destinations):
+            tile_handler = TileHandler(extent, self._create_context)
+        else:
+            tile_handler = None
+
+        # Running a subset of the model requires Qgis 3.38+
+        if isinstance(alg, QgsProcessingModelAlgorithm) and Qgis.QGIS_VERSION_INT >= 33800:
+            model_handler = ModelHandler(self._create_context)
+        else:
+            model_handler = None
 
         super().__init__(
             handler,
@@ -381,6 +870,10 @@ class QgsProcess(WPSProcess):
             abstract=alg.shortDescription() or alg.shortHelpString(),
             inputs=inputs,
             outputs=outputs,
+            batch_handler=batch_handler,
+            workflow_handler=handler,
+            tile_handler=tile_handler,
+            model_handler=model_handler,
         )
 
     @staticmethod
@@ -415,7 +908,208 @@ class QgsProcess(WPSProcess):
 
         workdir = response.process.workdir
         context = ProcessingContext(workdir, map_uri=request.map_uri)
-        feedback = Feedback(response, alg.id(), uuid_str=uuid_str)
+        if request.workflow is not None:
+            feedback = WorkflowFeedback(response, alg.id(), uuid_str, len(request.workflow.steps) + 1)
+        else:
+            feedback = Feedback(response, alg.id(), uuid_str=uuid_str)
+        try:
+            with cancel_handler(uuid_str, feedback.cancel):
+                parameters = {}
+                if request.workflow is not None:
+                    parameters = QgsProcess._run_workflow(request.workflow, context, create_context, feedback)
+                QgsProcess._run(
+                    alg,
+                    request,
+                    response,
+                    context,
+                    create_context,
+                    destination,
+                    feedback,
+                    parameters=parameters,
+                )
+        finally:
+            # Reset state for the next job
+            context.reset()
+            confservice.clear_section('wps.request')
+
+        LOGGER.info("Task finished %s:%s", request.identifier, uuid_str)
+
+        return response
+
+    @staticmethod
+    def _batch_handler(
+        request: WPSRequest,
+        response: WPSResponse,
+        items: Sequence[Mapping[str, Sequence[WPSInput]]],
+        offset: int,
+        create_context: Mapping,
+    ) -> Tuple[List[JsonValue], List[str]]:
+        """ WPS batch handler
+
+            Run the batch items from index `offset` with the same
+            algorithm and processing context. Results of each item are
+            stored in a subdirectory of the job workdir.
+
+            Return the items results and output files.
+        """
+        uuid_str = str(response.uuid)
+        LOGGER.info(
+            "Starting batch task %s:%s (items %s to %s)",
+            uuid_str[:8],
+            request.identifier,
+            offset,
+            offset + len(items) - 1,
+        )
+
+        alg = QgsApplication.processingRegistry().createAlgorithmById(
+            request.identifier,
+            create_context,
+        )
+
+        destination = get_valid_filename(alg.id())
+
+        # Allow configparser to resolve host_url
+        confservice.set('wps.request', 'host_url', request.host_url)
+
+        workdir = response.process.workdir
+        context = ProcessingContext(workdir, map_uri=request.map_uri)
+        feedback = BatchFeedback(response, alg.id(), uuid_str=uuid_str)
+
+        results: List[Dict] = []
+        output_files: List[str] = []
+        try:
+            with cancel_handler(uuid_str, feedback.cancel):
+                for index, inputs in enumerate(items, offset):
+                    if feedback.isCanceled():
+                        results.append({'status': response.JOBSTATUS.DISMISSED.value, 'message': "Cancelled"})
+                        continue
+
+                    itemdir = os.path.join(workdir, str(index))
+                    os.makedirs(itemdir, exist_ok=True)
+                    os.chdir(itemdir)
+                    context.next_item(itemdir)
+
+                    item_request = copy.copy(request)
+                    item_request.inputs = inputs
+                    item_response = request.create_response(response.process, response.uuid)
+                    item_response.store_url = f"{response.store_url}{index}/"
+                    try:
+                        QgsProcess._run(
+                            alg,
+                            item_request,
+                            item_response,
+                            context,
+                            create_context,
+                            destination,
+                            feedback,
+                            resultpath=f"{uuid_str}/{index}",
+                            write_empty=False,
+                        )
+                        item_response.status = WPSResponse.STATUS.DONE_STATUS
+                        results.append({
+                            'status': response.JOBSTATUS.SUCCESS.value,
+                            'outputs': item_response.get_execute_response(),
+                        })
+                        output_files.extend(f"{index}/{name}" for name in item_response.output_files)
+                    except ProcessException as e:
+                        results.append({'status': response.JOBSTATUS.FAILED.value, 'message': str(e)})
+                    except Exception:
+                        LOGGER.critical(traceback.format_exc())
+                        results.append({'status': response.JOBSTATUS.FAILED.value, 'message': "Internal error"})
+        finally:
+            # Reset state for the next job
+            context.reset()
+            confservice.clear_section('wps.request')
+
+        LOGGER.info("Batch task finished %s:%s", request.identifier, uuid_str)
+
+        return results, output_files
+
+    @staticmethod
+    def _run_workflow(
+        workflow: Workflow,
+        context: ProcessingContext,
+        create_context: Mapping,
+        feedback: WorkflowFeedback,
+    ) -> Dict[str, Any]:
+        """ Run the workflow steps
+
+            Step results are kept in the context temporary layer
+            store and passed as is to the next steps: nothing is
+            written in the job workdir.
+
+            Return the processing parameters referenced by the process.
+        """
+        def _resolve(refs: Mapping[str, StepRef]) -> Dict[str, Any]:
+            return {ident: results[ref.step][ref.output] for ident, ref in refs.items()}
+
+        context.setFeedback(feedback)
+        context.setInvalidGeometryCheck(QgsFeatureRequest.GeometrySkipInvalid)
+
+        results: Dict[str, Mapping[str, Any]] = {}
+        for step in workflow.steps:
+            if feedback.isCanceled():
+                raise ProcessException("Algorithm cancelled")
+
+            alg = QgsApplication.processingRegistry().createAlgorithmById(
+                step.identifier,
+                create_context,
+            )
+            if not alg:
+                raise ProcessException(f"Workflow step '{step.name}': unknown algorithm {step.identifier}")
+
+            parameters = dict(
+                input_to_processing(
+                    ident,
+                    inp,
+                    alg,
+                    context,
+                ) for ident, inp in step.inputs.items()
+            )
+            parameters.update(_resolve(step.refs))
+
+            # Intermediate results are never published
+            for param in alg.destinationParameterDefinitions():
+                parameters[param.name()] = QgsProcessing.TEMPORARY_OUTPUT
+
+            feedback.pushInfo(f"Running workflow step '{step.name}' ({step.identifier})")
+            try:
+                results[step.name] = run_processing_algorithm(
+                    alg,
+                    parameters,
+                    feedback=feedback,
+                    context=context,
+                    create_context=create_context,
+                )
+            except ProcessException as e:
+                raise ProcessException(f"Workflow step '{step.name}': {e}") from None
+
+            feedback.next_step()
+
+        return _resolve(workflow.refs)
+
+    @staticmethod
+    def _run(
+        alg: QgsProcessingAlgorithm,
+        request: WPSRequest,
+        response: WPSResponse,
+        context: ProcessingContext,
+        create_context: Mapping,
+        destination: str,
+        feedback: Feedback,
+        resultpath: Optional[str] = None,
+        write_empty: bool = True,
+        parameters: Optional[Mapping[str, Any]] = None,
+    ):
+        """ Run the algorithm and write results
+
+            The result project is written in `resultpath` relative
+            to the workdir root, default to the job uuid.
+
+            `parameters` are processing parameters set in
+            addition to the request inputs.
+        """
+        uuid_str = str(response.uuid)
 
         context.setFeedback(feedback)
         context.setInvalidGeometryCheck(QgsFeatureRequest.GeometrySkipInvalid)
@@ -428,18 +1122,9 @@ class QgsProcess(WPSProcess):
                 alg,
                 context,
             ) for ident, inp in request.inputs.items()
-        )
-
-        # Build MAP output url '{map_uri}{uuid}/{name}.qgs'
-        output_map_url = (
-            f"{confservice.get('server', 'wps_result_map_uri')}"
-            f"{response.uuid}/{destination}.qgs"
-        )
+        ) | dict(parameters or {})
 
-        # Build WMS output url
-        output_url = confservice.get('server', 'wms_response_url').format(map_url=output_map_url)
-
-        context.wms_url = output_url
+        output_map_url = QgsProcess._prepare_result(context, destination, resultpath or uuid_str)
 
         run_algorithm(
             alg,
@@ -451,6 +1136,34 @@ class QgsProcess(WPSProcess):
             create_context=create_context,
         )
 
+        if not write_empty and context.destination_project.count() == 0:
+            # No layers to publish
+            return
+
+        QgsProcess._write_result(context, destination, output_map_url)
+
+    @staticmethod
+    def _prepare_result(context: ProcessingContext, destination: str, resultpath: str) -> str:
+        """ Set the WMS url of the results
+
+            Return the url of the result project
+        """
+        # Build MAP output url '{map_uri}{uuid}/{name}.qgs'
+        output_map_url = (
+            f"{confservice.get('server', 'wps_result_map_uri')}"
+            f"{resultpath}/{destination}.qgs"
+        )
+
+        # Build WMS output url
+        output_url = confservice.get('server', 'wms_response_url').format(map_url=output_map_url)
+
+        context.wms_url = output_url
+        return output_map_url
+
+    @staticmethod
+    def _write_result(context: ProcessingContext, destination: str, output_map_url: str):
+        """ Write the result project
+        """
         # Build advertised OWS services urla
         advertised_url = confservice.get('qgis.projects', 'advertised_ows_url')
         advertised_url = f"{advertised_url}?MAP={output_map_url}"
@@ -459,9 +1172,13 @@ class QgsProcess(WPSProcess):
         if not ok:
             raise ProcessException("Failed to write %s" % destination)
 
-        LOGGER.info("Task finished %s:%s", request.identifier, uuid_str)
-
-        return response
+    def project_version(self, map_uri: Optional[str]) -> Optional[str]:
+        """ Return the timestamp of the cached project
+        """
+        if map_uri is None:
+            return None
+        cacheservice.update_entry(map_uri)
+        return cacheservice.peek(map_uri).timestamp.isoformat()
 
     def clean(self):
         """ Override default
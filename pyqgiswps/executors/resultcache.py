@@ -0,0 +1,218 @@
+#
+# Copyright 2026 3liz
+# Author: David Marteau
+#
+# This Source Code Form is subject to the terms of the Mozilla Public
+# License, v. 2.0. If a copy of the MPL was not distributed with this
+# file, You can obtain one at http://mozilla.org/MPL/2.0/.
+
+""" Result cache for memoized processes
+
+    Results are keyed on the validated inputs, the process version and
+    the project version. Entries hold the job files as hardlinks and
+    the process outputs: cached files are hardlinked into the workdir
+    of new jobs.
+
+    Entries are shared between workers and evicted in least recently
+    used order when the cache exceeds its size.
+"""
+import hashlib
+import json
+import logging
+import os
+import pickle
+import shutil
+
+from pathlib import Path
+from typing import Any, Optional
+
+from pyqgiswps.app.request import WPSRequest, WPSResponse
+from pyqgiswps.inout import ComplexInput, WPSInput
+from pyqgiswps.inout.basic import SOURCE_TYPE
+from pyqgiswps.protos import JsonValue
+
+LOGGER = logging.getLogger('SRVLOG')
+
+# Entry metadata
+ENTRY_FILE = '.entry'
+
+# Files that are not cached
+EXCLUDED_SUFFIXES = ('.log',)
+
+# Files holding the job uuid
+REWRITTEN_SUFFIXES = ('.qgs',)
+
+# Request fields that do not change the results
+VOLATILE_FIELDS = ('operation', 'version', 'execute_async', 'timeout')
+
+
+def _input_key(inpt: WPSInput) -> JsonValue:
+    """ Return the canonical value of the input
+    """
+    if not isinstance(inpt, ComplexInput):
+        return inpt.json
+
+    # Inline data and uploaded files are
+    # identified by their content
+    digest = None
+    if inpt.url is None and inpt.source_type in (SOURCE_TYPE.FILE, SOURCE_TYPE.DATA):
+        h = hashlib.sha256()
+        if inpt.source_type == SOURCE_TYPE.FILE:
+            with open(inpt.file, 'rb') as fh:
+                for chunk in iter(lambda: fh.read(1 << 16), b''):
+                    h.update(chunk)
+        else:
+            data = inpt.data
+            h.update(data if isinstance(data, bytes) else str(data).encode())
+        digest = h.hexdigest()
+
+    return {
+        'identifier': inpt.identifier,
+        'type': 'complex',
+        'data_format': inpt.data_format.json if inpt.data_format else None,
+        'url': inpt.url,
+        'digest': digest,
+    }
+
+
+def request_key(wps_request: WPSRequest, process_version: str, project_version: Optional[str]) -> str:
+    """ Return the result cache key of the request
+    """
+    obj = {k: v for k, v in wps_request.json.items() if k not in VOLATILE_FIELDS}
+    obj.update(
+        inputs={i: [_input_key(inpt) for inpt in wps_request.inputs[i]] for i in wps_request.inputs},
+        map=wps_request.map_uri,
+        host_url=wps_request.host_url,
+        process_version=process_version,
+        project_version=project_version,
+    )
+    data = json.dumps(obj, sort_keys=True, separators=(',', ':'), default=str)
+    return hashlib.sha256(data.encode()).hexdigest()
+
+
+def _link(src: str, dst: str):
+    """ Hardlink `src` to `dst`, copy if files
+        are on distinct filesystems
+    """
+    try:
+        os.link(src, dst)
+    except OSError:
+        shutil.copy2(src, dst)
+
+
+def link_job_files(srcdir: str, dstdir: str, old: Optional[str] = None, new: Optional[str] = None):
+    """ Hardlink the job files of `srcdir` in `dstdir`
+
+        If `old` is set, the job uuid `old` is replaced
+        by `new` in result projects.
+    """
+    srcdir = Path(srcdir)
+    for src in srcdir.rglob('*'):
+        if not src.is_file() or src.name == ENTRY_FILE or src.suffix in EXCLUDED_SUFFIXES:
+            continue
+        dst = Path(dstdir, src.relative_to(srcdir))
+        dst.parent.mkdir(parents=True, exist_ok=True)
+        if old and dst.suffix in REWRITTEN_SUFFIXES:
+            # Urls in projects hold the job uuid
+            dst.write_text(src.read_text().replace(old, new))
+        else:
+            _link(str(src), str(dst))
+
+
+def _rebase(value: Any, old: str, new: str) -> Any:
+    return value.replace(old, new) if isinstance(value, str) else value
+
+
+class ResultCache:
+
+    def __init__(self, rootdir: str, maxsize: int):
+        """ Result cache stored in `rootdir`
+
+            `maxsize` is the size of the cache in bytes
+        """
+        self._rootdir = Path(rootdir)
+        self._maxsize = maxsize
+
+    def restore(self, key: str, wps_response: WPSResponse) -> bool:
+        """ Restore cached results in the job workdir
+
+            Return False if there is no cache entry
+        """
+        entry = self._rootdir / key
+        try:
+            with (entry / ENTRY_FILE).open('rb') as fh:
+                cached = pickle.load(fh)
+
+            old, new = cached['uuid'], str(wps_response.uuid)
+            link_job_files(str(entry), wps_response.process.workdir, old, new)
+
+            # Update the entry access time
+            os.utime(entry)
+        except FileNotFoundError:
+            # Missing or evicted entry
+            return False
+
+        for ident, out in cached['outputs'].items():
+            for name, value in vars(out).items():
+                setattr(out, name, _rebase(value, old, new))
+            wps_response.outputs[ident] = out
+        wps_response.output_files = cached['output_files']
+
+        LOGGER.info("Results of job %s restored from cache (%s)", new, key[:12])
+        return True
+
+    def store(self, key: str, wps_response: WPSResponse):
+        """ Store the job results
+        """
+        uuid_str = str(wps_response.uuid)
+
+        self._rootdir.mkdir(parents=True, exist_ok=True)
+
+        # Build the entry aside then move it in place
+        tmpdir = self._rootdir / f".tmp-{uuid_str}"
+        try:
+            link_job_files(wps_response.process.workdir, str(tmpdir))
+
+            tmpdir.mkdir(parents=True, exist_ok=True)
+            with (tmpdir / ENTRY_FILE).open('wb') as fh:
+                pickle.dump({
+                    'uuid': uuid_str,
+                    'outputs': wps_response.outputs,
+                    'output_files': wps_response.output_files,
+                }, fh)
+
+            try:
+                tmpdir.rename(self._rootdir / key)
+            except OSError:
+                # Entry stored by a concurrent job
+                return
+        finally:
+            if tmpdir.exists():
+                shutil.rmtree(tmpdir, ignore_errors=True)
+
+        LOGGER.info("Results of job %s stored in cache (%s)", uuid_str, key[:12])
+        self.evict()
+
+    def evict(self):
+        """ Remove least recently used entries
+            until the cache fits its size
+        """
+        entries = []
+        for entry in self._rootdir.iterdir():
+            if entry.name.startswith('.'):
+                continue
+            try:
+                size = sum(f.stat().st_size for f in entry.rglob('*') if f.is_file())
+                entries.append((entry.stat().st_mtime, size, entry))
+            except FileNotFoundError:
+                # Removed concurrently
+                pass
+
+        total = sum(size for _, size, _ in entries)
+        for _, size, entry in sorted(entries):
+            if total <= self._maxsize:
+                break
+            LOGGER.debug("Evicting result cache entry %s", entry.name)
+            shutil.rmtree(entry, ignore_errors=True)
+            total -= size
+
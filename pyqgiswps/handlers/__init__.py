@@ -14,11 +14,13 @@ from .basehandler import (  # noqa: F401
 from .oapihandler import OpenApiHandler  # noqa F401
 from .owshandler import OWSHandler  # noqa: F401
 from .processeshandler import (  # noqa: F401
+    BatchExecuteHandler,
     ConformanceHandler,
     ExecuteHandler,
     JobHandler,
     ProcessHandler,
     ResultHandler,
+    WorkflowExecuteHandler,
 )
 from .roothandler import (  # noqa: F401
     LandingPageHandler,
@@ -10,6 +10,7 @@
 """
 import json
 import logging
+import math
 import mimetypes
 
 from pathlib import Path
@@ -18,14 +19,33 @@ from typing import Any, Awaitable, Optional, Union
 import lxml
 import tornado.web
 
+from tornado import httpclient, httputil
 from tornado.web import HTTPError
 
 from ..config import confservice
 from ..exceptions import NoApplicableCode
+from ..executors.logstore import alogstore
 from ..version import __version__
 
 LOGGER = logging.getLogger('SRVLOG')
 
+# Header set on requests forwarded to another node
+FORWARDED_NODE_HEADER = 'X-Qgis-Wps-Node'
+
+# Headers not forwarded between nodes
+HOP_BY_HOP_HEADERS = frozenset((
+    'Connection',
+    'Content-Length',
+    'Host',
+    'Keep-Alive',
+    'Proxy-Authenticate',
+    'Proxy-Authorization',
+    'Te',
+    'Trailer',
+    'Transfer-Encoding',
+    'Upgrade',
+))
+
 
 class BaseHandler(tornado.web.RequestHandler):
     """ Base class for HTTP request hanlers
@@ -128,6 +148,9 @@ class BaseHandler(tornado.web.RequestHandler):
         else:
             exception = NoApplicableCode(message, code=status_code)
 
+        if getattr(exception, 'retry_after', None) is not None:
+            self.set_header('Retry-After', str(math.ceil(exception.retry_after)))
+
         LOGGER.debug('Request failed with message: %s %s', message, str(exception))
 
         self.format_exception(exception)
@@ -162,6 +185,68 @@ class BaseHandler(tornado.web.RequestHandler):
 
         return f"{req.protocol}://{req.host}/"
 
+    async def forward_to_owner(self, job_id: str) -> bool:
+        """ Forward the request to the node running the job `job_id`
+
+            Return False if the request must be handled locally
+        """
+        if self.request.headers.get(FORWARDED_NODE_HEADER):
+            # Request already forwarded
+            return False
+
+        record = await alogstore.get_status(job_id)
+        if record is None:
+            return False
+
+        node, node_url = record.get('node'), record.get('node_url')
+        if not node_url or node == self._cfg.get('node_id'):
+            return False
+
+        LOGGER.debug("Forwarding request for job %s to node %s", job_id, node)
+
+        headers = httputil.HTTPHeaders()
+        for name, value in self.request.headers.get_all():
+            if name not in HOP_BY_HOP_HEADERS:
+                headers.add(name, value)
+        headers[FORWARDED_NODE_HEADER] = self._cfg.get('node_id')
+        if 'X-Forwarded-Url' not in headers:
+            # Keep urls in responses relative to this node
+            headers['X-Forwarded-Url'] = self.proxy_url()
+
+        def on_header(line: str):
+            line = line.strip()
+            if line.startswith('HTTP/'):
+                start_line = httputil.parse_response_start_line(line)
+                self.set_status(start_line.code, start_line.reason)
+            elif line:
+                name, value = line.split(':', 1)
+                if name not in HOP_BY_HOP_HEADERS:
+                    self.set_header(name, value.strip())
+
+        def on_chunk(chunk: bytes):
+            # Stream the response
+            self.write(chunk)
+            self.flush()
+
+        request = httpclient.HTTPRequest(
+            f"{node_url.rstrip('/')}{self.request.uri}",
+            method=self.request.method,
+            headers=headers,
+            body=self.request.body or None,
+            allow_nonstandard_methods=True,
+            follow_redirects=False,
+            header_callback=on_header,
+            streaming_callback=on_chunk,
+        )
+        try:
+            await httpclient.AsyncHTTPClient().fetch(request, raise_error=False)
+        except Exception as err:
+            LOGGER.error("Failed to forward request to node %s: %s", node, err)
+            raise HTTPError(502, reason=f"Node {node} unavailable")
+
+        self.finish()
+        return True
+
 
 class NotFoundHandler(BaseHandler):
     def prepare(self):  # for all methods
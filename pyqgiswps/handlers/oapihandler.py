@@ -113,6 +113,8 @@ class OpenApiHandler(BaseHandler, DownloadMixIn):
             '/processes': _ref("processes.yml"),
             '/processes/{processID}': _ref("process_description.yml"),
             '/processes/{processID}/execution': _ref("./process_execute.yml"),
+            '/processes/{processID}/execution:batch': _ref("process_execute_batch.yml"),
+            '/processes/{processID}/execution:workflow': _ref("process_execute_workflow.yml"),
             '/jobs': _ref("jobs.yml"),
             '/jobs/{jobID}': _ref("job_status.yml"),
             '/jobs/{jobID}/results': _ref("job_results.yml"),
@@ -66,7 +66,7 @@ class OWSHandler(BaseHandler):
 
         match wpsrequest.operation:
             case 'getresults':
-                response = service.get_results(wpsrequest.results_uuid)
+                response = await service.get_results(wpsrequest.results_uuid)
             case 'getcapabilities':
                 response = wpsrequest.get_capabilities(service, self.accesspolicy)
             case 'describeprocess':
@@ -193,12 +193,7 @@ class ExecuteHandler(ApiHandler):
         try:
             job_id = uuid.uuid1()
             wpsrequest.realm = self.get_job_realm()
-            content = await wpsrequest.execute(
-                process_id, job_id, doc, service,
-                execute_async=prefs.execute_async,
-                timeout=prefs.timeout,
-                expire=prefs.expire,
-            )
+            content = await self.execute(wpsrequest, process_id, job_id, doc, prefs)
         except UnknownProcessError:
             raise HTTPError(404, reason=f"Uknown process id: {process_id}") from None
 
@@ -210,7 +205,7 @@ class ExecuteHandler(ApiHandler):
         # Asyncchronous response must return the status
         if prefs.execute_async:
             # Retrieve the status
-            content = wpsrequest.get_ogcapi_job_status(str(job_id), service)
+            content = await wpsrequest.get_ogcapi_job_status(str(job_id), service)
             if content is None:
                 # Something really wrong happened !!!
                 LOGGER.critical("Missing job status for job '%s' (process: %s) !",
@@ -230,12 +225,77 @@ class ExecuteHandler(ApiHandler):
 
         self.write_json(content)
 
+    async def execute(
+        self,
+        wpsrequest: OgcApiRequest,
+        process_id: str,
+        job_id: uuid.UUID,
+        doc: JsonValue,
+        prefs: ExecutePrefs,
+    ) -> JsonValue:
+        return await wpsrequest.execute(
+            process_id, job_id, doc, self.application.wpsservice,
+            execute_async=prefs.execute_async,
+            timeout=prefs.timeout,
+            expire=prefs.expire,
+        )
+
     def options(self, endpoint: Optional[str] = None):
         """ Implement OPTION for validating CORS
         """
         self.set_option_headers('POST, OPTIONS')
 
 
+class BatchExecuteHandler(ExecuteHandler):
+    """ Handle /process/{process_id}/execution:batch
+    """
+
+    async def execute(
+        self,
+        wpsrequest: OgcApiRequest,
+        process_id: str,
+        job_id: uuid.UUID,
+        doc: JsonValue,
+        prefs: ExecutePrefs,
+    ) -> JsonValue:
+        return await wpsrequest.execute_batch(
+            process_id, job_id, doc, self.application.wpsservice,
+            execute_async=prefs.execute_async,
+            timeout=prefs.timeout,
+            expire=prefs.expire,
+        )
+
+
+class WorkflowExecuteHandler(ExecuteHandler):
+    """ Handle /process/{process_id}/execution:workflow
+    """
+
+    async def execute(
+        self,
+        wpsrequest: OgcApiRequest,
+        process_id: str,
+        job_id: uuid.UUID,
+        doc: JsonValue,
+        prefs: ExecutePrefs,
+    ) -> JsonValue:
+        # Check access to step processes
+        steps = doc.get('steps')
+        if isinstance(steps, dict):
+            for step in steps.values():
+                ident = step.get('process') if isinstance(step, dict) else None
+                if isinstance(ident, str) and not self.accesspolicy.allow(ident):
+                    raise HTTPError(401, reason="Unauthorized operation")
+        try:
+            return await wpsrequest.execute_workflow(
+                process_id, job_id, doc, self.application.wpsservice,
+                execute_async=prefs.execute_async,
+                timeout=prefs.timeout,
+                expire=prefs.expire,
+            )
+        except UnknownProcessError as e:
+            raise HTTPError(404, reason=f"Unknown process id: {e}") from None
+
+
 class RealmController:
 
     def get_job_realm(self):
@@ -256,37 +316,40 @@ class JobHandler(ApiHandler, RealmController):
     """ Handle /jobs
     """
 
-    def get_inputs(self, job_id: str) -> JsonValue:
-        content = self.application.wpsservice.get_status(job_id, key='request')
+    async def get_inputs(self, job_id: str) -> JsonValue:
+        content = await self.application.wpsservice.get_status(job_id, key='request')
         if content is not None:
             content = content.get('inputs', {})
 
         return content
 
-    def get(self, job_id: Optional[str] = None):
+    async def get(self, job_id: Optional[str] = None):
         """ Job status
         """
         wpsrequest = self.create_request()
         wpsrequest.realm = self.get_job_realm()
         if job_id is None:
-            content = wpsrequest.get_ogcapi_job_list(self.application.wpsservice)
+            content = await wpsrequest.get_ogcapi_job_list(self.application.wpsservice)
         else:
             key = self.get_argument('KEY', default=None)
             if key == 'inputs':
-                content = self.get_inputs(job_id)
+                content = await self.get_inputs(job_id)
             else:
-                content = wpsrequest.get_ogcapi_job_status(job_id, self.application.wpsservice)
+                content = await wpsrequest.get_ogcapi_job_status(job_id, self.application.wpsservice)
             if content is None:
                 raise HTTPError(404, reason="Job not found")
 
         self.write_json(content)
 
-    def delete(self, job_id: str):
-        """ Delete results
+    async def delete(self, job_id: str):
+        """ Dismiss the job and delete results
         """
+        if await self.forward_to_owner(job_id):
+            return
+
         wpsrequest = self.create_request()
         wpsrequest.realm = self.get_job_realm()
-        content = wpsrequest.get_ogcapi_job_dismiss(job_id, self.application.wpsservice)
+        content = await wpsrequest.get_ogcapi_job_dismiss(job_id, self.application.wpsservice)
         if content is None:
             raise HTTPError(404, reason="Job not found")
 
@@ -302,8 +365,8 @@ class ResultHandler(ApiHandler):
     """ Handle /jobs/{job_id}/results
     """
 
-    def get(self, job_id: str):
-        content = self.application.wpsservice.get_results(job_id)
+    async def get(self, job_id: str):
+        content = await self.application.wpsservice.get_results(job_id)
         # We should not serve OWS/WPS results with this api
         # This is somewhat hackish but quite effective
         if not content.startswith(b"{"):
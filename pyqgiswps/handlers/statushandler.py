@@ -18,10 +18,10 @@ LOGGER = logging.getLogger('SRVLOG')
 
 class StatusHandler(BaseHandler):
 
-    def get_wps_status(self, uuid: Optional[str] = None):
+    async def get_wps_status(self, uuid: Optional[str] = None):
         """ Return the status of the processes
         """
-        wps_status = self.application.wpsservice.get_status(uuid)
+        wps_status = await self.application.wpsservice.get_status(uuid)
         if uuid is not None and wps_status is None:
             self.set_status(404)
             self.write_json({'error': 'process %s not found' % uuid})
@@ -45,7 +45,7 @@ class StatusHandler(BaseHandler):
 
         self.write_json({'status': wps_status})
 
-    def get_wps_request(self, uuid: str):
+    async def get_wps_request(self, uuid: str):
         """ Return request infos
         """
         if uuid is None:
@@ -53,7 +53,7 @@ class StatusHandler(BaseHandler):
             self.write_json({'error': 'Missing uuid'})
             return
 
-        wps_request = self.application.wpsservice.get_status(uuid, key='request')
+        wps_request = await self.application.wpsservice.get_status(uuid, key='request')
         if uuid is not None and wps_request is None:
             self.set_status(404)
             self.write_json({'error': 'request %s not found' % uuid})
@@ -61,24 +61,26 @@ class StatusHandler(BaseHandler):
 
         self.write_json({'request': wps_request})
 
-    def get(self, uuid: Optional[str] = None):
+    async def get(self, uuid: Optional[str] = None):
         """ Return status infos
         """
         key = self.get_argument('KEY', default=None)
         if key == 'request':
-            self.get_wps_request(uuid)
+            await self.get_wps_request(uuid)
         else:
-            self.get_wps_status(uuid)
+            await self.get_wps_status(uuid)
 
-    def delete(self, uuid: Optional[str] = None):
+    async def delete(self, uuid: Optional[str] = None):
         """ Delete results
         """
         if uuid is None:
             self.set_status(400)
             self.write_json({'error': 'Missing uuid'})
             return
+        if await self.forward_to_owner(uuid):
+            return
         try:
-            success = self.application.wpsservice.delete_results(uuid)
+            success = await self.application.wpsservice.delete_results(uuid)
             if not success:
                 self.set_status(409)  # 409 == Conflict
         except FileNotFoundError:
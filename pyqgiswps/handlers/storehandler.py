@@ -16,7 +16,7 @@ from typing import Optional
 
 from tornado.web import HTTPError
 
-from pyqgiswps.executors.logstore import logstore
+from pyqgiswps.executors.logstore import alogstore
 
 from .basehandler import BaseHandler, DownloadMixIn
 from .processeshandler import RealmController
@@ -51,7 +51,7 @@ class StoreShellMixIn(DownloadMixIn, RealmController):
             #
             # List only allowed output files
             #
-            job_status = self.application.wpsservice.get_status(uuid)
+            job_status = await self.application.wpsservice.get_status(uuid)
             if job_status is None:
                 raise HTTPError(404, reason="The resource does not exists")
 
@@ -92,7 +92,7 @@ class StoreShellMixIn(DownloadMixIn, RealmController):
     async def dnl(self, uuid: str, resource: str, content_type: Optional[str] = None):
         """ Return output file from process working dir
         """
-        self.check_resource_acl(uuid, resource)
+        await self.check_resource_acl(uuid, resource)
 
         path = Path(self._workdir, uuid, resource)
         # Set aggresive browser caching since the resource
@@ -105,10 +105,10 @@ class StoreShellMixIn(DownloadMixIn, RealmController):
         # Note implemented
         raise HTTPError(501, reason="Sorry, the method is not implemented yet")
 
-    def create_dnl_url(self, job_id: str, resource: Optional[str] = None):
+    async def create_dnl_url(self, job_id: str, resource: Optional[str] = None):
         """ Store the request and create a download url
         """
-        token = logstore.set_json({
+        token = await alogstore.set_json({
             'uuid': job_id,
             'name': resource,
         }, self._ttl)
@@ -121,14 +121,14 @@ class StoreShellMixIn(DownloadMixIn, RealmController):
             'expire_at': datetime.fromtimestamp(now + self._ttl).isoformat() + 'Z',
         })
 
-    def check_resource_acl(self, uuid: str, resource: str):
+    async def check_resource_acl(self, uuid: str, resource: str):
         """ Check if is allowed resource
         """
         if not self.realm_enabled():
             return
 
         # Get the status for uuid
-        job_status = self.application.wpsservice.get_status(uuid)
+        job_status = await self.application.wpsservice.get_status(uuid)
         if job_status is None:
             raise HTTPError(404, reason="The resource does not exists")
 
@@ -157,6 +157,9 @@ class StoreHandler(StoreHandlerBase):
     async def get(self, uuid: str, resource: Optional[str] = None):
         """ Handle GET request
         """
+        if await self.forward_to_owner(uuid):
+            return
+
         if resource:
             await self.dnl(uuid, resource)
         else:
@@ -168,11 +171,14 @@ class StoreHandler(StoreHandlerBase):
         if not uuid:
             raise HTTPError(400, reason="Missing job ID")
 
-        self.check_resource_acl(uuid, resource)
+        if await self.forward_to_owner(uuid):
+            return
+
+        await self.check_resource_acl(uuid, resource)
 
         command = self.get_argument('COMMAND', default="").lower()
         if command == 'geturl':
-            self.create_dnl_url(uuid, resource)
+            await self.create_dnl_url(uuid, resource)
         else:
             raise HTTPError(400, reason=f"Invalid command parameter: '{command}'")
 
@@ -187,16 +193,19 @@ class DownloadHandler(StoreHandlerBase):
         """ Handle GET request
         """
         # Download
-        uuid, resource = self.get_dnl_params(token)
+        uuid, resource = await self.get_dnl_params(token)
+        # The token is shared between nodes
+        if await self.forward_to_owner(uuid):
+            return
         await self.download(uuid, resource)
 
-    def get_dnl_params(self, token):
+    async def get_dnl_params(self, token):
         """ Retrieve the download parameters
         """
-        params = logstore.get_json(token)
+        params = await alogstore.get_json(token)
         if params is None:
             raise HTTPError(403)
-        return params['uuid'], params['resource']
+        return params['uuid'], params['name']
 
 
 class LogsHandler(StoreHandlerBase):
@@ -209,5 +218,8 @@ class LogsHandler(StoreHandlerBase):
         if self.realm_enabled():
             raise HTTPError(403)
 
+        if await self.forward_to_owner(job_id):
+            return
+
         await self.dnl(job_id, "processing.log",
                        content_type="text/plain; charset=utf-8")
@@ -21,6 +21,13 @@ from uuid import UUID
 from pyqgiswps.accesspolicy import AccessPolicy
 from pyqgiswps.app.process import WPSProcess
 from pyqgiswps.app.request import WPSRequest, WPSResponse
+from pyqgiswps.app.workflow import (
+    Workflow,
+    WorkflowStep,
+    sort_steps,
+    split_step_refs,
+)
+from pyqgiswps.config import confservice
 from pyqgiswps.exceptions import (
     InvalidParameterValue,
     NoApplicableCode,
@@ -147,6 +154,120 @@ class OgcApiRequest(WPSRequest):
 
         return await service.execute_process(process, self, job_id)
 
+    #
+    # /processes/{id}/execution:batch
+    #
+    async def execute_batch(
+        self,
+        ident: str,
+        job_id: UUID,
+        doc: JsonValue,
+        service: Service,
+        timeout: Optional[int] = None,
+        expire: Optional[int] = None,
+        execute_async: bool = True,
+    ) -> JsonValue:
+        """ Execute the process for each set of inputs
+            in the `items` list of the document
+
+            Outputs specs are shared by all items.
+        """
+        # Raise if process is not found
+        process = service.get_process(ident, map_uri=self.map_uri)
+
+        items = doc.get('items')
+        if not isinstance(items, list) or not items:
+            raise InvalidParameterValue("Missing batch items", "items")
+
+        max_items = confservice.getint('server', 'batch_max_items')
+        if len(items) > max_items:
+            raise InvalidParameterValue(f"Too many batch items (max {max_items})", "items")
+
+        self.identifier = ident
+        self.execute_async = execute_async
+        self.status_link = f"/jobs/{job_id}"
+
+        self.check_and_set_timeout(timeout)
+        self.check_and_set_expiration(expire)
+
+        def _typeclasses(items):
+            return {i.identifier: type(i) for i in items}
+
+        input_types = _typeclasses(process.inputs)
+
+        self.batch = [get_inputs_from_document(item, input_types) for item in items]
+        self.outputs = get_outputs_from_document(doc, _typeclasses(process.outputs))
+
+        return await service.execute_batch(process, self, job_id)
+
+    #
+    # /processes/{id}/execution:workflow
+    #
+    async def execute_workflow(
+        self,
+        ident: str,
+        job_id: UUID,
+        doc: JsonValue,
+        service: Service,
+        timeout: Optional[int] = None,
+        expire: Optional[int] = None,
+        execute_async: bool = True,
+    ) -> JsonValue:
+        """ Execute the process with inputs computed by
+            the workflow `steps` of the document
+
+            Inputs may reference a step output with
+            `{"step": <step name>, "output": <output id>}`. Only
+            the steps required by the process are run.
+        """
+        # Raise if process is not found
+        process = service.get_process(ident, map_uri=self.map_uri)
+
+        steps = doc.get('steps')
+        if not isinstance(steps, dict) or not steps:
+            raise InvalidParameterValue("Missing workflow steps", "steps")
+
+        self.identifier = ident
+        self.execute_async = execute_async
+        self.status_link = f"/jobs/{job_id}"
+
+        self.check_and_set_timeout(timeout)
+        self.check_and_set_expiration(expire)
+
+        def _typeclasses(items):
+            return {i.identifier: type(i) for i in items}
+
+        definitions = {}
+        for name, step in steps.items():
+            if not isinstance(step, dict) or not isinstance(step.get('process'), str):
+                raise InvalidParameterValue(f"Invalid workflow step '{name}'", f"steps/{name}")
+            inputs, refs = split_step_refs(step.get('inputs', {}))
+            definitions[name] = (step['process'], inputs, refs)
+
+        inputs, refs = split_step_refs(doc.get('inputs', {}))
+
+        order = sort_steps(
+            {name: [ref.step for ref in defn[2].values()] for name, defn in definitions.items()},
+            [ref.step for ref in refs.values()],
+        )
+
+        workflow_steps = []
+        for name in order:
+            step_ident, step_inputs, step_refs = definitions[name]
+            step_process = service.get_process(step_ident, map_uri=self.map_uri)
+            workflow_steps.append(WorkflowStep(
+                name,
+                step_ident,
+                get_inputs_from_document({'inputs': step_inputs}, _typeclasses(step_process.inputs)),
+                step_refs,
+            ))
+
+        self.workflow = Workflow(workflow_steps, refs)
+        self.inputs = get_inputs_from_document({'inputs': inputs}, _typeclasses(process.inputs))
+        self.outputs = get_outputs_from_document(doc, _typeclasses(process.outputs))
+
+        return await service.execute_workflow(process, self, job_id)
+
     # Validation
 
     def check_and_set_timeout(self, param: Optional[int]):
@@ -224,6 +345,12 @@ class OgcApiRequest(WPSRequest):
         if jobstart:
             doc.update(started=jobstart)
 
+        # Scheduling estimates
+        if 'queue_position' in store:
+            doc.update(queuePosition=store['queue_position'])
+        if 'eta' in store:
+            doc.update(estimatedCompletion=store['eta'])
+
         if status >= WPSResponse.STATUS.DONE_STATUS:
             doc.update(
                 finished=store['time_end'],
@@ -269,10 +396,10 @@ class OgcApiRequest(WPSRequest):
 
         return doc
 
-    def get_ogcapi_job_status(self, ident: str, service: Service) -> JsonValue:
+    async def get_ogcapi_job_status(self, ident: str, service: Service) -> JsonValue:
         """ Return job status
         """
-        store = service.get_status(ident)
+        store = await service.get_status(ident)
         if store is None:
             return None
 
@@ -282,10 +409,10 @@ class OgcApiRequest(WPSRequest):
 
         return self._create_job_document(store)
 
-    def get_ogcapi_job_list(self, service: Service) -> JsonValue:
+    async def get_ogcapi_job_list(self, service: Service) -> JsonValue:
         """ Return job list
         """
-        jobs = service.get_status()
+        jobs = await service.get_status()
 
         links = [
             {
@@ -311,10 +438,10 @@ class OgcApiRequest(WPSRequest):
 
         return doc
 
-    def get_ogcapi_job_dismiss(self, ident: str, service: Service) -> JsonValue:
+    async def get_ogcapi_job_dismiss(self, ident: str, service: Service) -> JsonValue:
         """ Return job status
         """
-        store = service.get_status(ident)
+        store = await service.get_status(ident)
         if store is None:
             # Non-existent job
             return None
@@ -324,16 +451,12 @@ class OgcApiRequest(WPSRequest):
                 raise NoApplicableCode("Unauthorized", code=401)
 
         status = WPSResponse.STATUS[store['status']]
-        if status < WPSResponse.STATUS.DONE_STATUS:
-            pid = store.get('pid')
-            if pid:
-                # Job may still be busy
-                service.kill_job(ident, pid)
-            else:
-                LOGGER.error("No pid for job with running status !")
+        # Job may be queued or still busy
+        if status < WPSResponse.STATUS.DONE_STATUS and not await service.kill_job(ident):
+            LOGGER.error("No running job %s found !", ident)
 
         # Delete resources
-        service.delete_results(ident, force=True)
+        await service.delete_results(ident, force=True)
 
         # Create response status
         links = [{
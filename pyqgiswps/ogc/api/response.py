@@ -56,6 +56,8 @@ class OgcApiResponse(WPSResponse):
         # Return synchronous results
         # Create response document
         if self.status == WPSResponse.STATUS.DONE_STATUS:
+            if self.batch_results is not None:
+                return {'items': self.batch_results}
             # Process outputs
             doc = {o.identifier: o.ogcapi_output_result(self) for o in self.outputs.values()}
             return doc
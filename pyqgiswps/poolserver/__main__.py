@@ -59,6 +59,8 @@ if __name__ == '__main__':
     parser.add_argument('--workers', metavar='NUM', type=int, default=1, help="Number of workers")
     parser.add_argument('--maxcycles', metavar='NUM', type=int, default=10, help="Max number of run cycles")
     parser.add_argument('--job-timeout', metavar='NUM', type=int, default=8, help="Job timeout")
+    parser.add_argument('--zygote', action='store_true', default=False, help="Fork workers from zygote")
+    parser.add_argument('--slots', metavar='NUM', type=int, default=1, help="Number of slots per worker")
 
     args = parser.parse_args()
 
@@ -67,7 +69,9 @@ if __name__ == '__main__':
     server = create_poolserver(args.workers, maxcycles=args.maxcycles,
                                initializer=initializer,
                                initargs=('foobar',),
-                               timeout=args.job_timeout)
+                               timeout=args.job_timeout,
+                               zygote=args.zygote,
+                               slots=args.slots)
     try:
         client = create_client(args.maxqueue)
 
@@ -0,0 +1,103 @@
+#
+# Copyright 2026 3liz
+# Author: David Marteau
+#
+# This Source Code Form is subject to the terms of the Mozilla Public
+# License, v. 2.0. If a copy of the MPL was not distributed with this
+# file, You can obtain one at http://mozilla.org/MPL/2.0/.
+
+""" Scale the number of workers between min and max
+    workers according to the load of the pool client.
+"""
+import asyncio
+import logging
+import time
+import traceback
+
+from multiprocessing.sharedctypes import Synchronized
+from typing import Optional
+
+from .client import ClientStats, _Client
+
+LOGGER = logging.getLogger('SRVLOG')
+
+# Polling interval in seconds
+SCALE_INTERVAL = 1.0
+
+
+class Autoscaler:
+
+    def __init__(
+        self,
+        target: Synchronized,
+        client: _Client,
+        minworkers: int,
+        maxworkers: int,
+        scale_down_delay: float,
+        interval: float = SCALE_INTERVAL,
+    ):
+        """ Run autoscaler
+
+            :param target: shared number of workers requested for the pool
+            :param scale_down_delay: delay in seconds with idle workers before
+                   retiring one worker
+        """
+        self._target = target
+        self._client = client
+        self._minworkers = minworkers
+        self._maxworkers = maxworkers
+        self._scale_down_delay = scale_down_delay
+        self._interval = interval
+        self._idle_since: Optional[float] = None
+        self._task = None
+
+    def run(self):
+        self._task = asyncio.ensure_future(self._run_async())
+
+    def update(self, stats: ClientStats):
+        """ Update the requested number of workers
+        """
+        target = self._target.value
+        if stats.pending > 0 or stats.max_wait > self._interval:
+            # Scale up: jobs are waiting for workers
+            self._idle_since = None
+            # Do not count workers already starting
+            requested = min(self._maxworkers, stats.workers + max(stats.pending, 1))
+            if requested > target:
+                LOGGER.info("Scaling workers up to %s", requested)
+                self._target.value = requested
+        elif stats.idle > 0 and target > self._minworkers:
+            # Scale down: retire one idle worker at a time,
+            # every `scale_down_delay` seconds
+            now = time.monotonic()
+            if self._idle_since is None:
+                self._idle_since = now
+            elif now - self._idle_since >= self._scale_down_delay:
+                self._idle_since = now
+                LOGGER.info("Scaling workers down to %s", target - 1)
+                # Update target before retiring so that
+                # the worker is not replaced
+                self._target.value = target - 1
+                if not self._client.retire_worker():
+                    self._target.value = target
+        else:
+            self._idle_since = None
+
+    async def _run_async(self):
+        """ Run autoscaler
+        """
+        while True:
+            try:
+                await asyncio.sleep(self._interval)
+                self.update(self._client.stats())
+            except asyncio.CancelledError:
+                break
+            except Exception:
+                LOGGER.critical("%s", traceback.format_exc())
+
+    def stop(self):
+        """ Stop the autoscaler
+        """
+        LOGGER.debug("Stopping autoscaler")
+        if self._task:
+            self._task.cancel()
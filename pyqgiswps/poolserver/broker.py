@@ -0,0 +1,381 @@
+#
+# Copyright 2026 3liz
+# Author: David Marteau
+#
+# This Source Code Form is subject to the terms of the Mozilla Public
+# License, v. 2.0. If a copy of the MPL was not distributed with this
+# file, You can obtain one at http://mozilla.org/MPL/2.0/.
+
+""" Standalone pool broker
+
+    The broker binds the router socket that workers connect to
+    and schedules jobs sent by front-ends. This allows several front-ends
+    and worker hosts to share the same pool:
+
+        front-ends (DEALER) -> broker -> (ROUTER) workers (DEALER)
+
+    Jobs are forwarded to workers as pickled frames: the broker
+    does not unpickle jobs and responses.
+
+    Processes owning the workers register with the broker so that
+    running jobs may be cancelled and workers restarted from
+    front-ends (see `controller.Controller`).
+"""
+
+import asyncio
+import json
+import logging
+import traceback
+import uuid
+
+from typing import (
+    Any,
+    Awaitable,
+    Callable,
+    Dict,
+    List,
+    Mapping,
+    Optional,
+    Sequence,
+    Tuple,
+)
+
+import zmq
+import zmq.asyncio
+
+from .client import (
+    MaxRequestsExceeded,
+    QueueTimeoutExceeded,
+    RequestBackendError,
+    RequestGatewayError,
+    _Client,
+)
+from .utils import (
+    BROKER_BUSY,
+    BROKER_CANCEL,
+    BROKER_CANCELLED,
+    BROKER_ERROR,
+    BROKER_JOB,
+    BROKER_OK,
+    BROKER_QUEUE_TIMEOUT,
+    BROKER_RESTART,
+    BROKER_TIMEOUT,
+    CONTROL_TIMEOUT,
+    pack,
+    unpack,
+)
+
+LOGGER = logging.getLogger('SRVLOG')
+
+# Extra time in seconds waited by front-ends
+# for the broker reply
+REPLY_TIMEOUT_MARGIN = 5
+
+
+class Broker:
+
+    def __init__(
+        self,
+        frontaddr: str,
+        backaddr: str,
+        maxqueue: int = 100,
+        affinity_wait: float = 0,
+        realm_weights: Optional[Mapping[str, float]] = None,
+        realm_max_running: int = 0,
+        policy: str = 'fifo',
+    ):
+        """ Pool broker
+
+            Front-ends connect to `frontaddr` and workers
+            connect to `backaddr`.
+        """
+        context = zmq.asyncio.Context.instance()
+
+        socket = context.socket(zmq.ROUTER)
+        socket.setsockopt(zmq.LINGER, 500)
+        socket.setsockopt(zmq.ROUTER_MANDATORY, 1)
+        socket.bind(frontaddr)
+
+        self._socket = socket
+        self._tasks = set()
+        self._closed = False
+
+        # Schedule jobs on workers
+        self.client = _Client(backaddr, maxqueue, affinity_wait, realm_weights, realm_max_running, policy)
+
+        # Start polling
+        self._polling = asyncio.ensure_future(self._poll())
+
+    async def _poll(self):
+        """ Handle front-ends requests
+        """
+        cancelled = False
+        while not cancelled:
+            try:
+                frontend_id, corr_id, command, *rest = await self._socket.recv_multipart()
+                if command == BROKER_JOB:
+                    self._create_task(self._run_job(frontend_id, corr_id, rest[0], rest[1:]))
+                elif command == BROKER_CANCEL:
+                    self._create_task(self._cancel_job(frontend_id, corr_id, *rest))
+                elif command == BROKER_RESTART:
+                    self._create_task(self._control(frontend_id, corr_id, command, rest))
+                else:
+                    LOGGER.warning("Unknown broker command %s", command)
+            except zmq.ZMQError as err:
+                LOGGER.error("zmq error: %s (%s)", zmq.strerror(err.errno), err.errno)
+            except asyncio.CancelledError:
+                LOGGER.debug("polling stopped")
+                cancelled = True
+            except Exception:
+                LOGGER.error("Polling error\n%s", traceback.format_exc())
+
+    def _create_task(self, coro: Awaitable):
+        task = asyncio.create_task(coro)
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _reply(self, frontend_id: bytes, corr_id: bytes, reply: List[bytes]):
+        try:
+            await self._socket.send_multipart([frontend_id, corr_id, *reply], flags=zmq.DONTWAIT, copy=False)
+        except zmq.ZMQError as err:
+            LOGGER.error("Failed to send reply: %s (%s)", zmq.strerror(err.errno), err.errno)
+
+    async def _cancel_job(self, frontend_id: bytes, corr_id: bytes, job_id: bytes, grace_period: bytes):
+        """ Remove the job from the queue or cancel
+            the job in the pool processes running it
+
+            Without grace period, the job may be split in
+            several tasks: workers are always notified.
+        """
+        queued = False
+        while self.client.cancel_job(job_id.decode()):
+            LOGGER.info("Cancelled queued job %s", job_id.decode())
+            queued = True
+        if queued and grace_period:
+            await self._reply(frontend_id, corr_id, [BROKER_OK, b'1'])
+        else:
+            await self._control(frontend_id, corr_id, BROKER_CANCEL, [job_id, grace_period], queued)
+
+    async def _control(
+        self,
+        frontend_id: bytes,
+        corr_id: bytes,
+        command: bytes,
+        args: List[bytes],
+        ack: bool = False,
+    ):
+        """ Relay the command to the pool processes
+        """
+        try:
+            ack = any(await self.client.control(command, *args)) or ack
+        except asyncio.CancelledError:
+            return
+        except Exception:
+            LOGGER.error("Broker control error\n%s", traceback.format_exc())
+        await self._reply(frontend_id, corr_id, [BROKER_OK, b'1' if ack else b'0'])
+
+    async def _run_job(self, frontend_id: bytes, corr_id: bytes, params: bytes, request: List[bytes]):
+        """ Forward the job to a worker and send back the response
+        """
+        try:
+            params = json.loads(params)
+            timeout = params['timeout']
+            queue_timeout = params['queue_timeout']
+            frames = await self.client.submit(
+                request,
+                timeout,
+                params['affinity'],
+                params['realm'],
+                queue_timeout,
+                params['cost'],
+                params['job_id'],
+                params.get('shared', False),
+            )
+            reply = [BROKER_OK, *frames]
+        except QueueTimeoutExceeded as e:
+            reply = [BROKER_QUEUE_TIMEOUT, str(e.retry_after).encode()]
+        except MaxRequestsExceeded as e:
+            reply = [BROKER_BUSY, str(e.retry_after).encode()]
+        except asyncio.TimeoutError:
+            reply = [BROKER_TIMEOUT]
+        except asyncio.CancelledError:
+            if self._closed:
+                return
+            # Job has been cancelled while queued
+            reply = [BROKER_CANCELLED]
+        except Exception:
+            LOGGER.error("Broker job error\n%s", traceback.format_exc())
+            reply = [BROKER_ERROR]
+
+        await self._reply(frontend_id, corr_id, reply)
+
+    def close(self):
+        LOGGER.debug("Closing pool broker")
+        self._closed = True
+        self._polling.cancel()
+        for task in self._tasks:
+            task.cancel()
+        self.client.close()
+        self._socket.close()
+
+
+class BrokerClient:
+    """ Pool client connected to a standalone broker
+
+        Expose the same interface as `_Client`: scheduling
+        and admission control are handled by the broker.
+    """
+
+    def __init__(self, address: str):
+        context = zmq.asyncio.Context.instance()
+
+        socket = context.socket(zmq.DEALER)
+        socket.setsockopt(zmq.LINGER, 500)
+        socket.connect(address)
+
+        self._socket = socket
+        self._handlers: Dict[bytes, asyncio.Future] = {}
+
+        # Start polling
+        self._polling = asyncio.ensure_future(self._poll())
+
+    async def _poll(self):
+        """ Handle broker replies
+        """
+        cancelled = False
+        while not cancelled:
+            try:
+                corr_id, status, *frames = await self._socket.recv_multipart()
+                handler = self._handlers.pop(corr_id, None)
+                if handler is not None:
+                    handler.set_result((status, frames))
+                else:
+                    LOGGER.warning("No pending future found for message %s", corr_id)
+            except zmq.ZMQError as err:
+                LOGGER.error("zmq error: %s (%s)", zmq.strerror(err.errno), err.errno)
+            except asyncio.CancelledError:
+                LOGGER.debug("polling stopped")
+                cancelled = True
+            except Exception:
+                LOGGER.error("Polling error\n%s", traceback.format_exc())
+
+    def estimated_wait(self) -> float:
+        """ Waiting time is estimated by the broker
+        """
+        return 0.
+
+    def queue_position(self, job_id: str) -> Optional[Tuple[int, float]]:
+        """ Queue is handled by the broker
+        """
+        return None
+
+    async def cancel_job(self, job_id: str, grace_period: Optional[float] = None) -> bool:
+        """ Ask the broker to cancel the job `job_id`
+
+            The job is removed from the queue or cancelled by the pool
+            processes running it: workers still busy with the job after
+            `grace_period` seconds are killed. If `grace_period` is None,
+            workers are only notified.
+
+            Return False if the job is neither queued nor running
+        """
+        grace_period = b'' if grace_period is None else str(grace_period).encode()
+        return await self._control(BROKER_CANCEL, job_id.encode(), grace_period)
+
+    async def restart_pool(self) -> bool:
+        """ Ask the pool processes to restart their workers
+        """
+        return await self._control(BROKER_RESTART)
+
+    async def _control(self, command: bytes, *args: bytes) -> bool:
+        """ Send a control command and return the broker acknowledgment
+        """
+        try:
+            status, frames = await self._request([command, *args], CONTROL_TIMEOUT + REPLY_TIMEOUT_MARGIN)
+        except RequestGatewayError:
+            return False
+        except asyncio.TimeoutError:
+            LOGGER.error("No reply from broker for command %s", command)
+            return False
+        return status == BROKER_OK and frames[0] == b'1'
+
+    def close(self):
+        LOGGER.debug("Closing broker client")
+        self._polling.cancel()
+        self._socket.close()
+
+    def apply_async(
+        self,
+        target: Callable[[None], None],
+        args: Sequence = (),
+        kwargs: Mapping = {},
+        timeout: int = 5,
+        affinity: Optional[str] = None,
+        realm: Optional[str] = None,
+        queue_timeout: Optional[float] = None,
+        cost: Optional[float] = None,
+        job_id: Optional[str] = None,
+        shared: bool = False,
+    ) -> Awaitable:
+        """ Run job asynchronously
+
+            See `_Client.apply_async`. Note that `MaxRequestsExceeded` and
+            `QueueTimeoutExceeded` are raised when awaiting the result.
+        """
+        if queue_timeout is None:
+            queue_timeout = timeout
+
+        # Pickle data, if it fails, then error will be raised before
+        # entering async
+        request = pack((target, args, kwargs))
+        params = json.dumps({
+            'timeout': timeout,
+            'queue_timeout': queue_timeout,
+            'affinity': affinity,
+            'realm': realm,
+            'cost': cost,
+            'job_id': job_id,
+            'shared': shared,
+        }).encode()
+        return self._apply_async(request, params, timeout + queue_timeout + REPLY_TIMEOUT_MARGIN)
+
+    async def _request(self, request: List[Any], timeout: float) -> Tuple[bytes, List[bytes]]:
+        """ Send the request to the broker and wait for the reply
+        """
+        correlation_id = uuid.uuid1().bytes
+        handler = asyncio.get_running_loop().create_future()
+        self._handlers[correlation_id] = handler
+        try:
+            try:
+                await self._socket.send_multipart(
+                    [correlation_id, *request],
+                    flags=zmq.DONTWAIT,
+                    copy=False,
+                )
+            except zmq.ZMQError as err:
+                LOGGER.error("%s (%s)", zmq.strerror(err.errno), err.errno)
+                raise RequestGatewayError()
+
+            return await asyncio.wait_for(handler, timeout)
+        finally:
+            self._handlers.pop(correlation_id, None)
+
+    async def _apply_async(self, request: List[Any], params: bytes, timeout: float) -> Any:
+        """ Send the job to the broker and wait for the response
+        """
+        status, frames = await self._request([BROKER_JOB, params, *request], timeout)
+
+        if status == BROKER_OK:
+            success, response = unpack(frames)
+            if not success:
+                raise RequestBackendError(response)
+            return response
+        if status == BROKER_QUEUE_TIMEOUT:
+            raise QueueTimeoutExceeded(float(frames[0]))
+        if status == BROKER_BUSY:
+            raise MaxRequestsExceeded(float(frames[0]))
+        if status == BROKER_TIMEOUT:
+            raise asyncio.TimeoutError()
+        if status == BROKER_CANCELLED:
+            raise asyncio.CancelledError()
+        raise RequestGatewayError()
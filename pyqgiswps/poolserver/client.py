@@ -12,8 +12,11 @@
 """
 
 import asyncio
+import bisect
+import itertools
 import logging
-import pickle
+import math
+import time
 import traceback
 import uuid
 
@@ -21,17 +24,39 @@ from typing import (
     Any,
     Awaitable,
     Callable,
+    Dict,
+    FrozenSet,
+    Iterable,
+    List,
     Mapping,
+    NamedTuple,
+    Optional,
     Sequence,
+    Set,
+    Tuple,
 )
 
 import zmq
 import zmq.asyncio
 
-from .utils import WORKER_DONE, WORKER_READY, _get_ipc
+from .utils import (
+    CONTROL_HEARTBEAT,
+    CONTROL_TIMEOUT,
+    POOL_CONTROL,
+    WORKER_DONE,
+    WORKER_INFO,
+    WORKER_READY,
+    WORKER_RETIRE,
+    _get_pool_address,
+    pack,
+    unpack,
+)
 
 LOGGER = logging.getLogger('SRVLOG')
 
+# Smoothing factor of the average job time
+JOB_TIME_SMOOTHING = 0.2
+
 
 class RequestTimeoutError(Exception):
     pass
@@ -51,12 +76,85 @@ class RequestBackendError(Exception):
 
 
 class MaxRequestsExceeded(Exception):
-    pass
+    """ Raised when the request cannot be queued
+
+        `retry_after` is the estimated delay in seconds
+        before a worker is available
+    """
+    def __init__(self, retry_after: float = 0):
+        super().__init__(retry_after)
+
+    @property
+    def retry_after(self) -> float:
+        return self.args[0]
+
+
+class QueueTimeoutExceeded(MaxRequestsExceeded):
+    """ Raised when the request cannot start
+        before the queue timeout
+    """
+
+
+def parse_realm_weights(value: str) -> Dict[str, float]:
+    """ Parse realm weights from 'realm:weight, ...'
+    """
+    realm_weights = {}
+    for item in value.split(','):
+        realm, _, weight = item.strip().rpartition(':')
+        if realm:
+            realm_weights[realm] = float(weight)
+    return realm_weights
+
+
+class ClientStats(NamedTuple):
+    pending: int      # Jobs waiting for a worker
+    running: int      # Jobs sent to workers
+    idle: int         # Available workers
+    workers: int      # Known workers
+    max_wait: float   # Max time waited for a worker since last call
+
+
+class _PendingJob:
+    """ Job waiting for a worker
+    """
+
+    def __init__(
+        self,
+        realm: str,
+        affinity: Optional[bytes],
+        future: asyncio.Future,
+        cost: Optional[float] = None,
+        job_id: Optional[str] = None,
+        shared: bool = False,
+    ):
+        self.realm = realm
+        self.affinity = affinity
+        self.future = future
+        self.cost = cost
+        self.job_id = job_id
+        self.shared = shared
+        self.deadline = 0.
+        self.submitted = 0.
+        self.start_deadline = math.inf
 
 
 class _Client:
 
-    def __init__(self, bindaddr: str, maxqueue: int = 100):
+    def __init__(
+        self,
+        bindaddr: str,
+        maxqueue: int = 100,
+        affinity_wait: float = 0,
+        realm_weights: Optional[Mapping[str, float]] = None,
+        realm_max_running: int = 0,
+        policy: str = 'fifo',
+    ):
+        """ Pool client
+
+            :param policy: 'fifo' or 'sjf' (shortest expected job first)
+        """
+        if policy not in ('fifo', 'sjf'):
+            raise ValueError(f"Invalid scheduling policy: {policy}")
 
         context = zmq.asyncio.Context.instance()
 
@@ -70,33 +168,282 @@ class _Client:
         self._maxqueue = maxqueue
 
         # Get track of available workers
-        self._worker_q = asyncio.Queue()
         self._worker_s = []
 
+        # Workers credits: shared jobs take one credit
+        # and other jobs take all the worker's slots
+        self._worker_credits: Dict[bytes, int] = {}
+        self._worker_slots: Dict[bytes, int] = {}
+
+        # Jobs assigned to workers and not yet acknowledged
+        # by a ready notification: (assignment number, cost, job)
+        self._worker_assigned: Dict[bytes, int] = {}
+        self._worker_inflight: Dict[bytes, List[Tuple[int, int, _PendingJob]]] = {}
+
+        # Worker's tags used for affinity
+        self._worker_tags: Dict[bytes, FrozenSet[bytes]] = {}
+        self._affinity_wait = affinity_wait
+
+        # Fair queueing
+        self._queue: List[Tuple[float, int, _PendingJob]] = []
+        self._seq = itertools.count()
+        self._vtime = 0.
+        self._realm_finish: Dict[str, float] = {}
+        self._realm_running: Dict[str, int] = {}
+        self._realm_weights = realm_weights or {}
+        self._realm_max_running = realm_max_running
+        self._policy = policy
+
+        # Scaling
+        self._retiring: Set[bytes] = set()
+        self._max_wait = 0.
+
+        # Average job execution time
+        self._job_time: Optional[float] = None
+
+        # Pool processes connected to a broker: last registration time
+        self._controllers: Dict[bytes, float] = {}
+        self._control_handlers: Dict[Tuple[bytes, bytes], asyncio.Future] = {}
+
         # Start polling
         self._polling = asyncio.ensure_future(self._poll())
 
-    def _put_worker(self, worker_id):
+    def _credits(self, worker_id: bytes) -> int:
+        return self._worker_credits.get(worker_id, self._worker_slots.get(worker_id, 1))
+
+    def _put_worker(self, worker_id: bytes, credits: Optional[int] = None):
+        """ Set the available credits of the worker, default to
+            all the worker's slots
+        """
+        if worker_id in self._retiring:
+            return
+        if credits is None:
+            credits = self._worker_slots.get(worker_id, 1)
+        if credits <= 0:
+            self._worker_credits.pop(worker_id, None)
+            if worker_id in self._worker_s:
+                self._worker_s.remove(worker_id)
+            return
+        self._worker_credits[worker_id] = credits
         if worker_id not in self._worker_s:
             LOGGER.debug("WORKER READY %s", worker_id)
             self._worker_s.append(worker_id)
-            self._worker_q.put_nowait(worker_id)
+        self._dispatch()
+
+    def _take_credits(self, worker_id: bytes, job: _PendingJob):
+        """ Take the credits of the job from the worker
+        """
+        credits = self._credits(worker_id) - 1 if job.shared else 0
+        if credits > 0:
+            self._worker_credits[worker_id] = credits
+        else:
+            self._worker_credits.pop(worker_id, None)
+            self._worker_s.remove(worker_id)
+
+        # Track the job until the worker acknowledges it
+        count = self._worker_assigned.get(worker_id, 0) + 1
+        self._worker_assigned[worker_id] = count
+        cost = 1 if job.shared else self._worker_slots.get(worker_id, 1)
+        self._worker_inflight.setdefault(worker_id, []).append((count, cost, job))
+
+    def _unassign(self, worker_id: bytes, job: _PendingJob):
+        """ Forget a job that has not been sent to the worker
+        """
+        inflight = self._worker_inflight.get(worker_id, [])
+        for i, (_, _, assigned) in enumerate(inflight):
+            if assigned is job:
+                # Following jobs are received one rank earlier
+                inflight[i:] = [(n - 1, cost, j) for n, cost, j in inflight[i + 1:]]
+                self._worker_assigned[worker_id] -= 1
+                break
+
+    def _ready_credits(self, worker_id: bytes, credits: int, slots: int, received: int) -> int:
+        """ Return the free credits of the worker from its ready notification
+
+            `credits` does not account for the jobs assigned to the
+            worker that it has not received yet.
+        """
+        if worker_id not in self._worker_slots:
+            # New worker
+            self._worker_assigned[worker_id] = received
+            self._worker_inflight.pop(worker_id, None)
+        self._worker_slots[worker_id] = slots
+
+        inflight = [e for e in self._worker_inflight.get(worker_id, ()) if e[0] > received]
+        if inflight:
+            self._worker_inflight[worker_id] = inflight
+        else:
+            self._worker_inflight.pop(worker_id, None)
+        return max(credits - sum(cost for _, cost, _ in inflight), 0)
+
+    def _give_back(self, worker_id: bytes, job: _PendingJob):
+        """ Give back the credits of a job that has not been sent
+        """
+        self._unassign(worker_id, job)
+        slots = self._worker_slots.get(worker_id, 1)
+        if job.shared and worker_id in self._worker_s:
+            self._put_worker(worker_id, min(self._credits(worker_id) + 1, slots))
+        else:
+            self._put_worker(worker_id, 1 if job.shared else slots)
 
     def _remove_worker(self, worker_id):
+        self._worker_tags.pop(worker_id, None)
+        self._worker_credits.pop(worker_id, None)
+        self._worker_slots.pop(worker_id, None)
+        self._worker_assigned.pop(worker_id, None)
+        self._worker_inflight.pop(worker_id, None)
+        self._retiring.discard(worker_id)
         if worker_id in self._worker_s:
             LOGGER.debug("WORKER GONE %s", worker_id)
             self._worker_s.remove(worker_id)
 
-    async def _get_worker(self, timeout):
-        while True:
-            worker_id = await asyncio.wait_for(self._worker_q.get(), timeout)
-            try:
-                self._worker_s.remove(worker_id)
-                break
-            except ValueError:
-                # Worker was removed from list, try again
-                pass
-        return worker_id
+    def _enqueue(self, job: _PendingJob):
+        """ Queue job using start-time fair queueing
+
+            Each realm is given a share of workers proportional
+            to its weight.
+        """
+        weight = self._realm_weights.get(job.realm, 1)
+        start_tag = max(self._vtime, self._realm_finish.get(job.realm, 0.))
+        self._realm_finish[job.realm] = start_tag + 1. / weight
+        bisect.insort(self._queue, (start_tag, next(self._seq), job))
+        if self._policy == 'sjf':
+            self._reorder(job.realm)
+
+    def _expected_end(self, job: _PendingJob) -> float:
+        """ Sort key for shortest expected job first
+
+            Jobs are ordered by expected completion time, this
+            prevents starvation of long jobs. A job is never ordered
+            after its start deadline.
+        """
+        cost = job.cost if job.cost is not None else (self._job_time or 0.)
+        return min(job.submitted + cost, job.start_deadline)
+
+    def _reorder(self, realm: str):
+        """ Reorder queued jobs of `realm` by expected completion time
+
+            Start tags are preserved so that fair queueing
+            between realms is not changed.
+        """
+        indices = [i for i, (*_, job) in enumerate(self._queue) if job.realm == realm]
+        jobs = sorted((self._queue[i][2] for i in indices), key=self._expected_end)
+        for i, job in zip(indices, jobs):
+            start_tag, seq, _ = self._queue[i]
+            self._queue[i] = (start_tag, seq, job)
+
+    def _eligible_workers(self, job: _PendingJob) -> List[bytes]:
+        """ Return available workers with enough credits for the job
+
+            Shared jobs prefer workers already running shared jobs so that
+            idle workers are kept for other jobs.
+        """
+        if job.shared:
+            return sorted(self._worker_s, key=self._credits)
+        return [w for w in self._worker_s if self._credits(w) >= self._worker_slots.get(w, 1)]
+
+    def _select_worker(self, job: _PendingJob, now: float) -> Optional[bytes]:
+        """ Select an available worker for the job
+
+            Prefer worker holding the job's affinity tag and wait for
+            a bounded time if only busy workers hold the tag.
+        """
+        workers = self._eligible_workers(job)
+        if job.affinity:
+            for worker_id in workers:
+                if job.affinity in self._worker_tags.get(worker_id, ()):
+                    self._take_credits(worker_id, job)
+                    return worker_id
+            if now < job.deadline and any(
+                job.affinity in tags
+                for worker_id, tags in self._worker_tags.items()
+                if worker_id not in self._retiring
+            ):
+                return None
+        if not workers:
+            return None
+        self._take_credits(workers[0], job)
+        return workers[0]
+
+    def _dispatch(self):
+        """ Assign available workers to queued jobs
+        """
+        now = asyncio.get_running_loop().time()
+        i = 0
+        while i < len(self._queue) and self._worker_s:
+            start_tag, _, job = self._queue[i]
+            if job.future.done():
+                # Job has been cancelled
+                del self._queue[i]
+                continue
+            if self._realm_max_running and \
+                    self._realm_running.get(job.realm, 0) >= self._realm_max_running:
+                i += 1
+                continue
+            worker_id = self._select_worker(job, now)
+            if worker_id is None:
+                i += 1
+                continue
+            del self._queue[i]
+            self._vtime = start_tag
+            self._realm_running[job.realm] = self._realm_running.get(job.realm, 0) + 1
+            job.future.set_result(worker_id)
+
+        if not self._queue:
+            # Idle queue: reset fair queueing state
+            self._vtime = max(self._realm_finish.values(), default=self._vtime)
+            self._realm_finish.clear()
+
+    def _release(self, realm: str):
+        """ Release a running job slot
+        """
+        count = self._realm_running.pop(realm, 0) - 1
+        if count > 0:
+            self._realm_running[realm] = count
+        if self._queue:
+            self._dispatch()
+
+    async def _get_worker(
+        self,
+        timeout: float,
+        affinity: Optional[str] = None,
+        realm: Optional[str] = None,
+        cost: Optional[float] = None,
+        job_id: Optional[str] = None,
+        shared: bool = False,
+    ) -> Tuple[bytes, _PendingJob]:
+        """ Wait for an available worker
+        """
+        loop = asyncio.get_running_loop()
+        job = _PendingJob(
+            realm or '',
+            affinity.encode() if affinity else None,
+            loop.create_future(),
+            cost=cost,
+            job_id=job_id,
+            shared=shared,
+        )
+        job.submitted = loop.time()
+        job.start_deadline = job.submitted + timeout
+        if job.affinity and self._affinity_wait > 0:
+            job.deadline = loop.time() + self._affinity_wait
+            # Wake up the dispatcher when affinity wait expire
+            loop.call_at(job.deadline, self._dispatch)
+        self._enqueue(job)
+        self._dispatch()
+        try:
+            worker_id = await asyncio.wait_for(job.future, timeout)
+        except BaseException:
+            if job.future.done() and not job.future.cancelled():
+                # Worker has been assigned: give it back
+                self._release(job.realm)
+                self._give_back(job.future.result(), job)
+            else:
+                # Cancelled or timed out: remove from the queue
+                self._unqueue(job)
+            job.future.cancel()
+            raise
+        return worker_id, job
 
     async def _poll(self):
         """ Handle incoming messages
@@ -107,31 +454,36 @@ class _Client:
                 worker_id, *rest = await self._socket.recv_multipart()
                 if rest[0] == WORKER_READY:
                     # Worker is available on new connection
-                    # Mark worker as available
-                    self._put_worker(worker_id)
+                    # Mark worker as available with its credits
+                    credits, slots, received, *tags = rest[1:]
+                    self._worker_tags[worker_id] = frozenset(tags)
+                    credits = self._ready_credits(worker_id, int(credits), int(slots), int(received))
+                    self._put_worker(worker_id, credits)
+                    continue
+                if rest[0] == WORKER_INFO:
+                    # Worker's tags have changed
+                    self._worker_tags[worker_id] = frozenset(rest[1:])
                     continue
                 if rest[0] == WORKER_DONE:
                     # Worker is gone because of a restart
                     # Remove worker from list
                     self._remove_worker(worker_id)
                     continue
+                if rest[0] == POOL_CONTROL:
+                    # Pool process registration or control reply
+                    self._controllers[worker_id] = time.monotonic()
+                    if len(rest) > 1:
+                        handler = self._control_handlers.pop((worker_id, rest[1]), None)
+                        if handler is not None and not handler.done():
+                            handler.set_result(rest[2] == b'1')
+                    continue
 
                 msgid = rest[0]
                 # Get if there is a future pending for that message
                 handler = self._handlers.pop(msgid, None)
                 if handler is not None:
-                    try:
-                        success, response = pickle.loads(rest[1])
-                    except Exception as exc:
-                        LOGGER.error("Pickle exception:\n%s", traceback.format_exc())
-                        handler.set_exception(exc)
-                        continue
-                    LOGGER.debug("Receveid %s, success %s", msgid, success)
-                    if not success:
-                        response = RequestBackendError(response)
-                        handler.set_exception(response)
-                    else:
-                        handler.set_result(response)
+                    LOGGER.debug("Receveid %s", msgid)
+                    handler.set_result(rest[1:])
                 else:
                     LOGGER.warning("No pending future found for message %s", msgid)
             except zmq.ZMQError as err:
@@ -142,6 +494,134 @@ class _Client:
             except Exception:
                 LOGGER.error("Polling error\n%s", traceback.format_exc())
 
+    def _unqueue(self, job: _PendingJob):
+        """ Remove the job from the queue
+        """
+        for i, (*_, queued) in enumerate(self._queue):
+            if queued is job:
+                del self._queue[i]
+                break
+
+    def _pending_jobs(self) -> Iterable[_PendingJob]:
+        return (job for *_, job in self._queue if not job.future.done())
+
+    def _expected_wait(self, ahead: Sequence[_PendingJob]) -> float:
+        """ Estimate the time for a job queued after
+            `ahead` jobs to get a worker
+
+            The estimation is based on the expected cost
+            of queued jobs and on the average execution time
+            of the last jobs.
+        """
+        if self._job_time is None or len(ahead) < len(self._worker_s):
+            return 0.
+        workers = max(len(self._worker_tags) - len(self._retiring), 1)
+        work = sum(job.cost if job.cost is not None else self._job_time for job in ahead)
+        return (work + self._job_time) / workers
+
+    def estimated_wait(self) -> float:
+        """ Estimate the time for a new job to get a worker
+        """
+        return self._expected_wait(tuple(self._pending_jobs()))
+
+    def queue_position(self, job_id: str) -> Optional[Tuple[int, float]]:
+        """ Return the position of the job in the queue
+            and the estimated time before it get a worker
+
+            Return None if the job is not queued
+        """
+        ahead = []
+        for job in self._pending_jobs():
+            if job.job_id == job_id:
+                return len(ahead), self._expected_wait(ahead)
+            ahead.append(job)
+        return None
+
+    def _update_job_time(self, elapsed: float):
+        if self._job_time is None:
+            self._job_time = elapsed
+        else:
+            self._job_time += JOB_TIME_SMOOTHING * (elapsed - self._job_time)
+
+    def stats(self) -> ClientStats:
+        """ Return scheduling statistics
+
+            Note that max wait time is reset on each call
+        """
+        max_wait, self._max_wait = self._max_wait, 0.
+        return ClientStats(
+            pending=sum(1 for _ in self._pending_jobs()),
+            running=len(self._handlers),
+            idle=len(self._worker_s),
+            workers=len(self._worker_tags) - len(self._retiring),
+            max_wait=max_wait,
+        )
+
+    def cancel_job(self, job_id: str) -> bool:
+        """ Remove the job `job_id` from the queue
+
+            Return False if the job is not queued
+        """
+        for job in self._pending_jobs():
+            if job.job_id == job_id:
+                job.future.cancel()
+                return True
+        return False
+
+    async def control(self, command: bytes, *args: bytes) -> List[bool]:
+        """ Send a control command to the pool processes
+            and return their replies
+
+            Pool processes that do not reply before
+            `CONTROL_TIMEOUT` are ignored.
+        """
+        loop = asyncio.get_running_loop()
+        correlation_id = uuid.uuid1().bytes
+        expired = time.monotonic() - 3 * CONTROL_HEARTBEAT
+        handlers = {}
+        for ctrl_id, registered in list(self._controllers.items()):
+            if registered < expired:
+                # Pool process is gone
+                del self._controllers[ctrl_id]
+                continue
+            try:
+                await self._socket.send_multipart([ctrl_id, correlation_id, command, *args], flags=zmq.DONTWAIT)
+            except zmq.ZMQError as err:
+                LOGGER.error("%s (%s)", zmq.strerror(err.errno), err.errno)
+                del self._controllers[ctrl_id]
+                continue
+            handlers[ctrl_id, correlation_id] = loop.create_future()
+        if not handlers:
+            return []
+        self._control_handlers.update(handlers)
+        try:
+            done, _ = await asyncio.wait(handlers.values(), timeout=CONTROL_TIMEOUT)
+        finally:
+            for key in handlers:
+                self._control_handlers.pop(key, None)
+        return [fut.result() for fut in done]
+
+    def retire_worker(self) -> bool:
+        """ Ask an idle worker to exit
+
+            Prefer worker with the smaller number of tags
+        """
+        idle = [w for w in self._worker_s if self._credits(w) >= self._worker_slots.get(w, 1)]
+        if not idle:
+            return False
+        worker_id = min(idle, key=lambda w: len(self._worker_tags.get(w, ())))
+        self._worker_s.remove(worker_id)
+        self._worker_credits.pop(worker_id, None)
+        self._retiring.add(worker_id)
+        try:
+            self._socket.send_multipart([worker_id, WORKER_RETIRE], flags=zmq.DONTWAIT)
+        except zmq.ZMQError as err:
+            LOGGER.error("%s (%s)", zmq.strerror(err.errno), err.errno)
+            self._remove_worker(worker_id)
+            return False
+        LOGGER.debug("WORKER RETIRE %s", worker_id)
+        return True
+
     def close(self):
         LOGGER.debug("Closing pool client")
         self._polling.cancel()
@@ -153,49 +633,169 @@ class _Client:
         args: Sequence = (),
         kwargs: Mapping = {},
         timeout: int = 5,
+        affinity: Optional[str] = None,
+        realm: Optional[str] = None,
+        queue_timeout: Optional[float] = None,
+        cost: Optional[float] = None,
+        job_id: Optional[str] = None,
+        shared: bool = False,
     ) -> Awaitable:
         """ Run job asynchronously
+
+            `timeout` is the execution timeout and `queue_timeout` the
+            max time waiting for a worker, default to `timeout`.
+
+            If `affinity` is set, prefer a worker holding
+            the `affinity` tag.
+
+            Jobs are scheduled fairly between realms. With the 'sjf' policy,
+            jobs of the same realm are ordered by their expected `cost` in seconds.
+
+            `job_id` is used to retrieve the position of the job in the queue.
+
+            If `shared` is True, the job takes a single slot of a multi-slot
+            worker and may run concurrently with other shared jobs.
+
+            Raise `MaxRequestsExceeded` if the queue is full and `QueueTimeoutExceeded`
+            if the job is not expected to start before `queue_timeout`.
         """
         # Pickle data, if it fails, then error will be raised before
         # entering async
-        request = pickle.dumps((target, args, kwargs))
-        return self._apply_async(request, timeout)
+        request = pack((target, args, kwargs))
+        return self._apply_async(
+            self.submit(request, timeout, affinity, realm, queue_timeout, cost, job_id, shared),
+        )
 
-    async def _apply_async(self, request: bytes, timeout: int) -> Any:
-        """ Run job asynchronously
+    def submit(
+        self,
+        request: List[Any],
+        timeout: int,
+        affinity: Optional[str] = None,
+        realm: Optional[str] = None,
+        queue_timeout: Optional[float] = None,
+        cost: Optional[float] = None,
+        job_id: Optional[str] = None,
+        shared: bool = False,
+    ) -> Awaitable[List[bytes]]:
+        """ Submit a pickled request
+
+            Admission control is applied before returning: see `apply_async`
+            for arguments and exceptions.
+
+            Return an awaitable of the response frames
         """
-        if len(self._handlers) > self._maxqueue:
-            raise MaxRequestsExceeded()
+        if queue_timeout is None:
+            queue_timeout = timeout
 
-        # Wait for available worker
-        LOGGER.debug("*** Waiting worker")
-        worker_id = await self._get_worker(timeout)
+        self._admit(queue_timeout)
 
-        # Send request
-        correlation_id = uuid.uuid1().bytes
-        try:
-            # Send request
-            LOGGER.debug("*** Sending request")
-            await self._socket.send_multipart([worker_id, correlation_id, request], flags=zmq.DONTWAIT)
-        except zmq.ZMQError as err:
-            LOGGER.error("%s (%s)", zmq.strerror(err.errno), err.errno)
-            raise RequestGatewayError()
+        return self._send_request(request, timeout, affinity, realm, queue_timeout, cost, job_id, shared)
 
-        handler = asyncio.get_running_loop().create_future()
+    def _admit(self, queue_timeout: float):
+        """ Admission control: fail early
+        """
+        if len(self._handlers) + sum(1 for _ in self._pending_jobs()) > self._maxqueue:
+            raise MaxRequestsExceeded(self.estimated_wait())
 
+        estimated_wait = self.estimated_wait()
+        if estimated_wait > queue_timeout:
+            LOGGER.warning("Rejecting job: estimated wait time %.1fs exceed queue timeout", estimated_wait)
+            raise QueueTimeoutExceeded(estimated_wait)
+
+    async def _apply_async(self, response: Awaitable[List[bytes]]) -> Any:
+        """ Wait for the response and return the job result
+        """
+        frames = await response
+        try:
+            success, response = unpack(frames)
+        except Exception:
+            LOGGER.error("Pickle exception:\n%s", traceback.format_exc())
+            raise
+        if not success:
+            raise RequestBackendError(response)
+        return response
+
+    async def _send_request(
+        self,
+        request: List[Any],
+        timeout: int,
+        affinity: Optional[str] = None,
+        realm: Optional[str] = None,
+        queue_timeout: Optional[float] = None,
+        cost: Optional[float] = None,
+        job_id: Optional[str] = None,
+        shared: bool = False,
+    ) -> List[bytes]:
+        """ Send the pickled request to a worker and
+            return the response frames
+        """
+        # Wait for available worker
+        LOGGER.debug("*** Waiting worker")
+        start = time.monotonic()
         try:
-            self._handlers[correlation_id] = handler
-            # Wait for response
-            LOGGER.debug("*** Waiting for response")
-            return await asyncio.wait_for(handler, timeout)
+            worker_id, job = await self._get_worker(
+                queue_timeout or timeout,
+                affinity,
+                realm,
+                cost,
+                job_id,
+                shared,
+            )
         finally:
-            # Remove the handler
-            self._handlers.pop(correlation_id, None)
+            self._max_wait = max(self._max_wait, time.monotonic() - start)
 
+        try:
+            # Send request
+            correlation_id = uuid.uuid1().bytes
+            try:
+                # Send request
+                LOGGER.debug("*** Sending request")
+                await self._socket.send_multipart(
+                    [
+                        worker_id,
+                        correlation_id,
+                        str(timeout).encode(),
+                        b'1' if shared else b'0',
+                        (job_id or '').encode(),
+                        *request,
+                    ],
+                    flags=zmq.DONTWAIT,
+                    copy=False,
+                )
+            except zmq.ZMQError as err:
+                LOGGER.error("%s (%s)", zmq.strerror(err.errno), err.errno)
+                self._unassign(worker_id, job)
+                raise RequestGatewayError()
 
-def create_client(maxqueue: int = 100) -> _Client:
+            handler = asyncio.get_running_loop().create_future()
 
+            try:
+                self._handlers[correlation_id] = handler
+                # Wait for response
+                LOGGER.debug("*** Waiting for response")
+                start = time.monotonic()
+                response = await asyncio.wait_for(handler, timeout)
+                self._update_job_time(time.monotonic() - start)
+                return response
+            finally:
+                # Remove the handler
+                self._handlers.pop(correlation_id, None)
+        finally:
+            self._release(job.realm)
+
+
+def create_client(
+    maxqueue: int = 100,
+    affinity_wait: float = 0,
+    realm_weights: Optional[Mapping[str, float]] = None,
+    realm_max_running: int = 0,
+    name: Optional[str] = None,
+    policy: str = 'fifo',
+) -> _Client:
+    """ Create a client for the default pool
+        or the pool `name`
+    """
     # Create ROUTER socket
-    bindaddr = _get_ipc('pooladdr')
+    bindaddr = _get_pool_address(name)
 
-    return _Client(bindaddr, maxqueue)
+    return _Client(bindaddr, maxqueue, affinity_wait, realm_weights, realm_max_running, policy)
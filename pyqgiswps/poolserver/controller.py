@@ -0,0 +1,91 @@
+#
+# Copyright 2026 3liz
+# Author: David Marteau
+#
+# This Source Code Form is subject to the terms of the Mozilla Public
+# License, v. 2.0. If a copy of the MPL was not distributed with this
+# file, You can obtain one at http://mozilla.org/MPL/2.0/.
+
+""" Handle control commands relayed by a standalone broker
+    in the process owning the workers
+
+    The controller connects to the broker back-end and registers
+    itself every `CONTROL_HEARTBEAT` seconds, so that the broker can
+    relay commands that require the supervisor or the broadcast
+    socket of the pool, i.e cancelling running jobs.
+"""
+import asyncio
+import logging
+import time
+import traceback
+
+from typing import Callable, List
+
+import zmq
+import zmq.asyncio
+
+from .utils import CONTROL_HEARTBEAT, POOL_CONTROL
+
+LOGGER = logging.getLogger('SRVLOG')
+
+
+class Controller:
+
+    def __init__(self, address: str, handler: Callable[[bytes, List[bytes]], bool]):
+        """ Run controller
+
+            :param address: the broker back-end address
+            :param handler: called with the command and its arguments,
+                   return the acknowledgment sent to the broker.
+        """
+        ctx = zmq.asyncio.Context.instance()
+        self._sock = ctx.socket(zmq.DEALER)
+        self._sock.setsockopt(zmq.LINGER, 500)
+        self._sock.setsockopt(zmq.RCVTIMEO, 1000)
+        self._sock.connect(address)
+
+        self._handler = handler
+        self._task = None
+
+    def run(self):
+        self._task = asyncio.ensure_future(self._run_async())
+
+    async def _send(self, *data: bytes):
+        try:
+            await self._sock.send_multipart([POOL_CONTROL, *data], flags=zmq.DONTWAIT)
+        except zmq.ZMQError as err:
+            if err.errno != zmq.EAGAIN:
+                LOGGER.error("%s (%s)", zmq.strerror(err.errno), err.errno)
+
+    async def _run_async(self):
+        """ Run controller
+        """
+        registered = 0.
+        while True:
+            try:
+                now = time.monotonic()
+                if now - registered >= CONTROL_HEARTBEAT:
+                    registered = now
+                    await self._send()
+                corr_id, command, *args = await self._sock.recv_multipart()
+                try:
+                    ack = self._handler(command, args)
+                except Exception:
+                    LOGGER.error("Control command %s failed:\n%s", command, traceback.format_exc())
+                    ack = False
+                await self._send(corr_id, b'1' if ack else b'0')
+            except zmq.ZMQError as err:
+                if err.errno != zmq.EAGAIN:
+                    LOGGER.error("%s\n%s", zmq.strerror(err.errno), traceback.format_exc())
+            except asyncio.CancelledError:
+                break
+            except Exception:
+                LOGGER.critical("%s", traceback.format_exc())
+
+    def stop(self):
+        """ Stop the controller
+        """
+        LOGGER.debug("Stopping controller")
+        if self._task:
+            self._task.cancel()
+        self._sock.close()
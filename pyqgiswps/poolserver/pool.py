@@ -13,11 +13,13 @@ import os
 import signal
 import time
 
-from multiprocessing import Process
+from multiprocessing.process import BaseProcess as Process
+from multiprocessing.sharedctypes import Synchronized
 from multiprocessing.util import Finalize
-from typing import Callable, Optional, Sequence
+from typing import Callable, Iterable, List, Optional, Sequence, Set
 
-from .worker import worker_handler
+from .utils import fork_context
+from .worker import MemoryLimits, worker_handler
 
 # Early failure min delay
 # If any process fail before that starting delay
@@ -36,18 +38,45 @@ class Pool:
         initializer: Optional[Callable[[None], None]] = None,
         initargs: Sequence = (),
         maxcycles: Optional[int] = None,
+        tags: Optional[Callable[[], Iterable[str]]] = None,
+        target: Optional[Synchronized] = None,
+        timeout: Optional[int] = None,
+        memlimits: Optional[MemoryLimits] = None,
+        spares: int = 0,
+        slots: int = 1,
     ):
+        """ Workers pool
 
+            If `target` is set, it holds the number of workers
+            requested by the autoscaler, bounded by `numworkers`.
+
+            `spares` initialized workers are kept ready for replacing
+            exiting workers.
+
+            Each worker runs up to `slots` shared jobs concurrently.
+        """
         self.critical_failure = False
 
         self._router = router
         self._broadcastaddr = broadcastaddr
         self._num_workers = numworkers
+        self._target = target
+        self._timeout = timeout
+        self._memlimits = memlimits
         self._pool = []
         self._maxcycles = maxcycles
         self._initializer = initializer
         self._initargs = initargs
+        self._tags = tags
         self._start_time = time.time()
+        self._retiring = False
+        self._spares = spares
+        self._slots = slots
+
+        # Rolling restart
+        self._restart = False
+        self._old: List[Process] = []
+        self._stopping: Set[Process] = set()
 
         # Ensure that pool is terminated is called
         # at process exit
@@ -83,26 +112,123 @@ class Pool:
                 worker.join()
                 cleaned = True
                 del self._pool[i]
+                self._stopping.discard(worker)
+                if worker in self._old:
+                    self._old.remove(worker)
         return cleaned
 
+    @property
+    def num_workers(self) -> int:
+        """ Return the requested number of workers
+        """
+        if self._target is not None:
+            return min(self._target.value, self._num_workers)
+        return self._num_workers
+
+    def _pool_size(self) -> int:
+        """ Return the number of workers to maintain
+        """
+        size = self.num_workers + self._spares
+        if self._old:
+            # Rolling restart: start replacements
+            size += max(self._spares, 1)
+        return size
+
     def _repopulate_pool(self):
         """Bring the number of pool processes up to the specified number,
         for use after reaping workers which have exited.
         """
-        for _ in range(self._num_workers - len(self._pool)):
-            w = Process(target=worker_handler, args=(self._router, self._broadcastaddr),
+        for _ in range(self._pool_size() - len(self._pool) + len(self._stopping)):
+            ready, activate = fork_context.Event(), fork_context.Event()
+            w = fork_context.Process(target=worker_handler, args=(self._router, self._broadcastaddr),
                         kwargs=dict(maxcycles=self._maxcycles,
                                     initializer=self._initializer,
-                                    initargs=self._initargs))
+                                    initargs=self._initargs,
+                                    tags=self._tags,
+                                    timeout=self._timeout,
+                                    memlimits=self._memlimits,
+                                    slots=self._slots,
+                                    ready=ready,
+                                    activate=activate))
+            w.ready = ready
+            w.activate = activate
             self._pool.append(w)
             w.name = w.name.replace('Process', 'PoolWorker')
             w.start()
+        self._activate_workers()
+
+    def _stop_worker(self, worker: Process):
+        """ Ask worker to exit once its running job is done
+        """
+        if worker not in self._stopping and worker.exitcode is None:
+            self._stopping.add(worker)
+            os.kill(worker.pid, signal.SIGHUP)
+
+    def _activate_workers(self):
+        """ Activate spare workers for replacing exited workers
+        """
+        workers = [w for w in self._pool if w not in self._stopping]
+        active = sum(1 for w in workers if w.activate.is_set())
+        if active < self.num_workers:
+            # Prefer initialized workers
+            spares = sorted(
+                (w for w in workers if not w.activate.is_set()),
+                key=lambda w: not w.ready.is_set(),
+            )
+            for w in spares[:self.num_workers - active]:
+                w.activate.set()
+
+    def _rolling_restart(self):
+        """ Replace old workers once their replacements
+            are initialized
+        """
+        initialized = sum(1 for w in self._pool if w not in self._stopping and w.ready.is_set())
+        excess = initialized - self.num_workers - self._spares
+        # Stop inactive workers first
+        self._old.sort(key=lambda w: w.activate.is_set())
+        while excess > 0 and self._old:
+            self._stop_worker(self._old.pop(0))
+            excess -= 1
+
+    def restart(self):
+        """ Request a rolling restart
+
+            Note: this is called from signal handler
+        """
+        self._restart = True
 
     def maintain_pool(self):
         """Clean up any exited workers and start replacements for them.
         """
-        if self._join_exited_workers():
-            self._repopulate_pool()
+        self._join_exited_workers()
+        if self._restart and not self._retiring:
+            self._restart = False
+            LOGGER.info("Rolling restart of workers")
+            self._old = [w for w in self._pool if w not in self._stopping]
+        if self._old:
+            self._rolling_restart()
+        if not self._retiring:
+            if len(self._pool) - len(self._stopping) < self._pool_size():
+                self._repopulate_pool()
+            else:
+                self._activate_workers()
+
+    def retire(self):
+        """ Stop replacing exited workers
+
+            Workers will exit once their running job is done.
+        """
+        self._retiring = True
+        self._old.clear()
+        for w in self._pool:
+            self._stop_worker(w)
+
+    @property
+    def retired(self) -> bool:
+        """ Return True if the pool is retiring and
+            all workers have exited
+        """
+        return self._retiring and not self._pool
 
     @classmethod
     def _terminate_pool(cls, pool: 'Pool'):
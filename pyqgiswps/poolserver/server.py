@@ -17,10 +17,14 @@ import sys
 import time
 import traceback
 
-from multiprocessing import Process
+from multiprocessing.process import BaseProcess as Process
+from multiprocessing.sharedctypes import Synchronized
 from multiprocessing.util import Finalize
 from typing import (
     Callable,
+    Iterable,
+    List,
+    NamedTuple,
     Optional,
     Sequence,
 )
@@ -28,16 +32,52 @@ from typing import (
 import zmq
 import zmq.asyncio
 
+from .autoscaler import Autoscaler
+from .client import _Client
+from .controller import Controller
 from .pool import Pool
 from .supervisor import Supervisor
-from .utils import _get_ipc
+from .utils import (
+    BROADCAST_CANCEL,
+    BROADCAST_RESTART,
+    BROKER_CANCEL,
+    BROKER_RESTART,
+    _get_ipc,
+    _get_pool_address,
+    fork_context,
+)
+from .worker import MemoryLimits
+from .zygote import ZygotePool
 
 LOGGER = logging.getLogger('SRVLOG')
 
 
+class SubPool(NamedTuple):
+    """ Named pool definition
+    """
+    name: str
+    numworkers: int
+    maxcycles: Optional[int]
+    timeout: int
+
+
 class _Server:
 
-    def __init__(self, broadcastaddr: str, pool: Process, timeout: int):
+    def __init__(
+        self,
+        broadcastaddr: str,
+        pool: Process,
+        timeout: int,
+        subpools: Sequence[Process] = (),
+        zygote: bool = False,
+        target: Optional[Synchronized] = None,
+        minworkers: int = 0,
+        maxworkers: int = 0,
+        scale_down_delay: float = 0,
+        stall_timeout: float = 0,
+        rolling: bool = False,
+        broker: Optional[str] = None,
+    ):
 
         ctx = zmq.asyncio.Context.instance()
         pub = ctx.socket(zmq.PUB)
@@ -46,36 +86,92 @@ class _Server:
         pub.bind(broadcastaddr)
 
         self._timeout = timeout
+        self._stall_timeout = stall_timeout
         self._sock = pub
+        self._zygote = zygote
+        self._rolling = rolling
 
         LOGGER.debug("Started server")
         self._pool = pool
+        self._pools = [pool, *subpools]
         self._supervisor = None
 
+        self._broker = broker
+        self._controller = None
+
+        self._target = target
+        self._minworkers = minworkers
+        self._maxworkers = maxworkers
+        self._scale_down_delay = scale_down_delay
+        self._autoscaler = None
+
         # Ensure that pool is terminated is called
         # at process exit
         self._terminate = Finalize(
-            self, self._terminate_pool,
-            args=(self._pool,),
+            self, self._terminate_pools,
+            args=(self._pools,),
             exitpriority=16,
         )
 
     def start_supervisor(self):
         """ Start supervisor independently
 
+            When workers are connected to a broker, the controller
+            handling the commands relayed by the broker is started too.
+
             Note: It is no recommended to run supervisor before asyncio loop
             has been properly set - for exemple when using a custom loop.
         """
         if self._supervisor is None:
             LOGGER.info("Starting supervisor")
-            self._supervisor = Supervisor(self._timeout, lambda pid: os.kill(pid, signal.SIGKILL))
+            self._supervisor = Supervisor(
+                self._timeout,
+                lambda pid: os.kill(pid, signal.SIGKILL),
+                stall_timeout=self._stall_timeout,
+            )
             self._supervisor.run()
+        if self._broker and self._controller is None:
+            LOGGER.info("Starting broker controller")
+            self._controller = Controller(self._broker, self._control)
+            self._controller.run()
+
+    def _control(self, command: bytes, args: List[bytes]) -> bool:
+        """ Handle commands relayed by the broker
+        """
+        if command == BROKER_CANCEL:
+            job_id, grace_period = args
+            if not grace_period:
+                self.broadcast_cancel(job_id.decode())
+                return True
+            return self.cancel_job(job_id.decode(), float(grace_period))
+        if command == BROKER_RESTART:
+            self.restart()
+            return True
+        LOGGER.warning("Unknown control command %s", command)
+        return False
+
+    def start_autoscaler(self, client: _Client):
+        """ Start the autoscaler for the given client
+
+            The autoscaler is started only if the pool is elastic
+        """
+        if self._autoscaler is None and self._target is not None:
+            LOGGER.info("Starting autoscaler (workers: %s-%s)", self._minworkers, self._maxworkers)
+            self._autoscaler = Autoscaler(
+                self._target,
+                client,
+                self._minworkers,
+                self._maxworkers,
+                self._scale_down_delay,
+            )
+            self._autoscaler.run()
 
     @classmethod
-    def _terminate_pool(cls, p: Process):
-        if p and hasattr(p, 'terminate'):
+    def _terminate_pools(cls, pools: Sequence[Process]):
+        for p in pools:
             if p.exitcode is None:
                 p.terminate()
+        for p in pools:
             if p.is_alive():
                 p.join()
 
@@ -83,25 +179,40 @@ class _Server:
         """ Terminate handler
         """
         self._sock.close()
+        if self._controller:
+            self._controller.stop()
+        if self._autoscaler:
+            self._autoscaler.stop()
         if self._supervisor:
             LOGGER.info("Stopping supervisor")
             self._supervisor.stop()
         LOGGER.info("Stopping worker pool")
         self._terminate()
 
-    def broadcast(self, command: bytes):
+    def broadcast(self, command: bytes, *args: bytes):
         """ Broadcast notification to workers
         """
         try:
-            self._sock.send(command, zmq.NOBLOCK)
+            self._sock.send_multipart([command, *args], zmq.NOBLOCK)
         except zmq.ZMQError as err:
             if err.errno != zmq.EAGAIN:
                 LOGGER.error("Broadcast Error %s\n%s", err, traceback.format_exc())
 
     def restart(self):
         """ Send restart command
+
+            In zygote mode, notify the pool process so that
+            a new zygote is initialized.
+
+            In rolling mode, workers are replaced progressively
+            by the pool process.
         """
-        self.broadcast(b'RESTART')
+        if not self._rolling:
+            self.broadcast(BROADCAST_RESTART)
+        if self._zygote or self._rolling:
+            for p in self._pools:
+                if p.exitcode is None:
+                    os.kill(p.pid, signal.SIGHUP)
 
     def kill_worker_busy(self, pid: int) -> bool:
         """ Force kill worker
@@ -111,6 +222,26 @@ class _Server:
         else:
             return False
 
+    def broadcast_cancel(self, job_id: str):
+        """ Request the workers running `job_id` to cancel the job
+        """
+        self.broadcast(BROADCAST_CANCEL, job_id.encode())
+
+    def cancel_job(self, job_id: str, grace_period: float) -> bool:
+        """ Request the workers running `job_id` to cancel the job
+
+            A worker is killed if it is still busy with
+            the job after `grace_period` seconds and does not
+            run other jobs.
+
+            Return False if no worker is running the job
+        """
+        self.broadcast_cancel(job_id)
+        if self._supervisor:
+            return self._supervisor.cancel_job(job_id, grace_period)
+        else:
+            return False
+
 
 def create_poolserver(
     numworkers: int,
@@ -118,21 +249,92 @@ def create_poolserver(
     initializer: Optional[Callable[[None], None]] = None,
     initargs: Sequence = (),
     timeout: int = 20,
+    zygote: bool = False,
+    tags: Optional[Callable[[], Iterable[str]]] = None,
+    minworkers: Optional[int] = None,
+    scale_down_delay: float = 300,
+    subpools: Sequence[SubPool] = (),
+    stall_timeout: float = 0,
+    memlimits: Optional[MemoryLimits] = None,
+    spares: int = 0,
+    rolling: bool = False,
+    router: Optional[str] = None,
+    slots: int = 1,
 ) -> _Server:
     """ Run workers pool in its own process
 
         This ensure that sub-processes all always forked from
         the same parent context
+
+        If `zygote` is True, the initializer is run once in a
+        template process from which workers are forked.
+
+        `tags` is called in workers for reporting the worker's tags
+        to the client.
+
+        If `minworkers` is lower than `numworkers`, the number of workers
+        will be scaled between `minworkers` and `numworkers`: see `start_autoscaler`.
+
+        Each of `subpools` is run in its own process with its own number of
+        workers, lifecycle and timeout. Jobs are sent to a named pool using
+        a client created with the pool name.
+
+        Busy workers that do not report progress for `stall_timeout` seconds
+        are killed by the supervisor.
+
+        Workers exit after a job if their memory exceeds `memlimits`.
+
+        `spares` initialized workers are kept ready for replacing exiting
+        workers. If `rolling` is True, workers are replaced progressively on restart
+        so that the capacity of the pool is preserved.
+
+        `router` is the address workers connect to, default to the local
+        pool address: set it to the address of a standalone broker. The
+        broker then relays job cancellations to the pool server.
+
+        Each worker runs up to `slots` jobs submitted as shared
+        concurrently; other jobs take the whole worker.
     """
     broadcast = _get_ipc('broadcast')
-    router = _get_ipc('pooladdr')
+    broker = router
+    router = router or _get_pool_address()
 
-    p = Process(target=run_worker_pool, args=(router, broadcast, numworkers),
+    if minworkers is not None and minworkers < numworkers:
+        # Shared number of requested workers
+        target = fork_context.Value('i', max(minworkers, 1))
+    else:
+        target = None
+
+    p = fork_context.Process(target=run_worker_pool, args=(router, broadcast, numworkers),
                 kwargs=dict(initializer=initializer, initargs=initargs,
-                            maxcycles=maxcycles))
+                            maxcycles=maxcycles, zygote=zygote, tags=tags,
+                            target=target, timeout=timeout, memlimits=memlimits,
+                            spares=spares, rolling=rolling, slots=slots))
     p.start()
 
-    return _Server(broadcast, p, timeout)
+    processes = []
+    for sp in subpools:
+        LOGGER.info("Creating worker pool '%s'", sp.name)
+        sub = fork_context.Process(target=run_worker_pool, args=(_get_pool_address(sp.name), broadcast, sp.numworkers),
+                      kwargs=dict(initializer=initializer, initargs=initargs,
+                                  maxcycles=sp.maxcycles, zygote=zygote, tags=tags,
+                                  timeout=sp.timeout, memlimits=memlimits,
+                                  spares=spares, rolling=rolling, slots=slots))
+        sub.start()
+        processes.append(sub)
+
+    return _Server(
+        broadcast, p, timeout,
+        subpools=processes,
+        zygote=zygote,
+        target=target,
+        minworkers=max(minworkers or 0, 1),
+        maxworkers=numworkers,
+        scale_down_delay=scale_down_delay,
+        stall_timeout=stall_timeout,
+        rolling=rolling,
+        broker=broker,
+    )
 
 
 def run_worker_pool(
@@ -142,6 +344,14 @@ def run_worker_pool(
     initializer: Optional[Callable[[None], None]] = None,
     initargs: Sequence = (),
     maxcycles: Optional[int] = None,
+    zygote: bool = False,
+    tags: Optional[Callable[[], Iterable[str]]] = None,
+    target: Optional[Synchronized] = None,
+    timeout: Optional[int] = None,
+    memlimits: Optional[MemoryLimits] = None,
+    spares: int = 0,
+    rolling: bool = False,
+    slots: int = 1,
 ):
     """ Run a qgis worker pool
 
@@ -154,9 +364,25 @@ def run_worker_pool(
 
     LOGGER.info("Starting worker pool")
 
-    pool = Pool(router, broadcastaddr, numworkers,
-                initializer=initializer, initargs=initargs,
-                maxcycles=maxcycles)
+    if zygote:
+        pool = ZygotePool(router, broadcastaddr, numworkers,
+                          initializer=initializer, initargs=initargs,
+                          maxcycles=maxcycles, tags=tags, target=target,
+                          timeout=timeout, memlimits=memlimits,
+                          spares=spares, rolling=rolling, slots=slots)
+    else:
+        pool = Pool(router, broadcastaddr, numworkers,
+                    initializer=initializer, initargs=initargs,
+                    maxcycles=maxcycles, tags=tags, target=target,
+                    timeout=timeout, memlimits=memlimits,
+                    spares=spares, slots=slots)
+
+    if zygote or rolling:
+        # Handle restart request
+        def hup_signal(signum, frames):
+            pool.restart()
+
+        signal.signal(signal.SIGHUP, hup_signal)
 
     # Handle critical failure by sending ABORT to
     # parent process
@@ -16,9 +16,11 @@
 import asyncio
 import logging
 import os
+import threading
+import time
 import traceback
 
-from typing import Callable
+from typing import Callable, Dict, Optional, Set, Tuple
 
 import zmq
 import zmq.asyncio
@@ -27,11 +29,17 @@ from .utils import _get_ipc
 
 LOGGER = logging.getLogger('SRVLOG')
 
+# Min interval in seconds between progress notifications
+PROGRESS_INTERVAL = 1.0
+
 
 class Client:
 
-    def __init__(self):
+    def __init__(self, timeout: Optional[int] = None):
         """ Supervised client notifier
+
+            :param timeout: timeout in seconds sent with 'busy' notification,
+                            if not set, the supervisor timeout is used.
         """
         address = _get_ipc('supervisor')
 
@@ -40,28 +48,57 @@ class Client:
         self._sock.setsockopt(zmq.IMMEDIATE, 1)  # Do no queue if no connection
         self._sock.connect(address)
         self._pid = os.getpid()
-        self._busy = False
+        self._busy: Set[bytes] = set()
+        self._timeout = timeout
+        self._last_progress = 0.
+        # Notifications may be sent from shared jobs threads
+        self._lock = threading.Lock()
+        self._send_lock = threading.Lock()
 
-    def _send(self, data: bytes):
+    def _send(self, *data: bytes):
         try:
-            self._sock.send_multipart([str(self._pid).encode(), data], flags=zmq.DONTWAIT)
+            with self._send_lock:
+                self._sock.send_multipart([str(self._pid).encode(), *data], flags=zmq.DONTWAIT)
         except zmq.ZMQError as err:
             if err.errno != zmq.EAGAIN:
                 LOGGER.error("%s (%s)", zmq.strerror(err.errno), err.errno)
 
-    def notify_done(self):
-        """ Send 'ready' notification
+    def notify_done(self, key: bytes):
+        """ Send 'done' notification for the job `key`
         """
-        if self._busy:
-            self._busy = False
-            self._send(b'DONE')
+        with self._lock:
+            if key not in self._busy:
+                return
+            self._busy.discard(key)
+        self._send(b'DONE', key)
+
+    def notify_busy(self, key: bytes, timeout: Optional[float] = None, job_id: Optional[str] = None):
+        """ send 'busy' notification for the job `key`
 
-    def notify_busy(self):
-        """ send 'busy' notification
+            :param timeout: the job timeout, bounded by the client timeout
+            :param job_id: the identifier of the job, used for cancelling
         """
-        if not self._busy:
-            self._busy = True
-            self._send(b'BUSY')
+        with self._lock:
+            if key in self._busy:
+                return
+            self._busy.add(key)
+        if timeout and self._timeout:
+            timeout = min(timeout, self._timeout)
+        else:
+            timeout = timeout or self._timeout
+        self._send(b'BUSY', key, str(timeout or '').encode(), (job_id or '').encode())
+
+    def notify_progress(self):
+        """ Send 'progress' notification
+
+            Notifications are sent at most every `PROGRESS_INTERVAL`
+            seconds.
+        """
+        if self._busy:
+            now = time.monotonic()
+            if now - self._last_progress >= PROGRESS_INTERVAL:
+                self._last_progress = now
+                self._send(b'PROGRESS')
 
     def close(self):
         self._sock.close()
@@ -69,10 +106,12 @@ class Client:
 
 class Supervisor:
 
-    def __init__(self, timeout: int, killfunc: Callable[[int], None]):
+    def __init__(self, timeout: int, killfunc: Callable[[int], None], stall_timeout: float = 0):
         """ Run supervisor
 
             :param timeout: timeout delay in seconds
+            :param stall_timeout: delay in seconds without progress notification
+                   before killing a busy worker, 0 to disable.
         """
         address = _get_ipc('supervisor')
 
@@ -82,7 +121,10 @@ class Supervisor:
         self._sock.bind(address)
 
         self._timeout = timeout
-        self._busy = {}
+        self._stall_timeout = stall_timeout
+        # Running jobs of workers: job key -> (job id, timeout handle)
+        self._busy: Dict[int, Dict[bytes, Tuple[str, asyncio.TimerHandle]]] = {}
+        self._stalled: Dict[int, asyncio.TimerHandle] = {}
         self._stopped = True
         self._killfunc = killfunc
         self._task = None
@@ -91,13 +133,62 @@ class Supervisor:
         self._task = asyncio.ensure_future(self._run_async())
 
     def kill_worker_busy(self, pid: int) -> bool:
-        """ Kill job  if in BUSY state
+        """ Kill worker if in BUSY state
+
+            Note that all the jobs running in the
+            worker are lost.
         """
         if pid in self._busy:
             LOGGER.info("Process dismissal requested for pid = %s", pid)
-            del self._busy[pid]
-            self._killfunc(pid)
+            self._kill(pid)
             return True
+        return False
+
+    def cancel_job(self, job_id: str, delay: float) -> bool:
+        """ Kill the workers still running the job `job_id`
+            after `delay` seconds
+
+            Workers running other jobs are not killed: the job
+            is left to its timeout.
+
+            Return False if no worker is running the job
+        """
+        keys = [(pid, key) for pid, jobs in self._busy.items() for key, (ident, _) in jobs.items() if ident == job_id]
+        if not keys:
+            return False
+        LOGGER.info("Job %s dismissal requested in %ss", job_id, delay)
+        loop = asyncio.get_running_loop()
+        for pid, key in keys:
+            loop.call_later(delay, self._kill_if_busy, pid, key)
+        return True
+
+    def _kill_if_busy(self, pid: int, key: bytes):
+        jobs = self._busy.get(pid, {})
+        if key not in jobs:
+            # Job is done
+            return
+        job_id = jobs[key][0]
+        if any(ident != job_id for ident, _ in jobs.values()):
+            LOGGER.warning("Job %s not responding to cancel: process %s is running other jobs", job_id, pid)
+            return
+        LOGGER.warning("Killing process %s not responding to cancel", pid)
+        self._kill(pid)
+
+    def _kill(self, pid: int):
+        self._release(pid)
+        self._killfunc(pid)
+
+    def _release(self, pid: int):
+        """ Cancel timers for pid
+        """
+        for _, handle in self._busy.pop(pid, {}).values():
+            handle.cancel()
+        self._release_stalled(pid)
+
+    def _release_stalled(self, pid: int):
+        handle = self._stalled.pop(pid, None)
+        if handle:
+            handle.cancel()
 
     async def _run_async(self):
         """ Run supervisor
@@ -105,23 +196,45 @@ class Supervisor:
         loop = asyncio.get_running_loop()
 
         def kill(pid: int):
+            # Other jobs running in the worker are lost
             LOGGER.critical("Killing stalled process %s", pid)
-            del self._busy[pid]
-            self._killfunc(pid)
+            self._kill(pid)
+
+        def kill_stalled(pid: int):
+            LOGGER.critical("Killing process %s: no progress for %ss", pid, self._stall_timeout)
+            self._kill(pid)
+
+        def watch_progress(pid: int):
+            handle = self._stalled.pop(pid, None)
+            if handle:
+                handle.cancel()
+            self._stalled[pid] = loop.call_later(self._stall_timeout, kill_stalled, pid)
 
         self._stopped = False
 
         while not self._stopped:
             try:
-                pid, notif = await self._sock.recv_multipart()
+                pid, notif, *rest = await self._sock.recv_multipart()
                 pid = int(pid)
                 if notif == b'BUSY':
-                    self._busy[pid] = loop.call_later(self._timeout, kill, pid)
+                    # Each job has its own timeout
+                    key, timeout, job_id = rest
+                    timeout = float(timeout) if timeout else self._timeout
+                    jobs = self._busy.setdefault(pid, {})
+                    jobs[key] = (job_id.decode(), loop.call_later(timeout, kill, pid))
+                    if self._stall_timeout and len(jobs) == 1:
+                        watch_progress(pid)
+                elif notif == b'PROGRESS':
+                    if pid in self._stalled:
+                        watch_progress(pid)
                 elif notif == b'DONE':
-                    try:
-                        self._busy.pop(pid).cancel()
-                    except KeyError:
-                        pass
+                    jobs = self._busy.get(pid, {})
+                    job = jobs.pop(rest[0], None)
+                    if job:
+                        job[1].cancel()
+                    if not jobs:
+                        # Worker is idle
+                        self._release(pid)
             except zmq.ZMQError as err:
                 if err.errno != zmq.EAGAIN:
                     LOGGER.error("%s\n%s", zmq.strerror(err.errno), traceback.format_exc())
@@ -138,6 +251,8 @@ class Supervisor:
             self._task.cancel()
         self._stopped = True
         self._sock.close()
-        for th in self._busy.values():
+        for pid in list(self._busy):
+            self._release(pid)
+        for th in self._stalled.values():
             th.cancel()
-        self._busy.clear()
+        self._stalled.clear()
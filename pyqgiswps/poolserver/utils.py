@@ -9,12 +9,20 @@
 """ Pool server utilities
 """
 
+import multiprocessing
 import os
+import pickle
 
 from tempfile import gettempdir
+from typing import Any, List, Optional, Sequence
 
 _pid = os.getpid()
 
+# Pool processes must be forked: zygote workers inherit the
+# initialized Qgis state and ipc addresses depend on the parent pid.
+# Do not rely on the platform default start method.
+fork_context = multiprocessing.get_context('fork')
+
 
 def _get_ipc(name: str) -> str:
     ipc_path = f'{gettempdir()}/qgswps/{name}_{_pid}'
@@ -22,5 +30,70 @@ def _get_ipc(name: str) -> str:
     return f'ipc://{ipc_path}'
 
 
+def _get_pool_address(name: Optional[str] = None) -> str:
+    """ Return the router address for the named pool
+    """
+    return _get_ipc(f'pooladdr_{name}' if name else 'pooladdr')
+
+
 WORKER_READY = b"ready"
 WORKER_DONE = b"done"
+WORKER_INFO = b"info"
+WORKER_RETIRE = b"retire"
+
+# Broadcast commands
+BROADCAST_RESTART = b"RESTART"
+BROADCAST_CANCEL = b"CANCEL"
+
+# Broker requests
+BROKER_JOB = b"job"
+BROKER_CANCEL = b"cancel"
+BROKER_RESTART = b"restart"
+
+# Broker replies
+BROKER_OK = b"ok"
+BROKER_BUSY = b"busy"
+BROKER_QUEUE_TIMEOUT = b"queuetimeout"
+BROKER_TIMEOUT = b"timeout"
+BROKER_CANCELLED = b"cancelled"
+BROKER_ERROR = b"error"
+
+# Registration and replies of pool processes
+# connected to a broker
+POOL_CONTROL = b"control"
+
+# Interval in seconds between pool processes registrations
+CONTROL_HEARTBEAT = 5.
+# Time in seconds waited for pool processes replies
+CONTROL_TIMEOUT = 5.
+
+
+class OutOfBandBytes(bytes):
+    """ Bytes sent out-of-band
+
+        Data wrapped in `OutOfBandBytes` are not copied in the pickled
+        message but sent as separate message frames (pickle protocol 5).
+        They are unpickled as plain `bytes`.
+    """
+
+    def __reduce_ex__(self, protocol):
+        if protocol >= 5:
+            return bytes, (pickle.PickleBuffer(self),)
+        return bytes, (bytes(self),)
+
+
+def pack(obj: Any) -> List[Any]:
+    """ Pickle `obj` as message frames
+
+        The first frame holds the pickled data and the
+        following frames hold the out-of-band buffers.
+    """
+    buffers = []
+    data = pickle.dumps(obj, protocol=5, buffer_callback=buffers.append)
+    return [data, *(b.raw() for b in buffers)]
+
+
+def unpack(frames: Sequence[Any]) -> Any:
+    """ Unpickle message frames created with `pack`
+    """
+    return pickle.loads(frames[0], buffers=frames[1:])
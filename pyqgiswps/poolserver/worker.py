@@ -8,19 +8,146 @@
 #
 
 import logging
-import pickle
+import queue
+import signal
+import threading
+import time
 import traceback
 import uuid
 
-from typing import Callable, Optional, Sequence
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from multiprocessing.synchronize import Event
+from typing import Callable, Dict, Iterable, Iterator, List, NamedTuple, Optional, Sequence
 
+import psutil
 import zmq
 
 from .supervisor import Client as SupervisorClient
-from .utils import WORKER_DONE, WORKER_READY
+from .utils import (
+    BROADCAST_CANCEL,
+    BROADCAST_RESTART,
+    WORKER_DONE,
+    WORKER_INFO,
+    WORKER_READY,
+    WORKER_RETIRE,
+    pack,
+    unpack,
+)
 
 LOGGER = logging.getLogger('SRVLOG')
 
+# Time in ms for receiving jobs sent before
+# the client is notified that the worker is leaving
+DRAIN_TIMEOUT = 500
+
+# Time in ms between checks of shared jobs completion
+SHARED_POLL_INTERVAL = 20
+
+
+class MemoryLimits(NamedTuple):
+    """ Worker memory limits in Mb, 0 for no limit
+    """
+    max_rss: int = 0      # Max resident memory
+    max_growth: int = 0   # Max resident memory growth since the worker has started
+
+    def exceeded(self, rss: int, start_rss: int) -> bool:
+        mb = 1024 * 1024
+        return bool(
+            (self.max_rss and rss > self.max_rss * mb)
+            or (self.max_growth and rss - start_rss > self.max_growth * mb),
+        )
+
+
+# Worker tags notifier, set when running in a worker
+_notify_info = None
+
+# Job progress notifier, set when running in a worker
+_notify_progress = None
+
+# Cancel handlers of the running jobs
+_cancel_lock = threading.Lock()
+_cancel_handlers: Dict[bytes, Callable[[], None]] = {}
+
+
+def notify_worker_info():
+    """ Notify the pool client that the worker tags have changed
+
+        May be called from jobs, this is a no-op if we are not
+        running in a pool worker.
+    """
+    if _notify_info is not None:
+        _notify_info()
+
+
+def notify_progress():
+    """ Notify the supervisor that the running job is making progress
+
+        May be called from jobs, this is a no-op if we are not
+        running in a pool worker.
+    """
+    if _notify_progress is not None:
+        _notify_progress()
+
+
+@contextmanager
+def cancel_handler(job_id: str, callback: Callable[[], None]) -> Iterator[None]:
+    """ Register `callback` to be called when the job
+        `job_id` is cancelled
+
+        The callback is called from a listener thread.
+    """
+    key = job_id.encode()
+    with _cancel_lock:
+        _cancel_handlers[key] = callback
+    try:
+        yield
+    finally:
+        with _cancel_lock:
+            _cancel_handlers.pop(key, None)
+
+
+def _cancel_job(job_id: bytes):
+    with _cancel_lock:
+        callback = _cancel_handlers.get(job_id)
+        if callback is None:
+            return
+    LOGGER.info("CANCEL notification received for job %s", job_id.decode())
+    try:
+        callback()
+    except Exception:
+        LOGGER.error("Cancel handler failed:\n%s", traceback.format_exc())
+
+
+def cancel_listener(broadcastaddr: str) -> Callable[[], None]:
+    """ Listen for cancel notifications in a thread
+
+        Return a function that stop the listener
+    """
+    stopped = threading.Event()
+
+    def run():
+        sub = broadcast_socket(zmq.Context.instance(), broadcastaddr, BROADCAST_CANCEL)
+        try:
+            while not stopped.is_set():
+                if sub.poll(500):
+                    _, job_id = sub.recv_multipart()
+                    _cancel_job(job_id)
+        except Exception:
+            LOGGER.error("Cancel listener error:\n%s", traceback.format_exc())
+        finally:
+            sub.close()
+
+    th = threading.Thread(target=run, name="CancelListener", daemon=True)
+    th.start()
+
+    def stop():
+        stopped.set()
+        th.join()
+
+    return stop
+
 
 def dealer_socket(ctx: zmq.Context, address: str) -> zmq.Socket:
     """ Socket for receiving incoming messages
@@ -37,14 +164,18 @@ def dealer_socket(ctx: zmq.Context, address: str) -> zmq.Socket:
     return sock
 
 
-def broadcast_socket(ctx: zmq.Context, broadcastaddr: str) -> zmq.Socket:
+def broadcast_socket(
+    ctx: zmq.Context,
+    broadcastaddr: str,
+    command: bytes = BROADCAST_RESTART,
+) -> zmq.Socket:
     """ Socket for receiving broadcast message notifications
     """
     LOGGER.debug("Enabling broadcast notification")
     ctx = zmq.Context.instance()
     sub = ctx.socket(zmq.SUB)
     sub.setsockopt(zmq.LINGER, 500)    # Needed for socket no to wait on close
-    sub.setsockopt(zmq.SUBSCRIBE, b'RESTART')
+    sub.setsockopt(zmq.SUBSCRIBE, command)
     sub.connect(broadcastaddr)
     return sub
 
@@ -55,65 +186,267 @@ def worker_handler(
     maxcycles: Optional[int] = None,
     initializer: Optional[Callable[[None], None]] = None,
     initargs: Sequence = (),
+    tags: Optional[Callable[[], Iterable[str]]] = None,
+    timeout: Optional[int] = None,
+    memlimits: Optional[MemoryLimits] = None,
+    ready: Optional[Event] = None,
+    activate: Optional[Event] = None,
+    slots: int = 1,
 ):
     """ Run jobs
+
+        `tags` is a callable returning the worker tags (i.e the cached
+        projects) that are reported to the client for affinity routing.
+
+        `timeout` is the max execution time of jobs reported to the supervisor,
+        the job's own timeout is used if lower.
+
+        If `memlimits` is set, the worker exit after a job if its memory
+        exceeds the limits, `maxcycles` is then used as a safety net.
+
+        `ready` is set once the worker is initialized. If `activate` is set,
+        the worker wait for the event before accepting jobs: this allows to
+        keep initialized spare workers.
+
+        The worker advertises `slots` credits to the client: shared jobs
+        take one credit and are run concurrently in threads, other jobs
+        take all credits and are run in the main thread.
+
+        On SIGHUP, the worker exits gracefully once the running job is done.
     """
+    global _notify_info
+    global _notify_progress
+
     ctx = zmq.Context.instance()
 
     sock = dealer_socket(ctx, router)
     sub = broadcast_socket(ctx, broadcastaddr)
+    stop_cancel_listener = cancel_listener(broadcastaddr)
 
     # Initialize supervisor client
-    supervisor = SupervisorClient()
+    supervisor = SupervisorClient(timeout)
+
+    # Graceful stop requested by the pool
+    stopping = False
+
+    def stop_signal(signum, frames):
+        nonlocal stopping
+        stopping = True
+
+    signal.signal(signal.SIGHUP, stop_signal)
 
     if initializer is not None:
         initializer(*initargs)
 
+    process = psutil.Process()
+    start_rss = process.memory_info().rss
+
+    def memory_exceeded() -> bool:
+        if not memlimits:
+            return False
+        rss = process.memory_info().rss
+        if memlimits.exceeded(rss, start_rss):
+            LOGGER.info(
+                "Worker memory limits exceeded: rss=%.3fMb start=%.3fMb",
+                rss / 1024 / 1024,
+                start_rss / 1024 / 1024,
+            )
+            return True
+        return False
+
+    received = 0
+
     def get():
-        corr_id, rest = sock.recv_multipart()
+        nonlocal received
+        corr_id, *rest = sock.recv_multipart()
+        if corr_id == WORKER_RETIRE:
+            return None
         LOGGER.debug("RCV %s", corr_id)
-        return corr_id, pickle.loads(rest)
+        received += 1
+        # Job timeout, shared flag and job id, followed by the job frames
+        job_timeout, shared, job_id, *frames = rest
+        return corr_id, unpack(frames), float(job_timeout), shared == b'1', job_id.decode()
 
     def set(corr_id, res):
         LOGGER.debug("SND %s", corr_id)
-        sock.send_multipart([corr_id, pickle.dumps(res)])
+        sock.send_multipart([corr_id, *pack(res)], copy=False)
+
+    def get_tags() -> List[bytes]:
+        if tags is None:
+            return []
+        try:
+            return [t.encode() for t in tags()]
+        except Exception:
+            LOGGER.error("Failed to get worker tags:\n%s", traceback.format_exc())
+            return []
+
+    def notify_info():
+        if threading.current_thread() is not threading.main_thread():
+            # Tags are sent with the next ready notification
+            return
+        try:
+            sock.send_multipart([WORKER_INFO, *get_tags()], flags=zmq.NOBLOCK)
+        except zmq.error.Again:
+            pass
+
+    _notify_info = notify_info
+    _notify_progress = supervisor.notify_progress
+
+    def call(func, args, kwargs):
+        try:
+            return (True, func(*args, **kwargs))
+        except Exception as exc:
+            LOGGER.error(
+                "Worker exception: >>>>>>>>>>\n%s<<<<<<<<<<",
+                traceback.format_exc(),
+            )
+            return (False, exc)
+
+    def run_job(msg):
+        corr_id, (func, args, kwargs), job_timeout, _, job_id = msg
+        supervisor.notify_busy(corr_id, job_timeout, job_id)
+        result = call(func, args, kwargs)
+        supervisor.notify_done(corr_id)
+        set(corr_id, result)
+
+    # Shared jobs run in threads, results are
+    # sent from the main thread
+    executor = ThreadPoolExecutor(slots, thread_name_prefix="SharedJob") if slots > 1 else None
+    results: queue.Queue = queue.Queue()
+    pending = deque()
+    running = 0
+
+    def run_shared(msg):
+        nonlocal running
+        corr_id, (func, args, kwargs), job_timeout, _, job_id = msg
+        # The supervisor watches each job
+        supervisor.notify_busy(corr_id, job_timeout, job_id)
+        running += 1
+        executor.submit(lambda: results.put((corr_id, call(func, args, kwargs))))
+
+    def collect_shared() -> int:
+        nonlocal running
+        done = 0
+        while True:
+            try:
+                corr_id, result = results.get_nowait()
+            except queue.Empty:
+                break
+            supervisor.notify_done(corr_id)
+            set(corr_id, result)
+            running -= 1
+            done += 1
+        return done
+
+    def start_jobs() -> int:
+        """ Start pending jobs, return the number
+            of jobs run in the main thread
+        """
+        done = 0
+        while pending:
+            shared = pending[0][3] and executor is not None
+            if shared and running < slots:
+                run_shared(pending.popleft())
+            elif not shared and not running:
+                run_job(pending.popleft())
+                done += 1
+            else:
+                # Wait for running jobs
+                break
+        return done
+
+    def send_ready():
+        # The client deduces the jobs sent but not yet
+        # received from the number of received jobs
+        credits = slots - running if not pending else 0
+        sock.send_multipart([WORKER_READY, b'%d' % credits, b'%d' % slots, b'%d' % received, *get_tags()])
+
+    def restart_received() -> bool:
+        # Handle broadcast restart
+        try:
+            if broadcastaddr and sub.recv(flags=zmq.NOBLOCK) == BROADCAST_RESTART:
+                LOGGER.info("RESTART notification received")
+                return True
+        except zmq.error.Again:
+            pass
+        return False
+
+    def wait_activation() -> bool:
+        # Spare worker: wait until the pool activate us
+        if activate is not None:
+            while not activate.wait(1.0):
+                if stopping or restart_received():
+                    return False
+        return True
+
+    if ready is not None:
+        ready.set()
 
     try:
         LOGGER.debug("Starting ZMQ worker loop")
         completed = 0
-        while maxcycles is None or (maxcycles and completed < maxcycles):
-            sock.send(WORKER_READY)
+        drain = False
+        advertise = True
+        active = wait_activation()
+        while active and (maxcycles is None or (maxcycles and completed < maxcycles)):
+            if advertise:
+                send_ready()
             try:
-                jobid, (func, args, kwargs) = get()
-                supervisor.notify_busy()
-                try:
-                    result = (True, func(*args, **kwargs))
-                except Exception as exc:
-                    LOGGER.error(
-                        "Worker exception: >>>>>>>>>>\n%s<<<<<<<<<<",
-                        traceback.format_exc(),
-                    )
-                    result = (False, exc)
-                supervisor.notify_done()
-                set(jobid, result)
-                completed += 1
+                # Heartbeat when idle, check for shared
+                # jobs completion otherwise
+                if sock.poll(SHARED_POLL_INTERVAL if running else 1000):
+                    msg = get()
+                    if msg is None:
+                        # Pool is scaling down
+                        LOGGER.info("RETIRE notification received")
+                        break
+                    pending.append(msg)
+                    advertise = False
+                else:
+                    advertise = not running
+                done = collect_shared() + start_jobs()
+                if done:
+                    completed += done
+                    advertise = True
+                    if not running and memory_exceeded():
+                        break
             except zmq.error.Again:
                 pass
 
-            jobid = func = args = kwargs = None
-            # Handle broadcast restart
-            try:
-                if broadcastaddr and sub.recv(flags=zmq.NOBLOCK) == b'RESTART':
-                    # There is no really way to restart
-                    # so exit and let the framework restart a new worker
-                    LOGGER.info("RESTART notification received")
-                    sock.send(WORKER_DONE)
-                    break
-            except zmq.error.Again:
-                pass
+            msg = None
+            if stopping or restart_received():
+                # There is no really way to restart
+                # so exit and let the framework restart a new worker
+                drain = True
+                break
+        # Notify that we are leaving, the send queue may
+        # still hold the last response
+        sock.setsockopt(zmq.SNDTIMEO, 1000)
+        sock.send(WORKER_DONE)
+        if drain:
+            # Run jobs sent before the client has been notified
+            while sock.poll(DRAIN_TIMEOUT):
+                msg = get()
+                if msg is not None:
+                    pending.append(msg)
+        # Complete the received and running jobs
+        while pending or running:
+            collect_shared()
+            start_jobs()
+            if running:
+                time.sleep(SHARED_POLL_INTERVAL / 1000)
     except (KeyboardInterrupt, SystemExit):
         pass
+    except zmq.error.Again:
+        pass
+
+    if executor is not None:
+        executor.shutdown(wait=False, cancel_futures=True)
+
+    _notify_info = None
+    _notify_progress = None
 
+    stop_cancel_listener()
     sub.close()
     sock.close()
     LOGGER.info("Terminating Worker")
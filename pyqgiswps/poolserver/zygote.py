@@ -0,0 +1,261 @@
+#
+# Copyright 2026 3liz
+# Author: David Marteau
+#
+# This Source Code Form is subject to the terms of the Mozilla Public
+# License, v. 2.0. If a copy of the MPL was not distributed with this
+# file, You can obtain one at http://mozilla.org/MPL/2.0/.
+
+""" Zygote pool
+
+    The zygote is a template process that run the worker initializer
+    once (i.e start Qgis and load providers). Workers are then forked
+    from the zygote and inherit the initialized state copy-on-write.
+
+    On restart, a new zygote is created - so that providers are reloaded -
+    while the old one is retired once all its workers have exited.
+
+    With rolling restart, the old zygote is retired only when the new
+    one is ready.
+"""
+import logging
+import os
+import signal
+import time
+
+from multiprocessing.sharedctypes import Synchronized
+from multiprocessing.util import Finalize
+from typing import Callable, Iterable, List, Optional, Sequence
+
+from .pool import EARLY_FAILURE_DELAY, Pool
+from .utils import fork_context
+from .worker import MemoryLimits
+
+LOGGER = logging.getLogger('SRVLOG')
+
+
+class Zygote(fork_context.Process):
+    """ Template process for workers
+    """
+
+    def __init__(
+        self,
+        router: str,
+        broadcastaddr: str,
+        numworkers: int,
+        initializer: Optional[Callable[[None], None]] = None,
+        initargs: Sequence = (),
+        maxcycles: Optional[int] = None,
+        tags: Optional[Callable[[], Iterable[str]]] = None,
+        target: Optional[Synchronized] = None,
+        timeout: Optional[int] = None,
+        memlimits: Optional[MemoryLimits] = None,
+        spares: int = 0,
+        slots: int = 1,
+    ):
+        super().__init__()
+        self.name = self.name.replace('Process', 'PoolZygote')
+        self.ready = fork_context.Event()
+        self.retiring = False
+        self.start_time = time.time()
+
+        self._router = router
+        self._broadcastaddr = broadcastaddr
+        self._num_workers = numworkers
+        self._initializer = initializer
+        self._initargs = initargs
+        self._maxcycles = maxcycles
+        self._tags = tags
+        self._target = target
+        self._timeout = timeout
+        self._memlimits = memlimits
+        self._spares = spares
+        self._slots = slots
+
+    def retire(self):
+        """ Notify the zygote to stop spawning workers
+        """
+        if not self.retiring and self.exitcode is None:
+            self.retiring = True
+            os.kill(self.pid, signal.SIGHUP)
+
+    def run(self):
+        """ Initialize the template and run the workers pool
+        """
+        retiring = False
+
+        def term_signal(signum, frames):
+            raise SystemExit()
+
+        def hup_signal(signum, frames):
+            nonlocal retiring
+            retiring = True
+
+        signal.signal(signal.SIGTERM, term_signal)
+        signal.signal(signal.SIGHUP, hup_signal)
+
+        LOGGER.info("Initializing pool zygote")
+        if self._initializer is not None:
+            self._initializer(*self._initargs)
+
+        # Workers are forked from this process, there is
+        # no need to run the initializer again
+        pool = Pool(self._router, self._broadcastaddr, self._num_workers,
+                    maxcycles=self._maxcycles, tags=self._tags,
+                    target=self._target, timeout=self._timeout,
+                    memlimits=self._memlimits, spares=self._spares,
+                    slots=self._slots)
+
+        self.ready.set()
+        try:
+            while True:
+                if retiring:
+                    pool.retire()
+                pool.maintain_pool()
+                if pool.retired:
+                    LOGGER.info("Pool zygote retired")
+                    break
+                time.sleep(0.1)
+        except (KeyboardInterrupt, SystemExit):
+            pass
+        finally:
+            pool.terminate()
+
+
+class ZygotePool:
+    """ Manage zygote processes
+
+        Expose the same interface as `Pool`
+    """
+
+    def __init__(
+        self, router: str,
+        broadcastaddr: str,
+        numworkers: int,
+        initializer: Optional[Callable[[None], None]] = None,
+        initargs: Sequence = (),
+        maxcycles: Optional[int] = None,
+        tags: Optional[Callable[[], Iterable[str]]] = None,
+        target: Optional[Synchronized] = None,
+        timeout: Optional[int] = None,
+        memlimits: Optional[MemoryLimits] = None,
+        spares: int = 0,
+        rolling: bool = False,
+        slots: int = 1,
+    ):
+        self.critical_failure = False
+
+        self._router = router
+        self._broadcastaddr = broadcastaddr
+        self._num_workers = numworkers
+        self._initializer = initializer
+        self._initargs = initargs
+        self._maxcycles = maxcycles
+        self._tags = tags
+        self._target = target
+        self._timeout = timeout
+        self._memlimits = memlimits
+        self._spares = spares
+        self._rolling = rolling
+        self._slots = slots
+        self._restart = False
+
+        self._zygote = None
+        self._previous = None
+        self._retired: List[Zygote] = []
+
+        self._terminate = Finalize(
+            self, self._terminate_zygotes,
+            args=(self._retired,),
+            exitpriority=15,
+        )
+
+        self._start_zygote()
+
+    def _start_zygote(self):
+        self._zygote = Zygote(
+            self._router,
+            self._broadcastaddr,
+            self._num_workers,
+            initializer=self._initializer,
+            initargs=self._initargs,
+            maxcycles=self._maxcycles,
+            tags=self._tags,
+            target=self._target,
+            timeout=self._timeout,
+            memlimits=self._memlimits,
+            spares=self._spares,
+            slots=self._slots,
+        )
+        self._zygote.start()
+        # Keep track of running zygotes for termination
+        self._retired.append(self._zygote)
+
+    def restart(self):
+        """ Request a new zygote
+
+            Note: this is called from signal handler
+        """
+        self._restart = True
+
+    def _join_exited_zygotes(self):
+        for i in reversed(range(len(self._retired))):
+            z = self._retired[i]
+            if z.exitcode is None:
+                continue
+            if z.exitcode != 0 and not z.retiring:
+                LOGGER.warning("Pool zygote exited with code %s", z.exitcode)
+                # Early failure of the zygote or the workers: abort
+                early = time.time() - z.start_time < EARLY_FAILURE_DELAY
+                if early or not z.ready.is_set() or z.exitcode == -signal.SIGABRT:
+                    LOGGER.critical("Critical zygote failure. Aborting...")
+                    self.critical_failure = True
+                    os.kill(os.getpid(), signal.SIGABRT)
+            z.join()
+            del self._retired[i]
+            if z is self._zygote:
+                self._zygote = None
+            if z is self._previous:
+                self._previous = None
+
+    def maintain_pool(self):
+        """ Handle restart and zygote failures
+        """
+        if self._restart:
+            self._restart = False
+            LOGGER.info("Restarting pool zygote")
+            if self._zygote:
+                if self._rolling:
+                    # Keep the old zygote until the new one is ready
+                    if self._previous:
+                        self._previous.retire()
+                    self._previous = self._zygote
+                else:
+                    self._zygote.retire()
+                self._zygote = None
+
+        self._join_exited_zygotes()
+
+        if self._previous and self._zygote and self._zygote.ready.is_set():
+            self._previous.retire()
+            self._previous = None
+
+        if self._zygote is None and not self.critical_failure:
+            self._start_zygote()
+
+    @classmethod
+    def _terminate_zygotes(cls, zygotes: List[Zygote]):
+        for z in zygotes:
+            if z.exitcode is None:
+                z.terminate()
+        for z in zygotes:
+            if z.is_alive():
+                z.join()
+
+    def __reduce__(self):
+        raise NotImplementedError(
+            'Pool objects cannot be passed between processes or pickled',
+        )
+
+    def terminate(self):
+        self._terminate()
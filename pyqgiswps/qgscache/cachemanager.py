@@ -16,6 +16,7 @@ from datetime import datetime
 from functools import partial
 from typing import (
     Callable,
+    Iterator,
     NamedTuple,
     Optional,
     Sequence,
@@ -165,6 +166,11 @@ class QgsCacheManager:
         """
         self._cache.clear()
 
+    def keys(self) -> Iterator[str]:
+        """ Return the keys of cached entries
+        """
+        return self._cache.keys()
+
     def remove_entry(self, key: str):
         """ Remove cache entry
         """
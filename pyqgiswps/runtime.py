@@ -20,6 +20,7 @@ from tornado.web import StaticFileHandler
 from .accesspolicy import init_access_policy, new_access_policy
 from .config import confservice, get_size_bytes
 from .handlers import (
+    BatchExecuteHandler,
     ConformanceHandler,
     DownloadHandler,
     ExecuteHandler,
@@ -34,6 +35,7 @@ from .handlers import (
     ServerInfosHandler,
     StatusHandler,
     StoreHandler,
+    WorkflowExecuteHandler,
 )
 from .logger import log_request
 
@@ -85,6 +87,8 @@ def configure_handlers():
         # /processes
         #
         (r"/processes/([^/]+)/execution", ExecuteHandler, ogcapi_init_args),
+        (r"/processes/([^/]+)/execution:batch", BatchExecuteHandler, ogcapi_init_args),
+        (r"/processes/([^/]+)/execution:workflow", WorkflowExecuteHandler, ogcapi_init_args),
         (r"/processes/([^/]+)", ProcessHandler, ogcapi_init_args),
         (r"/processes/?", ProcessHandler, ogcapi_init_args),
 
@@ -187,11 +191,12 @@ def initialize_middleware(app, filters=None):
     return router
 
 
-def run_server(port, address=None, user=None):
+def run_server(port, address=None, user=None, frontends=1):
     """ Run the server
-    """
-    from tornado.httpserver import HTTPServer
 
+        With `frontends` > 1, run several HTTP front-end processes
+        sharing the listening sockets and the worker pool.
+    """
     if user:
         setuid(user)
 
@@ -207,6 +212,22 @@ def run_server(port, address=None, user=None):
         LOGGER.info("Proxy configuration enabled")
         kwargs['xheaders'] = True
 
+    LOGGER.info("Running WPS server on port %s:%s", address, port)
+
+    if frontends > 1:
+        run_frontends(port, address, frontends, kwargs)
+    else:
+        _serve(lambda server: server.listen(port, address=address), kwargs)
+
+
+def _serve(listen, kwargs):
+    """ Run the HTTP server
+
+        `listen` is called with the HTTP server for
+        setting up the listening sockets
+    """
+    from tornado.httpserver import HTTPServer
+
     application = None
     pr_factory = None
 
@@ -214,21 +235,20 @@ def run_server(port, address=None, user=None):
     # This is now the preferred way to start tornado application
     # See https://www.tornadoweb.org/en/stable/guide/running.html
     async def _main():
-        # Run
-        LOGGER.info("Running WPS server on port %s:%s", address, port)
-
         from pyqgiswps.executors import processfactory
 
         nonlocal pr_factory
         pr_factory = processfactory.get_process_factory()
-        processes = pr_factory.initialize(True)
+        # Workers are connected to the broker
+        with_pool = not confservice.get('server', 'broker_frontend')
+        processes = pr_factory.initialize(True, with_pool=with_pool)
 
         max_buffer_size = get_size_bytes(confservice.get('server', 'maxbuffersize'))
 
         nonlocal application
         application = Application(processes)
         server = HTTPServer(initialize_middleware(application), max_buffer_size=max_buffer_size, **kwargs)
-        server.listen(port, address=address)
+        listen(server)
 
         # Setup the supervisor timeout killer
         pr_factory.start_supervisor()
@@ -246,7 +266,6 @@ def run_server(port, address=None, user=None):
         await event.wait()
 
     try:
-        LOGGER.info("WPS Server ready")
         asyncio.run(_main())
     except (KeyboardInterrupt, SystemExit):
         LOGGER.info("Server interrupted")
@@ -255,3 +274,186 @@ def run_server(port, address=None, user=None):
             application.terminate()
         if pr_factory:
             pr_factory.terminate()
+
+
+def _run_frontend(sockets, kwargs):
+    """ Run a front-end process on the shared sockets
+    """
+    _serve(lambda server: server.add_sockets(sockets), kwargs)
+
+
+def run_frontends(port, address, frontends, kwargs):
+    """ Run `frontends` HTTP front-end processes
+
+        Front-ends accept connections on the same sockets and send
+        jobs to a broker. Unless a standalone broker is configured, the
+        broker and the worker pool are run in the current process.
+    """
+    from tornado.netutil import bind_sockets
+
+    from .poolserver.utils import _get_ipc, fork_context
+
+    local_broker = not confservice.get('server', 'broker_frontend')
+    if local_broker:
+        confservice.set('server', 'broker_frontend', _get_ipc('broker_frontend'))
+        confservice.set('server', 'broker_backend', _get_ipc('broker_backend'))
+
+    # Bind sockets before forking so that
+    # connections are balanced between front-ends:
+    # bound sockets are inherited by forking
+    sockets = bind_sockets(port, address=address)
+
+    LOGGER.info("Starting %s front-ends", frontends)
+    processes = []
+    for n in range(frontends):
+        p = fork_context.Process(target=_run_frontend, args=(sockets, kwargs), name=f"Frontend-{n}")
+        p.start()
+        processes.append(p)
+
+    for sock in sockets:
+        sock.close()
+
+    try:
+        if local_broker:
+            _run_pool(with_broker=True, frontends=processes)
+        else:
+            _wait_frontends(processes)
+    finally:
+        for p in processes:
+            if p.exitcode is None:
+                p.terminate()
+        for p in processes:
+            p.join()
+
+
+def _wait_frontends(frontends):
+    """ Wait until one of the front-ends exits
+    """
+    from multiprocessing.connection import wait
+
+    def term_signal(signum, frames):
+        raise SystemExit()
+
+    signal.signal(signal.SIGTERM, term_signal)
+    try:
+        wait([p.sentinel for p in frontends])
+        LOGGER.critical("Front-end process exited unexpectedly")
+    except (KeyboardInterrupt, SystemExit):
+        LOGGER.info("Server interrupted")
+
+
+def _create_broker():
+    """ Create a broker from configuration
+    """
+    from .poolserver.broker import Broker
+    from .poolserver.client import parse_realm_weights
+
+    cfg = confservice['server']
+
+    frontaddr = cfg.get('broker_frontend')
+    backaddr = cfg.get('broker_backend')
+
+    LOGGER.info("Running pool broker (front-ends: %s, workers: %s)", frontaddr, backaddr)
+    return Broker(
+        frontaddr,
+        backaddr,
+        maxqueue=cfg.getint('maxqueuesize'),
+        affinity_wait=cfg.getfloat('affinity_wait'),
+        realm_weights=parse_realm_weights(cfg.get('realm_weights')),
+        realm_max_running=cfg.getint('realm_max_running'),
+        policy=cfg.get('scheduling_policy'),
+    )
+
+
+def run_broker():
+    """ Run a standalone pool broker
+    """
+    cfg = confservice['server']
+    if not cfg.get('broker_frontend') or not cfg.get('broker_backend'):
+        LOGGER.critical("Broker front-end and back-end addresses must be set")
+        return
+
+    async def _main():
+        broker = _create_broker()
+
+        event = asyncio.Event()
+
+        loop = asyncio.get_running_loop()
+        loop.add_signal_handler(signal.SIGINT, event.set)
+        loop.add_signal_handler(signal.SIGTERM, event.set)
+
+        try:
+            await event.wait()
+        finally:
+            broker.close()
+
+    try:
+        asyncio.run(_main())
+    except (KeyboardInterrupt, SystemExit):
+        LOGGER.info("Broker interrupted")
+
+
+def run_pool():
+    """ Run the worker pool only
+
+        Workers connect to the standalone broker
+    """
+    if not confservice.get('server', 'broker_backend'):
+        LOGGER.critical("Broker back-end address must be set")
+        return
+
+    _run_pool()
+
+
+def _run_pool(with_broker=False, frontends=()):
+    """ Run the worker pool
+
+        If `with_broker` is True, run the broker in the current process.
+        Stop if any of the `frontends` processes exits.
+    """
+    from pyqgiswps.executors import processfactory
+
+    pr_factory = None
+
+    async def _main():
+        nonlocal pr_factory
+        pr_factory = processfactory.get_process_factory()
+        pr_factory.initialize()
+
+        broker = None
+        if with_broker:
+            broker = _create_broker()
+            pr_factory.start_autoscaler(broker.client)
+
+        # Setup the supervisor timeout killer
+        pr_factory.start_supervisor()
+
+        event = asyncio.Event()
+
+        loop = asyncio.get_running_loop()
+        loop.add_signal_handler(signal.SIGINT, event.set)
+        loop.add_signal_handler(signal.SIGTERM, event.set)
+        # Reload providers
+        loop.add_signal_handler(signal.SIGHUP, pr_factory.restart_pool)
+
+        def check_frontend():
+            LOGGER.critical("Front-end process exited unexpectedly")
+            event.set()
+
+        for p in frontends:
+            loop.add_reader(p.sentinel, check_frontend)
+
+        LOGGER.info("Worker pool ready")
+        try:
+            await event.wait()
+        finally:
+            if broker:
+                broker.close()
+
+    try:
+        asyncio.run(_main())
+    except (KeyboardInterrupt, SystemExit):
+        LOGGER.info("Pool interrupted")
+    finally:
+        if pr_factory:
+            pr_factory.terminate()
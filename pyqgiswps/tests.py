@@ -340,6 +340,16 @@ class HttpClient:
             ),
         )
 
+    def delete(self, path: str, headers: Optional[Dict] = None) -> HttpResponse:
+        return HttpResponse(
+            self._testcase.fetch(
+                path,
+                method='DELETE',
+                raise_error=False,
+                headers=headers,
+            ),
+        )
+
     def options(self, path: str, headers: Optional[Dict] = None) -> HttpResponse:
         return HttpResponse(
             self._testcase.fetch(
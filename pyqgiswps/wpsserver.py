@@ -13,7 +13,7 @@ import sys
 
 from .config import confservice, load_configuration, read_config_file, warn_unsafe_options
 from .logger import setup_log_handler
-from .runtime import run_server
+from .runtime import run_broker, run_pool, run_server, setuid
 from .version import __description__, __manifest__
 
 LOGGER = logging.getLogger('SRVLOG')
@@ -98,6 +98,27 @@ def read_configuration(args=None):
         help="number of parallel processes",
         dest='parallelprocesses',
     )
+    cli_parser.add_argument(
+        '--frontends',
+        metavar='NUM',
+        type=int,
+        default=argparse.SUPPRESS,
+        help="number of HTTP front-end processes",
+        dest='frontends',
+    )
+    mode = cli_parser.add_mutually_exclusive_group()
+    mode.add_argument(
+        '--broker',
+        action='store_true',
+        default=False,
+        help="Run a standalone pool broker",
+    )
+    mode.add_argument(
+        '--pool-only',
+        action='store_true',
+        default=False,
+        help="Run workers connected to a standalone broker",
+    )
     cli_parser.add_argument(
         '--dump-config',
         action='store_true',
@@ -123,6 +144,7 @@ def read_configuration(args=None):
     set_arg('server', 'port')
     set_arg('server', 'interfaces')
     set_arg('server', 'parallelprocesses')
+    set_arg('server', 'frontends')
 
     if args.debug:
         # Force debug mode
@@ -145,6 +167,7 @@ def read_configuration(args=None):
     conf = confservice['server']
     args.port = conf.getint('port')
     args.interfaces = conf['interfaces']
+    args.frontends = conf.getint('frontends')
     return args
 
 
@@ -152,4 +175,11 @@ def main():
     """ Run the server as cli command
     """
     args = read_configuration()
-    run_server(port=args.port, address=args.interfaces, user=args.setuid)
+    if args.broker:
+        run_broker()
+    elif args.pool_only:
+        if args.setuid:
+            setuid(args.setuid)
+        run_pool()
+    else:
+        run_server(port=args.port, address=args.interfaces, user=args.setuid, frontends=args.frontends)
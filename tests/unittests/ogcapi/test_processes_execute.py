@@ -114,3 +114,60 @@ class ExecuteTest(ApiTestCase):
         # Retrieve the status
         rv = self.client.get(expected_status_path)
         assert_response_success(rv)
+
+    def test_ogcapi_execute_workflow(self):
+        """ Test workflow execution
+        """
+        identifier = "pyqgiswps_test:testcopylayer"
+
+        rv = self.client.post_json(
+            f"/processes/{identifier}/execution:workflow?MAP=france_parts",
+            {
+                'steps': {
+                    'copy': {
+                        'process': identifier,
+                        'inputs': {'INPUT': 'france_parts'},
+                    },
+                },
+                'inputs': {
+                    'INPUT': {'step': 'copy', 'output': 'OUTPUT'},
+                    'OUTPUT': 'france_parts_2',
+                },
+            },
+        )
+
+        resp = assert_response_success(rv, code=200)
+
+        output = resp.get('OUTPUT')
+        assert output is not None
+        assert output.get('type') == 'application/x-ogc-wms'
+
+    def test_ogcapi_execute_workflow_invalid(self):
+        """ Test workflow validation
+        """
+        identifier = "pyqgiswps_test:testcopylayer"
+
+        # Cycle between steps
+        rv = self.client.post_json(
+            f"/processes/{identifier}/execution:workflow?MAP=france_parts",
+            {
+                'steps': {
+                    'a': {'process': identifier, 'inputs': {'INPUT': {'step': 'b', 'output': 'OUTPUT'}}},
+                    'b': {'process': identifier, 'inputs': {'INPUT': {'step': 'a', 'output': 'OUTPUT'}}},
+                },
+                'inputs': {'INPUT': {'step': 'a', 'output': 'OUTPUT'}},
+            },
+        )
+        assert rv.status_code == 400
+
+        # Unknown step output
+        rv = self.client.post_json(
+            f"/processes/{identifier}/execution:workflow?MAP=france_parts",
+            {
+                'steps': {
+                    'a': {'process': identifier, 'inputs': {'INPUT': 'france_parts'}},
+                },
+                'inputs': {'INPUT': {'step': 'a', 'output': 'FOO'}},
+            },
+        )
+        assert rv.status_code == 400
@@ -165,3 +165,20 @@ def test_context_crs_default(outputdir, data):
 
     crs = context.destination_project.crs()
     assert crs.isValid()
+
+
+def test_context_reset(outputdir, data):
+    """ Test that project state is restored
+    """
+    context = ProcessingContext(str(outputdir), 'france_parts.qgs')
+    project = context.project()
+
+    layer = next(lyr for lyr in project.mapLayers().values() if lyr.type() == QgsMapLayer.VectorLayer)
+    layer.selectByExpression("1=1")
+    assert layer.selectedFeatureCount() > 0
+    layer.setSubsetString("1=0")
+
+    context.reset()
+    assert layer.selectedFeatureCount() == 0
+    assert layer.subsetString() == ''
+    assert context.project() is project
@@ -6,6 +6,8 @@ from os import PathLike
 from typing import Tuple
 from urllib.parse import parse_qs, urlparse
 
+import pytest
+
 from qgis.core import (
     Qgis,
     QgsProcessingContext,
@@ -14,13 +16,14 @@ from qgis.core import (
     QgsProject,
 )
 
+from pyqgiswps.app.request import WPSRequest
 from pyqgiswps.config import confservice
 from pyqgiswps.executors.processingio import (
     input_to_processing,
     parse_input_definition,
     parse_output_definition,
 )
-from pyqgiswps.executors.processingprocess import _find_algorithm, run_algorithm
+from pyqgiswps.executors.processingprocess import QgsProcess, _find_algorithm, run_algorithm
 from pyqgiswps.utils.contexts import chdir
 from pyqgiswps.utils.filecache import get_valid_filename
 
@@ -107,3 +110,17 @@ def test_centroides_algorithms(outputdir, data):
     else:
         assert layers[0].dataUrl() == expected_data_url
         assert layers[0].dataUrlFormat() == "text/plain"
+
+
+@pytest.mark.skipif(Qgis.QGIS_VERSION_INT < 33800, reason="Requires Qgis 3.38+")
+def test_parallel_model_plan():
+    """ Plan the child algorithms of a model
+    """
+    process = QgsProcess(_find_algorithm('model:centroides'))
+    assert process.model_handler is not None
+
+    request = WPSRequest()
+    request.identifier = 'model:centroides'
+
+    graph = process.model_handler.plan(request, None)
+    assert graph == {'native:centroids_1': []}
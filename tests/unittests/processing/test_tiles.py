@@ -0,0 +1,30 @@
+#
+# Copyright 2026 3liz
+# Author: David Marteau
+#
+# This Source Code Form is subject to the terms of the Mozilla Public
+# License, v. 2.0. If a copy of the MPL was not distributed with this
+# file, You can obtain one at http://mozilla.org/MPL/2.0/.
+#
+""" Test tiled execution
+"""
+from qgis.core import QgsRectangle
+
+from pyqgiswps.executors.processingprocess import split_extent
+
+
+def test_split_extent():
+    rect = QgsRectangle(0, 0, 200, 100)
+
+    tiles = split_extent(rect, 8)
+    assert len(tiles) == 8
+    assert all(t.width() == 50 and t.height() == 50 for t in tiles)
+
+    # Tiles cover the whole extent
+    union = QgsRectangle(tiles[0])
+    for t in tiles[1:]:
+        union.combineExtentWith(t)
+    assert union == rect
+
+    assert split_extent(rect, 1) == [rect]
+    assert split_extent(QgsRectangle(0, 0, 10, 0), 4) == [QgsRectangle(0, 0, 10, 0)]
@@ -0,0 +1,64 @@
+import time
+
+from multiprocessing import Value
+
+from pyqgiswps.poolserver.autoscaler import Autoscaler
+from pyqgiswps.poolserver.client import ClientStats
+
+
+class _Client:
+    retired = 0
+
+    def retire_worker(self):
+        self.retired += 1
+        return True
+
+
+def test_autoscaler_scale_up():
+    target = Value('i', 1)
+    scaler = Autoscaler(target, _Client(), 1, 4, scale_down_delay=0)
+
+    scaler.update(ClientStats(pending=2, running=1, idle=0, workers=1, max_wait=0.))
+    assert target.value == 3
+
+    # Do not exceed max workers
+    scaler.update(ClientStats(pending=5, running=3, idle=0, workers=3, max_wait=0.))
+    assert target.value == 4
+
+    # Workers starting are not counted twice
+    target.value = 2
+    scaler.update(ClientStats(pending=1, running=1, idle=0, workers=1, max_wait=0.))
+    assert target.value == 2
+
+
+def test_autoscaler_scale_down():
+    client = _Client()
+    target = Value('i', 3)
+    scaler = Autoscaler(target, client, 1, 4, scale_down_delay=0.05)
+
+    idle = ClientStats(pending=0, running=0, idle=3, workers=3, max_wait=0.)
+
+    # First call arm the delay
+    scaler.update(idle)
+    assert target.value == 3
+
+    time.sleep(0.1)
+    scaler.update(idle)
+    assert target.value == 2
+    assert client.retired == 1
+
+    # Busy workers reset the delay
+    scaler.update(ClientStats(pending=0, running=2, idle=0, workers=2, max_wait=0.))
+    time.sleep(0.1)
+    scaler.update(idle)
+    assert target.value == 2
+
+    time.sleep(0.1)
+    scaler.update(idle)
+    assert target.value == 1
+
+    # Never go below min workers
+    time.sleep(0.1)
+    scaler.update(idle)
+    assert target.value == 1
+    assert client.retired == 2
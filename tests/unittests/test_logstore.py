@@ -0,0 +1,129 @@
+import asyncio
+import json
+import uuid
+
+from types import SimpleNamespace
+
+from pyqgiswps.executors.logstore import STATUS, AsyncLogStore
+from pyqgiswps.executors.memstore import MemoryStore
+from pyqgiswps.ogc.api.request import OgcApiRequest
+
+
+def _create_store():
+    store = AsyncLogStore()
+    store.init_session(MemoryStore())
+    return store
+
+
+def _create_request():
+    request = OgcApiRequest()
+    request.identifier = 'report'
+    request.expiration = 3600
+    request.timeout = 60
+    return request
+
+
+def test_log_request():
+
+    async def _test():
+        store = _create_store()
+
+        job_id = uuid.uuid1()
+        record = await store.log_request(job_id, _create_request())
+        assert record['status'] == STATUS.NO_STATUS.name
+
+        status = await store.get_status(job_id)
+        assert status['uuid'] == str(job_id)
+        assert status['identifier'] == 'report'
+
+        request = await store.get_status(job_id, key='request')
+        assert request['identifier'] == 'report'
+
+        assert [s['uuid'] for s in await store.get_status()] == [str(job_id)]
+        assert await store.get_status(uuid.uuid1()) is None
+
+    asyncio.run(_test())
+
+
+def test_coalesced_status():
+
+    async def _test():
+        store = _create_store()
+
+        leader_id, job_id = uuid.uuid1(), uuid.uuid1()
+        leader = await store.log_request(leader_id, _create_request())
+        await store.log_request(job_id, _create_request(), coalesced_with=leader_id)
+
+        # Running job status is reported
+        leader.update(status=STATUS.STARTED_STATUS.name, percent_done=50)
+        await store._db.hset(store._hstatus, str(leader_id), json.dumps(leader))
+
+        status = await store.get_status(job_id)
+        assert status['uuid'] == str(job_id)
+        assert status['status'] == STATUS.STARTED_STATUS.name
+        assert status['percent_done'] == 50
+
+    asyncio.run(_test())
+
+
+def test_json_token():
+
+    async def _test():
+        store = _create_store()
+
+        token = await store.set_json({'uuid': 'foo', 'name': 'bar'}, 30)
+        assert await store.get_json(token) == {'uuid': 'foo', 'name': 'bar'}
+
+        # Expired token
+        token = await store.set_json({'uuid': 'foo'}, 0)
+        assert await store.get_json(token) is None
+
+    asyncio.run(_test())
+
+
+def test_delete_response():
+
+    async def _test():
+        store = _create_store()
+
+        job_id = uuid.uuid1()
+        await store.log_request(job_id, _create_request())
+        await store.write_response(job_id, b'{"status": "successful"}')
+        assert await store.get_results(job_id) == b'{"status": "successful"}'
+
+        await store.delete_response(job_id)
+        assert await store.get_status(job_id) is None
+        assert await store.get_status(job_id, key='request') is None
+        assert await store.get_results(job_id) is None
+
+    asyncio.run(_test())
+
+
+def test_update_dismissed_job():
+
+    async def _test():
+        store = _create_store()
+
+        response = SimpleNamespace(
+            status=STATUS.ERROR_STATUS,
+            message="Algorithm cancelled",
+            status_percentage=0,
+            output_files=[],
+        )
+
+        # Deleted record is not created again
+        job_id = uuid.uuid1()
+        await store.write_response(job_id, b'{"status": "failed"}')
+        await store.update_response(job_id, response)
+        assert await store.get_status(job_id) is None
+        assert await store.get_results(job_id) is None
+
+        # Dismissed job keep its status
+        job_id = uuid.uuid1()
+        record = await store.log_request(job_id, _create_request())
+        record.update(status=STATUS.DISMISS_STATUS.name)
+        await store._db.hset(store._hstatus, str(job_id), json.dumps(record))
+        await store.update_response(job_id, response)
+        assert (await store.get_status(job_id))['status'] == STATUS.DISMISS_STATUS.name
+
+    asyncio.run(_test())
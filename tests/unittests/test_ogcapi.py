@@ -7,8 +7,18 @@
 # file, You can obtain one at http://mozilla.org/MPL/2.0/.
 #
 
+import asyncio
+import json
+import os
+import threading
+
+from urllib.parse import urlparse
+
+from test_common import async_test
 
 from pyqgiswps.app import WPSProcess
+from pyqgiswps.exceptions import ProcessException
+from pyqgiswps.executors.logstore import alogstore
 from pyqgiswps.inout import (
     BoundingBoxInput,
     BoundingBoxOutput,
@@ -18,7 +28,8 @@ from pyqgiswps.inout import (
     LiteralInput,
     LiteralOutput,
 )
-from pyqgiswps.tests import HttpClient, HTTPTestCase
+from pyqgiswps.poolserver.worker import cancel_handler
+from pyqgiswps.tests import HttpClient, HTTPTestCase, chconfig
 
 #
 # HTTP tests
@@ -56,6 +67,40 @@ def create_greeter():
                    outputs=[LiteralOutput('message', 'Output message', data_type='string')])
 
 
+def file_writer(request, response):
+    name = request.inputs['name'][0].data
+    with open(os.path.join(response.process.workdir, 'message.txt'), 'w') as fp:
+        fp.write("Hello %s!" % name)
+    response.outputs['message'].url = 'store:message.txt'
+    return response
+
+
+def create_file_writer():
+    return WPSProcess(handler=file_writer,
+                   identifier='file_writer',
+                   title='File writer',
+                   inputs=[LiteralInput('name', 'Input name', data_type='string')],
+                   outputs=[ComplexOutput('message', 'Output file',
+                                          supported_formats=[Format('text/plain')],
+                                          as_reference=True)])
+
+
+def wait_for_dismiss(request, response):
+    cancelled = threading.Event()
+    with cancel_handler(str(response.uuid), cancelled.set):
+        if cancelled.wait(10):
+            raise ProcessException("Process cancelled")
+    response.outputs['message'].data = "Not dismissed"
+    return response
+
+
+def create_wait_for_dismiss():
+    return WPSProcess(handler=wait_for_dismiss,
+                   identifier='wait_for_dismiss',
+                   title='Wait for dismiss',
+                   outputs=[LiteralOutput('message', 'Output message', data_type='string')])
+
+
 def bbox_process(request, response):
     coords = request.inputs['mybbox'][0].data
     assert isinstance(coords, list)
@@ -118,6 +163,8 @@ class ExecuteTest(ApiTestCase):
             create_ultimate_question(),
             create_greeter(),
             create_bbox_process(),
+            create_file_writer(),
+            create_wait_for_dismiss(),
         ]
 
     def test_execution_with_no_inputs(self):
@@ -150,3 +197,109 @@ class ExecuteTest(ApiTestCase):
         output = doc['outbbox']
         assert output['bbox'][0] == 15.0
         assert output['bbox'][1] == 50.0
+
+    def test_batch_execution(self):
+        request_doc = {
+            'items': [
+                {'inputs': {'name': 'foo'}},
+                {'inputs': {'name': 'bar'}},
+            ],
+        }
+        resp = self.client.post_json("/processes/greeter/execution:batch", request_doc)
+        doc = assert_response_success(resp)
+        assert [item['status'] for item in doc['items']] == ['successful', 'successful']
+        assert doc['items'][1]['outputs']['message'] == "Hello bar!"
+
+    def test_batch_execution_output_files(self):
+        request_doc = {
+            'items': [
+                {'inputs': {'name': 'foo'}},
+                {'inputs': {'name': 'bar'}},
+            ],
+        }
+        resp = self.client.post_json("/processes/file_writer/execution:batch", request_doc)
+        doc = assert_response_success(resp)
+        hrefs = [item['outputs']['message']['href'] for item in doc['items']]
+        # Items write their files in distinct directories
+        assert hrefs[0].endswith('/files/0/message.txt')
+        assert hrefs[1].endswith('/files/1/message.txt')
+        for href, name in zip(hrefs, ('foo', 'bar')):
+            resp = self.client.get(urlparse(href).path)
+            assert resp.status_code == 200
+            assert resp.body == b"Hello %s!" % name.encode()
+
+    def test_download_forwarded_to_owner(self):
+        resp = self.client.post_json("/processes/file_writer/execution", {'inputs': {'name': 'foo'}})
+        assert_response_success(resp)
+        job_id = resp.headers.get('X-Job-Id')
+
+        resp = self.client.put(f"/jobs/{job_id}/files/message.txt?COMMAND=geturl", "")
+        path = urlparse(assert_response_success(resp)['href']).path
+        resp = self.client.get(path)
+        assert resp.status_code == 200
+        assert resp.body == b"Hello foo!"
+
+        # Job owned by an unreachable node
+        record = self.io_loop.run_sync(lambda: alogstore.get_status(job_id))
+        record.update(node='other', node_url='http://127.0.0.1:1/')
+        self.io_loop.run_sync(lambda: alogstore._db.hset(alogstore._hstatus, job_id, json.dumps(record)))
+        resp = self.client.get(path)
+        assert resp.status_code == 502
+
+    @async_test
+    def test_dismiss_running_job(self):
+        resp = self.client.post_json(
+            "/processes/wait_for_dismiss/execution",
+            {},
+            headers={'Prefer': 'respond-async'},
+        )
+        job_id = assert_response_success(resp, code=201)['jobID']
+
+        # Wait for the job to start
+        self.io_loop.run_sync(lambda: asyncio.sleep(1))
+        resp = self.client.delete(f"/jobs/{job_id}")
+        assert assert_response_success(resp)['status'] == 'dismissed'
+
+        # The cancelled job does not record its status again
+        self.io_loop.run_sync(lambda: asyncio.sleep(2))
+        resp = self.client.get(f"/jobs/{job_id}")
+        assert resp.status_code == 404
+        doc = assert_response_success(self.client.get("/jobs/"))
+        assert job_id not in [job['jobID'] for job in doc['jobs']]
+
+    @async_test
+    def test_dismiss_coalesced_job(self):
+        with chconfig('server', 'coalesced_processes', 'wait_for_dismiss'):
+            jobs = []
+            for _ in range(2):
+                resp = self.client.post_json(
+                    "/processes/wait_for_dismiss/execution",
+                    {},
+                    headers={'Prefer': 'respond-async'},
+                )
+                jobs.append(assert_response_success(resp, code=201)['jobID'])
+        leader, follower = jobs
+
+        # Wait for the job to start
+        self.io_loop.run_sync(lambda: asyncio.sleep(1))
+        resp = self.client.delete(f"/jobs/{follower}")
+        assert assert_response_success(resp)['status'] == 'dismissed'
+
+        # The running job is not cancelled
+        self.io_loop.run_sync(lambda: asyncio.sleep(1))
+        assert self.client.get(f"/jobs/{follower}").status_code == 404
+        doc = assert_response_success(self.client.get(f"/jobs/{leader}"))
+        assert doc['status'] == 'running'
+
+        resp = self.client.delete(f"/jobs/{leader}")
+        assert assert_response_success(resp)['status'] == 'dismissed'
+
+    def test_batch_execution_invalid_item(self):
+        request_doc = {
+            'items': [
+                {'inputs': {'name': 'foo'}},
+                {'inputs': {}},
+            ],
+        }
+        resp = self.client.post_json("/processes/greeter/execution:batch", request_doc)
+        assert resp.status_code == 400
@@ -0,0 +1,126 @@
+import asyncio
+import threading
+
+from pyqgiswps.poolserver.broker import Broker, BrokerClient
+from pyqgiswps.poolserver.client import QueueTimeoutExceeded, _PendingJob
+from pyqgiswps.poolserver.controller import Controller
+from pyqgiswps.poolserver.server import create_poolserver
+from pyqgiswps.poolserver.utils import BROKER_CANCEL, _get_ipc
+from pyqgiswps.poolserver.worker import cancel_handler
+
+
+def test_broker_queue_timeout():
+
+    async def _test():
+        frontaddr = _get_ipc('test_broker_frontend')
+        broker = Broker(frontaddr, _get_ipc('test_broker_backend'))
+        client = BrokerClient(frontaddr)
+        try:
+            # All workers busy, 2 jobs pending
+            loop = asyncio.get_running_loop()
+            broker.client._worker_tags = {b'1': frozenset()}
+            broker.client._update_job_time(10.)
+            for _ in range(2):
+                broker.client._enqueue(_PendingJob('A', None, loop.create_future()))
+
+            try:
+                await client.apply_async(print, timeout=60, queue_timeout=5)
+            except QueueTimeoutExceeded as e:
+                assert e.retry_after == 30.
+            else:
+                raise AssertionError("QueueTimeoutExceeded not raised")
+
+            # Cancel queued job
+            broker.client._enqueue(_PendingJob('A', None, loop.create_future(), job_id='foo'))
+            assert broker.client.queue_position('foo') is not None
+            assert await client.cancel_job('foo', 1)
+            assert broker.client.queue_position('foo') is None
+            # No pool process running the job
+            assert not await client.cancel_job('foo', 1)
+
+            # Front-end is notified of the cancelled job
+            job = asyncio.ensure_future(client.apply_async(print, timeout=60, queue_timeout=60, job_id='bar'))
+            await asyncio.sleep(0.1)
+            assert await client.cancel_job('bar', 1)
+            try:
+                await job
+            except asyncio.CancelledError:
+                pass
+            else:
+                raise AssertionError("Job not cancelled")
+        finally:
+            client.close()
+            broker.close()
+
+    asyncio.run(_test())
+
+
+def test_broker_cancel_running_job():
+
+    async def _test():
+        frontaddr = _get_ipc('test_broker_frontend')
+        backaddr = _get_ipc('test_broker_backend')
+        broker = Broker(frontaddr, backaddr)
+        client = BrokerClient(frontaddr)
+
+        # Pool process running the job 'foo'
+        commands = []
+
+        def handler(command, args):
+            commands.append((command, args))
+            return args[0] == b'foo'
+
+        controller = Controller(backaddr, handler)
+        controller.run()
+        try:
+            await asyncio.sleep(0.2)
+            assert await client.cancel_job('foo', 1)
+            assert not await client.cancel_job('bar', 1)
+            assert commands == [
+                (BROKER_CANCEL, [b'foo', b'1']),
+                (BROKER_CANCEL, [b'bar', b'1']),
+            ]
+        finally:
+            controller.stop()
+            client.close()
+            broker.close()
+
+    asyncio.run(_test())
+
+
+def wait_for_cancel(job_id: str, timeout: float) -> bool:
+    cancelled = threading.Event()
+    with cancel_handler(job_id, cancelled.set):
+        return cancelled.wait(timeout)
+
+
+def test_frontend_dismiss_running_job():
+
+    frontaddr = _get_ipc('test_broker_frontend')
+    backaddr = _get_ipc('test_broker_backend')
+    server = create_poolserver(1, timeout=10, router=backaddr)
+
+    async def _test():
+        broker = Broker(frontaddr, backaddr)
+        server.start_supervisor()
+        # Front-end without pool
+        client = BrokerClient(frontaddr)
+        try:
+            job = asyncio.ensure_future(client.apply_async(
+                wait_for_cancel,
+                args=('foo', 5),
+                timeout=10,
+                job_id='foo',
+            ))
+            # Wait for the job to start
+            await asyncio.sleep(1)
+            assert await client.cancel_job('foo', 5)
+            assert await asyncio.wait_for(job, 2)
+        finally:
+            client.close()
+            broker.close()
+
+    try:
+        asyncio.run(_test())
+    finally:
+        server.terminate()
@@ -0,0 +1,291 @@
+import asyncio
+
+import zmq
+import zmq.asyncio
+
+from pyqgiswps.poolserver.client import QueueTimeoutExceeded, _Client, _PendingJob
+from pyqgiswps.poolserver.utils import WORKER_READY, _get_ipc
+
+
+def _run_dispatch(client, jobs, workers):
+    loop = asyncio.get_running_loop()
+    pending = []
+    for realm, affinity in jobs:
+        job = _PendingJob(realm, affinity, loop.create_future())
+        if affinity:
+            job.deadline = loop.time() + client._affinity_wait
+        client._enqueue(job)
+        pending.append(job)
+    client._dispatch()
+    for worker_id in workers:
+        client._worker_s.append(worker_id)
+        client._dispatch()
+    return pending
+
+
+def test_fair_scheduling():
+
+    async def _test():
+        client = _Client(_get_ipc('test_fair_scheduling'), realm_weights={'B': 2})
+        try:
+            jobs = [('A', None)] * 4 + [('B', None)] * 4
+            pending = _run_dispatch(client, jobs, [b'%d' % i for i in range(6)])
+
+            # Check the order of assigned workers
+            order = sorted((job.future.result(), job.realm) for job in pending if job.future.done())
+            assert [realm for _, realm in order] == ['A', 'B', 'B', 'A', 'B', 'B']
+        finally:
+            client.close()
+
+    asyncio.run(_test())
+
+
+def test_realm_max_running():
+
+    async def _test():
+        client = _Client(_get_ipc('test_realm_max_running'), realm_max_running=2)
+        try:
+            jobs = [('A', None)] * 4 + [('B', None)]
+            pending = _run_dispatch(client, jobs, [b'1', b'2', b'3', b'4'])
+
+            assigned = [job.realm for job in pending if job.future.done()]
+            assert assigned == ['A', 'A', 'B']
+            assert client._worker_s == [b'4']
+
+            # Release one slot
+            client._release('A')
+            assert pending[2].future.done()
+            assert not pending[3].future.done()
+        finally:
+            client.close()
+
+    asyncio.run(_test())
+
+
+def test_affinity_scheduling():
+
+    async def _test():
+        client = _Client(_get_ipc('test_affinity_scheduling'), affinity_wait=10)
+        try:
+            client._worker_tags = {b'1': frozenset(), b'2': frozenset((b'foo',)), b'3': frozenset((b'foo',))}
+
+            # Idle worker holding the tag
+            client._worker_s.extend((b'1', b'2'))
+            pending = _run_dispatch(client, [('A', b'foo')], [])
+            assert pending[0].future.result() == b'2'
+
+            # Busy worker holding the tag: wait for it
+            pending = _run_dispatch(client, [('A', b'foo'), ('A', None)], [])
+            assert not pending[0].future.done()
+            assert pending[1].future.result() == b'1'
+
+            client._worker_s.append(b'3')
+            client._dispatch()
+            assert pending[0].future.result() == b'3'
+        finally:
+            client.close()
+
+    asyncio.run(_test())
+
+
+def test_admission_control():
+
+    async def _test():
+        client = _Client(_get_ipc('test_admission_control'))
+        try:
+            client._worker_tags = {b'1': frozenset(), b'2': frozenset()}
+
+            # No history: do not reject
+            assert client.estimated_wait() == 0
+
+            client._update_job_time(10.)
+            # Idle worker available
+            client._worker_s.append(b'1')
+            assert client.estimated_wait() == 0
+
+            # All workers busy, 3 jobs pending
+            client._worker_s.clear()
+            _run_dispatch(client, [('A', None)] * 3, [])
+            assert client.estimated_wait() == 20.
+
+            try:
+                client.apply_async(print, timeout=60, queue_timeout=5)
+            except QueueTimeoutExceeded as e:
+                assert e.retry_after == 20.
+            else:
+                raise AssertionError("QueueTimeoutExceeded not raised")
+        finally:
+            client.close()
+
+    asyncio.run(_test())
+
+
+def test_admission_dead_jobs():
+
+    async def _test():
+        client = _Client(_get_ipc('test_admission_dead_jobs'), maxqueue=1)
+        try:
+            # Timed out and cancelled jobs
+            timedout = asyncio.create_task(client._get_worker(0.01))
+            cancelled = asyncio.create_task(client._get_worker(60, job_id='foo'))
+            await asyncio.sleep(0)
+            assert client.cancel_job('foo')
+            for task in (timedout, cancelled):
+                try:
+                    await task
+                except (asyncio.TimeoutError, asyncio.CancelledError):
+                    pass
+
+            # Dead jobs are purged from the queue
+            assert client._queue == []
+            client._admit(60)
+        finally:
+            client.close()
+
+    asyncio.run(_test())
+
+
+def test_sjf_scheduling():
+
+    async def _test():
+        client = _Client(_get_ipc('test_sjf_scheduling'), policy='sjf')
+        try:
+            loop = asyncio.get_running_loop()
+            jobs = [('A', 100.), ('A', 10.), ('B', 5.), ('A', 1.)]
+            pending = []
+            for realm, cost in jobs:
+                job = _PendingJob(realm, None, loop.create_future(), cost=cost, job_id=str(cost))
+                job.submitted = loop.time()
+                client._enqueue(job)
+                pending.append(job)
+
+            # Shortest jobs first in each realm, fair between realms
+            assert [job.cost for *_, job in client._queue] == [1., 5., 10., 100.]
+            assert client.queue_position('10.0')[0] == 2
+
+            # Long job is not ordered after its start deadline
+            pending[0].start_deadline = pending[0].submitted
+            client._reorder('A')
+            assert [job.cost for *_, job in client._queue] == [100., 5., 1., 10.]
+        finally:
+            client.close()
+
+    asyncio.run(_test())
+
+
+def test_cancel_queued_job():
+
+    async def _test():
+        client = _Client(_get_ipc('test_cancel_queued_job'))
+        try:
+            loop = asyncio.get_running_loop()
+            pending = [_PendingJob('A', None, loop.create_future(), job_id=str(i)) for i in range(2)]
+            for job in pending:
+                client._enqueue(job)
+
+            assert client.cancel_job('0')
+            assert not client.cancel_job('0')
+            assert client.queue_position('1')[0] == 0
+
+            client._worker_s.append(b'1')
+            client._dispatch()
+            assert pending[1].future.result() == b'1'
+        finally:
+            client.close()
+
+    asyncio.run(_test())
+
+
+def test_worker_credits():
+
+    async def _test():
+        client = _Client(_get_ipc('test_worker_credits'))
+        try:
+            loop = asyncio.get_running_loop()
+            client._worker_slots = {b'1': 3, b'2': 3}
+            client._put_worker(b'1', 3)
+            client._put_worker(b'2', 2)
+
+            def submit(shared):
+                job = _PendingJob('A', None, loop.create_future(), shared=shared)
+                client._enqueue(job)
+                client._dispatch()
+                return job
+
+            # Shared jobs fill partially used workers first
+            assert submit(True).future.result() == b'2'
+            assert submit(True).future.result() == b'2'
+            assert client._worker_s == [b'1']
+
+            # Exclusive jobs take the whole worker
+            assert submit(False).future.result() == b'1'
+            assert client._worker_s == []
+
+            # Partially used worker cannot run exclusive jobs
+            client._put_worker(b'2', 1)
+            job = submit(False)
+            assert not job.future.done()
+            assert submit(True).future.result() == b'2'
+
+            # Worker reports all its credits
+            client._put_worker(b'2', 3)
+            assert job.future.result() == b'2'
+        finally:
+            client.close()
+
+    asyncio.run(_test())
+
+
+def test_ready_with_inflight_jobs():
+
+    async def _test():
+        address = _get_ipc('test_ready_with_inflight_jobs')
+        client = _Client(address)
+        worker = zmq.asyncio.Context.instance().socket(zmq.DEALER)
+        worker.setsockopt(zmq.IDENTITY, b'1')
+        worker.setsockopt(zmq.LINGER, 0)
+        worker.connect(address)
+        try:
+            loop = asyncio.get_running_loop()
+
+            seq = iter(range(100))
+
+            async def ready(credits, received):
+                # Tag the notification for checking it has been handled
+                tag = b'%d' % next(seq)
+                await worker.send_multipart([WORKER_READY, b'%d' % credits, b'2', b'%d' % received, tag])
+                while client._worker_tags.get(b'1') != {tag}:
+                    await asyncio.sleep(0.01)
+
+            def submit(shared):
+                job = _PendingJob('A', None, loop.create_future(), shared=shared)
+                client._enqueue(job)
+                client._dispatch()
+                return job
+
+            await ready(2, 0)
+            assert client._credits(b'1') == 2
+            assert submit(True).future.result() == b'1'
+
+            # Notification sent before the worker received the job
+            await ready(2, 0)
+            assert client._credits(b'1') == 1
+
+            # Exclusive job waits for the shared job
+            exclusive = submit(False)
+            await ready(1, 1)
+            assert client._credits(b'1') == 1
+            assert not exclusive.future.done()
+
+            # Shared job is done
+            await ready(2, 1)
+            assert exclusive.future.result() == b'1'
+
+            # Notification sent before the worker received the exclusive job
+            await ready(2, 1)
+            assert b'1' not in client._worker_s
+        finally:
+            worker.close()
+            client.close()
+
+    asyncio.run(_test())
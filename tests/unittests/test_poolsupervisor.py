@@ -0,0 +1,37 @@
+import asyncio
+import os
+
+from pyqgiswps.poolserver.supervisor import Client, Supervisor
+
+
+def test_supervisor_cancel_job():
+
+    async def _test():
+        killed = []
+        supervisor = Supervisor(60, killed.append)
+        supervisor.run()
+        client = Client()
+        try:
+            await asyncio.sleep(0.1)
+            # Two shared jobs running in the same worker
+            client.notify_busy(b'a', 30, 'A')
+            client.notify_busy(b'b', 30, 'B')
+            await asyncio.sleep(0.1)
+
+            assert not supervisor.cancel_job('C', 0.1)
+
+            # Worker is not killed while running other jobs
+            assert supervisor.cancel_job('A', 0.1)
+            await asyncio.sleep(0.2)
+            assert killed == []
+
+            client.notify_done(b'b')
+            await asyncio.sleep(0.1)
+            assert supervisor.cancel_job('A', 0.1)
+            await asyncio.sleep(0.2)
+            assert killed == [os.getpid()]
+        finally:
+            client.close()
+            supervisor.stop()
+
+    asyncio.run(_test())
@@ -0,0 +1,28 @@
+from pyqgiswps.poolserver.utils import OutOfBandBytes, pack, unpack
+from pyqgiswps.poolserver.worker import MemoryLimits
+
+MB = 1024 * 1024
+
+
+def test_memory_limits():
+    assert not MemoryLimits().exceeded(1000 * MB, 10 * MB)
+
+    limits = MemoryLimits(max_rss=500)
+    assert not limits.exceeded(400 * MB, 10 * MB)
+    assert limits.exceeded(600 * MB, 10 * MB)
+
+    limits = MemoryLimits(max_growth=100)
+    assert not limits.exceeded(400 * MB, 350 * MB)
+    assert limits.exceeded(400 * MB, 250 * MB)
+
+
+def test_out_of_band_bytes():
+    data = b'x' * 1024
+    frames = pack({'data': OutOfBandBytes(data), 'inline': data})
+    # Data is sent in its own frame
+    assert len(frames) == 2
+    assert bytes(frames[1]) == data
+
+    obj = unpack([bytes(f) for f in frames])
+    assert type(obj['data']) is bytes
+    assert obj == {'data': data, 'inline': data}
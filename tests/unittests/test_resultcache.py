@@ -0,0 +1,93 @@
+import copy
+import os
+import uuid
+
+from pyqgiswps.app import WPSProcess
+from pyqgiswps.app.request import WPSRequest, WPSResponse
+from pyqgiswps.executors.resultcache import ResultCache, request_key
+from pyqgiswps.inout import LiteralInput, LiteralOutput
+
+
+def _create_process():
+    return WPSProcess(handler=None,
+                      identifier='report',
+                      title='Report',
+                      inputs=[LiteralInput('name', 'Input name', data_type='string')],
+                      outputs=[LiteralOutput('report', 'Report url', data_type='string')])
+
+
+def _create_request(name):
+    request = WPSRequest()
+    request.identifier = 'report'
+    request.host_url = 'http://localhost/'
+    inpt = LiteralInput('name', 'Input name', data_type='string')
+    inpt.data = name
+    request.inputs = {'name': [inpt]}
+    return request
+
+
+def _create_response(request, workdir):
+    process = copy.deepcopy(_create_process())
+    job = uuid.uuid1()
+    process.set_workdir(os.path.join(workdir, str(job)))
+    os.makedirs(process.workdir)
+    return WPSResponse(process, request, job)
+
+
+def test_request_key():
+    request = _create_request('foo')
+    key = request_key(request, '1.0', None)
+
+    # Execution mode does not change the results
+    request.execute_async = True
+    request.timeout = 10
+    assert request_key(request, '1.0', None) == key
+
+    assert request_key(_create_request('bar'), '1.0', None) != key
+    assert request_key(request, '2.0', None) != key
+    assert request_key(request, '1.0', '2026-01-01T00:00:00') != key
+
+
+def test_store_restore(tmp_path):
+    cache = ResultCache(str(tmp_path / 'cache'), 1 << 20)
+
+    request = _create_request('foo')
+    key = request_key(request, '1.0', None)
+
+    response = _create_response(request, str(tmp_path))
+    assert not cache.restore(key, response)
+
+    with open(os.path.join(response.process.workdir, 'report.qgs'), 'w') as fh:
+        fh.write(f"jobs/{response.uuid}/files/report.txt")
+    with open(os.path.join(response.process.workdir, 'processing.log'), 'w') as fh:
+        fh.write("log")
+    response.outputs['report'].data = f"jobs/{response.uuid}/files/report.qgs"
+    cache.store(key, response)
+
+    restored = _create_response(request, str(tmp_path))
+    assert cache.restore(key, restored)
+
+    workdir = restored.process.workdir
+    assert restored.outputs['report'].data == f"jobs/{restored.uuid}/files/report.qgs"
+    with open(os.path.join(workdir, 'report.qgs')) as fh:
+        assert fh.read() == f"jobs/{restored.uuid}/files/report.txt"
+    assert not os.path.exists(os.path.join(workdir, 'processing.log'))
+
+
+def test_eviction(tmp_path):
+    cache = ResultCache(str(tmp_path / 'evict'), 1500)
+
+    keys = []
+    for name in ('a', 'b', 'c'):
+        request = _create_request(name)
+        key = request_key(request, '1.0', None)
+        response = _create_response(request, str(tmp_path))
+        with open(os.path.join(response.process.workdir, 'data.bin'), 'wb') as fh:
+            fh.write(b'x' * 600)
+        cache.store(key, response)
+        keys.append(key)
+
+    # Least recently used entry has been evicted
+    entries = {e.name for e in (tmp_path / 'evict').iterdir()}
+    assert keys[0] not in entries
+    assert keys[2] in entries
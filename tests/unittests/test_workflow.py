@@ -0,0 +1,31 @@
+import pytest
+
+from pyqgiswps.app.workflow import StepRef, sort_steps, split_step_refs
+from pyqgiswps.exceptions import InvalidParameterValue
+
+
+def test_split_step_refs():
+    values, refs = split_step_refs({
+        'INPUT': {'step': 'a', 'output': 'OUTPUT'},
+        'DISTANCE': 10,
+        'EXTENT': {'bbox': [0, 0, 1, 1]},
+    })
+    assert values == {'DISTANCE': 10, 'EXTENT': {'bbox': [0, 0, 1, 1]}}
+    assert refs == {'INPUT': StepRef('a', 'OUTPUT')}
+
+    with pytest.raises(InvalidParameterValue):
+        split_step_refs({'INPUT': {'step': 'a'}})
+
+
+def test_sort_steps():
+    deps = {'a': [], 'b': ['a'], 'c': ['a', 'b'], 'unused': []}
+    assert sort_steps(deps, ['c', 'a']) == ['a', 'b', 'c']
+
+    # Unknown step
+    with pytest.raises(InvalidParameterValue) as exc:
+        sort_steps({'a': ['foo']}, ['a'])
+    assert exc.value.locator == 'steps/a'
+
+    # Cycle
+    with pytest.raises(InvalidParameterValue):
+        sort_steps({'a': ['b'], 'b': ['a']}, ['a'])